@@ -0,0 +1,63 @@
+"""JSON decode/encode cost per codec on the golden fixtures.
+
+Decodes every ``/r/initial`` payload and telemetry response in
+``tests/device_info`` plus a typical MQTT 5-second sensor frame, from
+``bytes`` as the clients receive them, and encodes a desired-state
+command, with each codec :mod:`blueair_api.codec` finds installed
+(stdlib ``json`` always, ``orjson`` / ``msgspec`` if present).
+
+Run from the repository root after ``pip install -e .[speedups]``::
+
+    python benchmarks/bench_json_codec.py [iterations]
+"""
+import sys
+import time
+from pathlib import Path
+
+from blueair_api import codec
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "device_info"
+
+MQTT_FRAME = (
+    b'[{"n":"pm1","v":2.0},{"n":"pm2_5","v":3.0},{"n":"pm10","v":4.0},'
+    b'{"n":"tVOC","v":112.0},{"n":"t","v":21.5},{"n":"h","v":41.0},'
+    b'{"n":"fsp0","v":11.0},{"n":"rssi","v":-52.0}]'
+)
+COMMAND = {"state": {"desired": {"fanspeed": 37}}, "clientToken": "0" * 32}
+
+
+def _cpu_per_call(func, arg, iterations):
+    started = time.process_time()
+    for _ in range(iterations):
+        func(arg)
+    return (time.process_time() - started) / iterations
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    payloads = sorted(FIXTURES.glob("*.json"))
+    rest = [path.read_bytes() for path in payloads]
+    rest_bytes = sum(len(raw) for raw in rest)
+
+    print(f"iterations: {iterations}; {len(rest)} REST fixtures, {rest_bytes} bytes")
+    print(f"{'codec':<10}{'REST decode':>16}{'MQTT frame':>14}{'command':>12}{'vs json':>10}")
+    codecs = codec.available_codecs()
+    # The stdlib codec is always installed; measure it first as the baseline.
+    baseline = None
+    for name in ["json", *(name for name in codecs if name != "json")]:
+        selected = codecs[name]
+        rest_cost = sum(_cpu_per_call(selected.loads, raw, iterations) for raw in rest)
+        frame_cost = _cpu_per_call(selected.loads, MQTT_FRAME, iterations)
+        command_cost = _cpu_per_call(selected.dumps, COMMAND, iterations)
+        if baseline is None:
+            baseline = rest_cost
+        print(
+            f"{name:<10}{rest_cost * 1e6:13.1f} us{frame_cost * 1e6:11.2f} us"
+            f"{command_cost * 1e6:9.2f} us{baseline / rest_cost:9.1f}x"
+        )
+    if len(codecs) == 1:
+        print("only the stdlib codec is installed; pip install orjson to compare")
+
+
+if __name__ == "__main__":
+    main()
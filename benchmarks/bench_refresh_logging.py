@@ -0,0 +1,66 @@
+"""Per-refresh CPU cost of debug formatting in ``DeviceAws`` refreshes.
+
+Before lazy diagnostics, ``DeviceAws.refresh`` always ran
+``json.dumps(..., indent=2)`` on both payloads, built f-strings with the
+full dataclass repr, and ``SensorPack`` formatted one message per SenML
+field — whether or not DEBUG was enabled.  This script applies the golden
+fixtures from ``tests/device_info`` with DEBUG disabled (what production
+pays now) and with DEBUG enabled and formatted to ``os.devnull`` (roughly
+what every refresh used to pay), and reports the difference.
+
+Run from the repository root after ``pip install -e .``::
+
+    python benchmarks/bench_refresh_logging.py [iterations]
+"""
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from blueair_api.device_aws import DeviceAws
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "device_info"
+
+
+def _load(name):
+    with open(FIXTURES / name) as fp:
+        return json.load(fp)
+
+
+def _cpu_per_refresh(device, info, sensors, iterations):
+    started = time.process_time()
+    for _ in range(iterations):
+        device._apply_refresh(info, sensors)
+    return (time.process_time() - started) / iterations
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    info = _load("protect_7470i.json")
+    sensors = _load("protect_7470i_sensors.json")
+    device = DeviceAws(api=None, uuid=info["id"], name_api="bench")  # type: ignore[arg-type]
+
+    logger = logging.getLogger("blueair_api")
+    logger.propagate = False
+    with open(os.devnull, "w") as devnull:
+        handler = logging.StreamHandler(devnull)
+        logger.addHandler(handler)
+
+        logger.setLevel(logging.INFO)
+        disabled = _cpu_per_refresh(device, info, sensors, iterations)
+
+        logger.setLevel(logging.DEBUG)
+        enabled = _cpu_per_refresh(device, info, sensors, iterations)
+        logger.removeHandler(handler)
+
+    print(f"iterations:             {iterations}")
+    print(f"DEBUG off (lazy):       {disabled * 1e6:9.1f} us/refresh")
+    print(f"DEBUG on (formatted):   {enabled * 1e6:9.1f} us/refresh")
+    print(f"saved per refresh:      {(enabled - disabled) * 1e6:9.1f} us "
+          f"({(1 - disabled / enabled) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
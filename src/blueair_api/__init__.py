@@ -1,13 +1,42 @@
-from .errors import BaseError, RateError, AuthError, SessionError, LoginError
+from .errors import (
+    BaseError,
+    RateError,
+    ServerError,
+    ClientRequestError,
+    CircuitOpenError,
+    DeadlineExceededError,
+    CommandRejectedError,
+    AuthError,
+    SessionError,
+    LoginError,
+)
 from .http_blueair import HttpBlueair
 from .http_aws_blueair import HttpAwsBlueair
 from .mqtt_aws_blueair import MqttAwsBlueair
+from .credential_store import (
+    CredentialStore,
+    FileCredentialStore,
+    MemoryCredentialStore,
+    StoredCredentials,
+)
+from .circuit_breaker import CircuitBreaker, CircuitState
+from .coalesce import SetterCoalescer
+from .deadline import deadline
+from .hedging import Hedger
+from .offload import LoopLagMonitor, OffloadOptions
+from .command_tracker import CommandConfirmation, CommandTracker, LatencyHistogram
+from .rate_limit import RateLimiter, TokenBucket
+from .retry import RetryPolicy
+from .scheduler import Priority, RequestScheduler, request_priority
+from .state_cache import StateCache
+from .util_http import ConnectionOptions
 from .region_discovery import (
     CandidateProbe,
     CloudRegionScan,
     device_state_looks_frozen,
     discover_cloud_region,
 )
+from .telemetry_export import TelemetryRecord, iter_telemetry, write_csv, write_ndjson
 from .util_bootstrap import get_devices, get_aws_devices
 from .device import Device
 from .device_aws import DeviceAws, AP_SUB_MODE_LABELS
@@ -0,0 +1,175 @@
+"""Per-host circuit breaking for degraded endpoints.
+
+When a cloud region degrades, every request to it waits out the full
+timeout (and is then retried), so poll cycles pile up behind requests
+that were never going to succeed.  :class:`CircuitBreaker` keeps one
+:class:`Circuit` per host.  After ``failure_threshold`` consecutive
+failures the circuit opens and requests to the host fail immediately
+with :class:`~blueair_api.errors.CircuitOpenError`.  Once
+``reset_timeout`` has passed the circuit is half-open: a single probe
+request goes through, closing the circuit if it succeeds and re-opening
+it if it fails.
+
+Only failures that say something about the endpoint count: server
+errors, timeouts and connection failures.  A 4xx, an auth failure or
+throttling leave the circuit alone.
+"""
+from __future__ import annotations
+
+import asyncio
+import enum
+import functools
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from logging import getLogger
+
+from aiohttp import ClientConnectionError
+
+from .errors import CircuitOpenError, DeadlineExceededError, ServerError
+from .rate_limit import request_host
+
+_LOGGER = getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+def _default_trip_on() -> tuple[type[BaseException], ...]:
+    return (ServerError, ClientConnectionError, asyncio.TimeoutError)
+
+
+class CircuitState(enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class Circuit:
+    """Health of one host, as seen by :class:`CircuitBreaker`."""
+    failures: int = 0
+    opened_at: float | None = None
+    probing: bool = False
+    times_opened: int = 0
+
+    def state(self, now: float, reset_timeout: float) -> CircuitState:
+        if self.opened_at is None:
+            return CircuitState.CLOSED
+        if now - self.opened_at < reset_timeout:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+
+class CircuitBreaker:
+    """Fails requests to unhealthy hosts fast instead of waiting them out."""
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        trip_on: tuple[type[BaseException], ...] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError(f"failure_threshold must be positive, got {failure_threshold}")
+        if reset_timeout <= 0:
+            raise ValueError(f"reset_timeout must be positive, got {reset_timeout}")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trip_on = trip_on if trip_on is not None else _default_trip_on()
+        self.circuits: dict[str, Circuit] = {}
+        self._clock = clock
+
+    def state(self, host: str) -> CircuitState:
+        circuit = self.circuits.get(host)
+        if circuit is None:
+            return CircuitState.CLOSED
+        return circuit.state(self._clock(), self.reset_timeout)
+
+    def states(self) -> dict[str, CircuitState]:
+        return {host: self.state(host) for host in self.circuits}
+
+    def retry_after(self, host: str) -> float | None:
+        """Seconds until an open circuit admits a probe, else ``None``."""
+        circuit = self.circuits.get(host)
+        if circuit is None or circuit.opened_at is None:
+            return None
+        return max(0.0, circuit.opened_at + self.reset_timeout - self._clock())
+
+    def before_request(self, host: str) -> None:
+        """Raise :class:`CircuitOpenError` unless a request may go to ``host``."""
+        circuit = self.circuits.setdefault(host, Circuit())
+        state = circuit.state(self._clock(), self.reset_timeout)
+        if state is CircuitState.CLOSED:
+            return
+        if state is CircuitState.HALF_OPEN and not circuit.probing:
+            _LOGGER.debug("circuit for %s half-open; sending a probe", host)
+            circuit.probing = True
+            return
+        raise CircuitOpenError(
+            f"circuit for {host} is open", host=host, retry_after=self.retry_after(host)
+        )
+
+    def succeeded(self, host: str) -> None:
+        circuit = self.circuits.setdefault(host, Circuit())
+        if circuit.opened_at is not None:
+            _LOGGER.info("circuit for %s closed; endpoint recovered", host)
+        circuit.failures = 0
+        circuit.opened_at = None
+        circuit.probing = False
+
+    def failed(self, host: str, error: BaseException) -> None:
+        if isinstance(error, DeadlineExceededError):
+            # Cut short by the caller's budget, not by the endpoint.
+            self.cancelled(host)
+            return
+        circuit = self.circuits.setdefault(host, Circuit())
+        if not isinstance(error, self.trip_on):
+            # Not the endpoint's fault; a probe that got this far shows
+            # the host is reachable.
+            if circuit.probing:
+                self.succeeded(host)
+            return
+        circuit.failures += 1
+        if circuit.probing or circuit.failures >= self.failure_threshold:
+            if circuit.opened_at is None or circuit.probing:
+                circuit.times_opened += 1
+                _LOGGER.warning(
+                    "circuit for %s opened after %d failure(s) (%r)",
+                    host, circuit.failures, error,
+                )
+            circuit.opened_at = self._clock()
+            circuit.probing = False
+
+    def cancelled(self, host: str) -> None:
+        """A request was abandoned before its outcome was known."""
+        circuit = self.circuits.get(host)
+        if circuit is not None:
+            circuit.probing = False
+
+
+def request_with_circuit_breaker(func):
+    """Guard the request with ``self.circuit_breaker``, keyed by URL host.
+
+    Must wrap ``request_with_errors`` so it sees classified errors, and
+    sit inside ``request_with_retry`` so every attempt is counted.
+    """
+    @functools.wraps(func)
+    async def request_with_circuit_breaker_wrapper(*args, **kwargs):
+        self = args[0]
+        breaker: CircuitBreaker = self.circuit_breaker
+        host = request_host(kwargs["url"])
+        breaker.before_request(host)
+        try:
+            response = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            breaker.cancelled(host)
+            raise
+        except Exception as e:
+            breaker.failed(host, e)
+            raise
+        breaker.succeeded(host)
+        return response
+
+    return request_with_circuit_breaker_wrapper
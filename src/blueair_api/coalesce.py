@@ -0,0 +1,115 @@
+"""Last-write-wins coalescing for rapidly repeated writes.
+
+Dragging a slider calls a setter for every intermediate value.  Sent
+as-is, each value becomes its own ``set_device_info`` POST, and the
+device ends up replaying the whole gesture.  :class:`SetterCoalescer`
+holds writes to the same key for ``window`` seconds and then sends only
+the newest value.  If a newer value becomes due while an older one is
+still in flight, the older request is cancelled first.
+
+Every caller is resolved once the value that superseded its own has been
+written, so ``await device.set_brightness(...)`` still means "the
+brightness the user last asked for has reached the cloud".
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import Callable, Coroutine, Hashable
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any
+
+_LOGGER = getLogger(__name__)
+
+DEFAULT_COALESCE_WINDOW = 0.3
+
+type WriteFunction = Callable[[Any], Coroutine[Any, Any, Any]]
+
+
+@dataclass
+class _Slot:
+    value: Any = None
+    write: WriteFunction | None = None
+    generation: int = 0
+    timer: asyncio.Task | None = None
+    in_flight: asyncio.Task | None = None
+    waiters: list[tuple[int, asyncio.Future]] = field(default_factory=list)
+
+
+class SetterCoalescer:
+    """Debounces writes per key, sending only the latest value.
+
+    One instance can be shared by several devices; keys are typically
+    ``(device uuid, attribute)`` pairs.
+    """
+
+    def __init__(self, window: float = DEFAULT_COALESCE_WINDOW) -> None:
+        if window < 0:
+            raise ValueError(f"window must not be negative, got {window}")
+        self.window = window
+        self._slots: dict[Hashable, _Slot] = {}
+        self.sent = 0
+        self.coalesced = 0
+
+    async def submit(self, key: Hashable, value: Any, write: WriteFunction) -> None:
+        """Queue ``write(value)`` for ``key``, superseding any pending value."""
+        slot = self._slots.setdefault(key, _Slot())
+        if slot.timer is not None:
+            self.coalesced += 1
+        slot.generation += 1
+        slot.value = value
+        slot.write = write
+        waiter = asyncio.get_running_loop().create_future()
+        slot.waiters.append((slot.generation, waiter))
+        if slot.timer is None:
+            slot.timer = asyncio.create_task(self._flush_later(key, slot))
+        # A caller giving up waiting must not cancel the write itself.
+        await asyncio.shield(waiter)
+
+    def pending(self, key: Hashable) -> bool:
+        slot = self._slots.get(key)
+        return slot is not None and bool(slot.waiters)
+
+    async def _flush_later(self, key: Hashable, slot: _Slot) -> None:
+        await asyncio.sleep(self.window)
+        slot.timer = None
+        generation, value, write = slot.generation, slot.value, slot.write
+        assert write is not None
+        previous = slot.in_flight
+        if previous is not None and not previous.done():
+            _LOGGER.debug("cancelling superseded write for %s", key)
+            previous.cancel()
+            with contextlib.suppress(BaseException):
+                await previous
+        task = asyncio.create_task(write(value))
+        slot.in_flight = task
+        self.sent += 1
+        try:
+            await task
+        except asyncio.CancelledError:
+            if task.cancelled() and slot.generation > generation:
+                # Superseded; the newer write resolves these waiters.
+                return
+            self._resolve(key, slot, generation, asyncio.CancelledError())
+            raise
+        except Exception as e:
+            self._resolve(key, slot, generation, e)
+            return
+        self._resolve(key, slot, generation, None)
+
+    def _resolve(
+        self, key: Hashable, slot: _Slot, generation: int, error: BaseException | None
+    ) -> None:
+        remaining = []
+        for waiter_generation, waiter in slot.waiters:
+            if waiter_generation > generation:
+                remaining.append((waiter_generation, waiter))
+            elif not waiter.done():
+                if error is None:
+                    waiter.set_result(None)
+                else:
+                    waiter.set_exception(error)
+        slot.waiters = remaining
+        if not remaining and slot.timer is None and self._slots.get(key) is slot:
+            del self._slots[key]
@@ -0,0 +1,115 @@
+"""JSON encoding and decoding with the fastest library installed.
+
+Decoding is most of the CPU the clients spend: every REST response and
+every MQTT frame (one per device every five seconds) goes through it.
+This module picks, in order of preference, ``orjson``, ``msgspec`` or
+the standard library, and the HTTP and MQTT paths go through
+:func:`loads` and :func:`dumps`.  Install the ``speedups`` extra
+(``pip install blueair_api[speedups]``) to get ``orjson``.
+
+All codecs behave alike where it matters here: :func:`loads` accepts
+``bytes`` (decoded as UTF-8 without an intermediate ``str``) or ``str``
+and raises ``ValueError`` on malformed input; :func:`dumps` returns
+compact UTF-8 ``bytes``.
+
+:func:`use_codec` selects a codec by name, e.g. to compare them.
+"""
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any
+
+_LOGGER = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    loads: Callable[[bytes | str], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def _stdlib_codec() -> Codec:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    return Codec("json", json.loads, dumps)
+
+
+def _orjson_codec() -> Codec | None:
+    try:
+        import orjson  # type: ignore[import-not-found]
+    except ImportError:
+        return None
+    # orjson.JSONDecodeError is a ValueError already.
+    return Codec("orjson", orjson.loads, orjson.dumps)
+
+
+def _msgspec_codec() -> Codec | None:
+    try:
+        import msgspec  # type: ignore[import-not-found]
+    except ImportError:
+        return None
+    decoder = msgspec.json.Decoder()
+
+    def loads(data: bytes | str) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return Codec("msgspec", loads, msgspec.json.Encoder().encode)
+
+
+# In order of preference.
+_FACTORIES: dict[str, Callable[[], Codec | None]] = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _stdlib_codec,
+}
+
+
+def available_codecs() -> dict[str, Codec]:
+    """The installed codecs, fastest first."""
+    codecs = {}
+    for name, factory in _FACTORIES.items():
+        codec = factory()
+        if codec is not None:
+            codecs[name] = codec
+    return codecs
+
+
+_codec: Codec = next(iter(available_codecs().values()))
+_LOGGER.debug("using %s for JSON", _codec.name)
+
+
+def get_codec() -> Codec:
+    return _codec
+
+
+def use_codec(name: str) -> Codec:
+    """Switch to the codec called ``name``; ``ValueError`` if not installed."""
+    global _codec
+    if name not in _FACTORIES:
+        raise ValueError(f"unknown codec {name!r}; expected one of {sorted(_FACTORIES)}")
+    codec = _FACTORIES[name]()
+    if codec is None:
+        raise ValueError(f"codec {name!r} is not installed")
+    _codec = codec
+    return codec
+
+
+def loads(data: bytes | str) -> Any:
+    return _codec.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    return _codec.dumps(obj)
+
+
+def dumps_text(obj: Any) -> str:
+    """:func:`dumps` as ``str``, for APIs that want text (aiohttp's ``json=``)."""
+    return _codec.dumps(obj).decode()
@@ -0,0 +1,193 @@
+"""Confirmation of device commands from shadow echoes.
+
+A REST ``"Success"`` (or an accepted desired-state update) only means
+the cloud took the command; the device applies it some time later and
+then reports the new value in its shadow.  :class:`CommandTracker`
+matches those reported states, as delivered by
+``MqttAwsBlueair._handle_state_change``, against the commands sent, and
+keeps a :class:`LatencyHistogram` of command-to-confirmation time per
+shadow field.
+
+Usage::
+
+    tracker = CommandTracker()
+    mqtt_client.command_tracker = tracker
+    device.command_tracker = tracker
+
+    confirmation = await device.set_fan_speed(2)
+    if not await confirmation:
+        ...  # not applied within tracker.timeout seconds
+    tracker.histograms["fanspeed"].quantile(0.95)
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import time
+from collections.abc import Generator
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any
+
+_LOGGER = getLogger(__name__)
+
+DEFAULT_CONFIRMATION_TIMEOUT = 10.0
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class LatencyHistogram:
+    """Bucketed command-to-confirmation latencies of one shadow field.
+
+    ``counts[i]`` holds confirmations no slower than ``bounds[i]``
+    seconds (and slower than ``bounds[i - 1]``); the extra last bucket
+    holds slower ones.  Commands that were never confirmed count towards
+    ``timeouts`` only.
+    """
+    bounds: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+    timeouts: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the ``q`` quantile.
+
+        ``inf`` if it falls in the overflow bucket, ``None`` with no
+        observations yet.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"quantile must be within [0, 1], got {q}")
+        if not self.count:
+            return None
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for bound, bucket in zip((*self.bounds, float("inf")), self.counts, strict=True):
+            seen += bucket
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class CommandConfirmation:
+    """Awaitable outcome of one command.
+
+    Awaiting it returns ``True`` once the device reports the written
+    value, and ``False`` if it does not within the tracker's timeout or
+    a newer command to the same field supersedes it.
+    """
+
+    __slots__ = ("device_uuid", "field", "value", "sent_at", "latency", "_future", "_timer")
+
+    def __init__(
+        self, device_uuid: str, field: str, value: Any, future: asyncio.Future[bool]
+    ) -> None:
+        self.device_uuid = device_uuid
+        self.field = field
+        self.value = value
+        self.sent_at = time.monotonic()
+        self.latency: float | None = None
+        self._future = future
+        self._timer: asyncio.TimerHandle | None = None
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def confirmed(self) -> bool:
+        return self._future.done() and self._future.result()
+
+    def __await__(self) -> Generator[Any, None, bool]:
+        return asyncio.shield(self._future).__await__()
+
+    def __repr__(self) -> str:
+        state = "pending" if not self.done() else "confirmed" if self.confirmed() else "unconfirmed"
+        return f"<CommandConfirmation {self.device_uuid} {self.field}={self.value!r} {state}>"
+
+
+class CommandTracker:
+    """Matches reported shadow state against commands in flight."""
+
+    def __init__(self, timeout: float = DEFAULT_CONFIRMATION_TIMEOUT) -> None:
+        if timeout <= 0:
+            raise ValueError(f"timeout must be positive, got {timeout}")
+        self.timeout = timeout
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self._pending: dict[tuple[str, str], CommandConfirmation] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def expect(self, device_uuid: str, field: str, value: Any) -> CommandConfirmation:
+        """Start tracking a write of ``value`` to shadow ``field``.
+
+        Call before sending the command, so a fast echo is not missed.
+        Must be called from the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        confirmation = CommandConfirmation(device_uuid, field, value, loop.create_future())
+        previous = self._pending.get((device_uuid, field))
+        if previous is not None:
+            self._finish(previous, False)
+        self._pending[(device_uuid, field)] = confirmation
+        confirmation._timer = loop.call_later(self.timeout, self._timed_out, confirmation)
+        return confirmation
+
+    def discard(self, confirmation: CommandConfirmation) -> None:
+        """Stop tracking a command that was never sent."""
+        self._finish(confirmation, False)
+
+    def pending(self, device_uuid: str | None = None) -> list[CommandConfirmation]:
+        return [
+            confirmation for (uuid, _), confirmation in self._pending.items()
+            if device_uuid is None or uuid == device_uuid
+        ]
+
+    def observe_state(self, device_uuid: str, state: dict[str, Any]) -> None:
+        """Feed a reported shadow state; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or not self._pending:
+            return
+        loop.call_soon_threadsafe(self._observe, device_uuid, dict(state))
+
+    def _observe(self, device_uuid: str, state: dict[str, Any]) -> None:
+        for field_name, value in state.items():
+            confirmation = self._pending.get((device_uuid, field_name))
+            if confirmation is not None and confirmation.value == value:
+                confirmation.latency = time.monotonic() - confirmation.sent_at
+                self._histogram(field_name).observe(confirmation.latency)
+                self._finish(confirmation, True)
+
+    def _timed_out(self, confirmation: CommandConfirmation) -> None:
+        _LOGGER.debug(
+            "%s: %s=%r not confirmed within %ss",
+            confirmation.device_uuid, confirmation.field, confirmation.value, self.timeout,
+        )
+        self._histogram(confirmation.field).timeouts += 1
+        self._finish(confirmation, False)
+
+    def _histogram(self, field_name: str) -> LatencyHistogram:
+        return self.histograms.setdefault(field_name, LatencyHistogram())
+
+    def _finish(self, confirmation: CommandConfirmation, confirmed: bool) -> None:
+        key = (confirmation.device_uuid, confirmation.field)
+        if self._pending.get(key) is confirmation:
+            del self._pending[key]
+        if confirmation._timer is not None:
+            confirmation._timer.cancel()
+            confirmation._timer = None
+        if not confirmation._future.done():
+            confirmation._future.set_result(confirmed)
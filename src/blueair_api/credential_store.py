@@ -0,0 +1,219 @@
+"""Persistent credential storage for warm starts.
+
+Logging in to the AWS backend is a three-hop chain (Gigya
+``accounts.login``, ``accounts.getJWT``, BlueCloud ``/c/login``).  A
+:class:`CredentialStore` keeps the results of that chain so a new
+``HttpAwsBlueair`` (or ``MqttAwsBlueair``) can start from still-valid
+credentials without any network round-trip, and so several worker
+processes logged in to the same account share one login.
+
+Two implementations ship with the library:
+
+* :class:`MemoryCredentialStore` — the default; shares credentials
+  between clients in one process that are handed the same store.
+* :class:`FileCredentialStore` — a JSON file whose writers take an
+  advisory ``flock`` so processes on one host can share it.  The file
+  holds secrets and is written with ``0600`` permissions.
+
+Stores are keyed by :func:`credential_key`, so one store can hold
+several accounts/regions.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import contextlib
+import dataclasses
+import json
+import os
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+_LOGGER = getLogger(__name__)
+
+# How often a waiter polls a contended file lock, in seconds.  Polling
+# with LOCK_NB keeps lock acquisition cancellable from asyncio.
+_LOCK_POLL_INTERVAL = 0.05
+
+
+def credential_key(username: str, gigya_region: str, cloud_region: str) -> str:
+    """Return the store key for an account on a Gigya/BlueCloud region pair."""
+    return f"{gigya_region}:{cloud_region}:{username.lower()}"
+
+
+@dataclass
+class StoredCredentials:
+    """Snapshot of the login chain results for one account.
+
+    Expiries are unix timestamps; ``None`` means unknown, in which case
+    the value is only trusted until the server rejects it.
+    """
+    session_token: str | None = None
+    session_secret: str | None = None
+    access_token: str | None = None
+    access_token_expires_at: float | None = None
+    user_id: str | None = None
+    mqtt_auth_name: str | None = None
+    mqtt_auth_signature: str | None = None
+    mqtt_auth_token: str | None = None
+    mqtt_auth_expires_at: float | None = None
+    saved_at: float = dataclasses.field(default_factory=time.time)
+
+    def access_token_valid(self, margin: float = 0.0) -> bool:
+        """Whether the access token can be used for at least ``margin`` seconds."""
+        if not self.access_token or not self.user_id:
+            return False
+        if self.access_token_expires_at is None:
+            return True
+        return self.access_token_expires_at - time.time() > margin
+
+    def mqtt_credentials_valid(self, margin: float = 0.0) -> bool:
+        """Whether the MQTT custom-authorizer credentials are usable."""
+        if not (self.mqtt_auth_name and self.mqtt_auth_signature and self.mqtt_auth_token):
+            return False
+        if self.mqtt_auth_expires_at is None:
+            return True
+        return self.mqtt_auth_expires_at - time.time() > margin
+
+    def to_dict(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> StoredCredentials:
+        names = {field.name for field in dataclasses.fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+class CredentialStore(abc.ABC):
+    """Interface for credential stores.
+
+    ``HttpAwsBlueair`` calls ``load`` and ``save`` in a worker thread, so
+    both may block.  ``refresh_lock`` serialises logins for one key: the
+    holder re-reads the store, and only logs in if nobody else already
+    saved fresh credentials while it waited.
+    """
+
+    @abc.abstractmethod
+    def load(self, key: str) -> StoredCredentials | None:
+        """Return the credentials saved under ``key``, if any."""
+
+    @abc.abstractmethod
+    def save(self, key: str, credentials: StoredCredentials) -> None:
+        """Store ``credentials`` under ``key``, replacing any previous ones."""
+
+    @contextlib.asynccontextmanager
+    async def refresh_lock(self, key: str) -> AsyncIterator[None]:
+        yield
+
+
+class MemoryCredentialStore(CredentialStore):
+    """In-process store; the default when no store is supplied."""
+
+    def __init__(self) -> None:
+        self._credentials: dict[str, StoredCredentials] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def load(self, key: str) -> StoredCredentials | None:
+        credentials = self._credentials.get(key)
+        return dataclasses.replace(credentials) if credentials is not None else None
+
+    def save(self, key: str, credentials: StoredCredentials) -> None:
+        self._credentials[key] = dataclasses.replace(credentials)
+
+    @contextlib.asynccontextmanager
+    async def refresh_lock(self, key: str) -> AsyncIterator[None]:
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            yield
+
+
+class FileCredentialStore(CredentialStore):
+    """JSON file store shared between processes on one host.
+
+    Writes take an exclusive ``flock`` on ``<path>.lock`` and replace
+    the file atomically, so reads need no lock and never wait on
+    another process.  ``refresh_lock`` holds the exclusive lock on
+    a separate ``<path>.refresh.lock`` so waiting for another process's
+    login never blocks plain reads; all keys in one file share that
+    refresh lock.  Without ``fcntl`` (Windows) the store still works but
+    only locks within the process.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+        self._lock_path = self.path + ".lock"
+        self._refresh_lock_path = self.path + ".refresh.lock"
+        self._local_locks: dict[str, asyncio.Lock] = {}
+
+    def _open_lock(self, path: str) -> int:
+        return os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    @contextlib.contextmanager
+    def _write_lock(self):
+        # Blocks until other writers are done; save() runs off the loop.
+        fd = self._open_lock(self._lock_path)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _read_all(self) -> dict[str, Any]:
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            _LOGGER.warning("Ignoring unreadable credential store %s", self.path)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def load(self, key: str) -> StoredCredentials | None:
+        entry = self._read_all().get(key)
+        if not isinstance(entry, dict):
+            return None
+        return StoredCredentials.from_dict(entry)
+
+    def save(self, key: str, credentials: StoredCredentials) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._write_lock():
+            data = self._read_all()
+            data[key] = credentials.to_dict()
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".blueair-credentials-")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                    json.dump(data, fp)
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
+                raise
+
+    @contextlib.asynccontextmanager
+    async def refresh_lock(self, key: str) -> AsyncIterator[None]:
+        async with self._local_locks.setdefault(key, asyncio.Lock()):
+            if fcntl is None:
+                yield
+                return
+            fd = self._open_lock(self._refresh_lock_path)
+            try:
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        await asyncio.sleep(_LOCK_POLL_INTERVAL)
+                yield
+            finally:
+                os.close(fd)
@@ -0,0 +1,102 @@
+"""Deadlines and per-request timeouts.
+
+Without an explicit timeout every request inherits aiohttp's 5-minute
+default, and retries multiply it.  Two limits apply instead:
+
+* every attempt of every request is bounded by the client's
+  ``request_timeout``;
+* an operation can be given an overall budget with :func:`deadline`::
+
+      async with deadline(8):
+          await device.refresh()
+
+  The budget is kept in a context variable, so it follows the call
+  through session repair and retries: each attempt is only given the
+  time that is left, a retry that could not finish in time is not
+  started, and the block is cancelled when the budget runs out.  Nested
+  deadlines can only shorten the budget.  A login is shared with other
+  callers and runs outside any one caller's budget; the caller just
+  stops waiting for it.
+
+Running out of budget raises :class:`~blueair_api.errors.DeadlineExceededError`
+(also a ``TimeoutError``), which is never retried.  An attempt that hits
+``request_timeout`` with budget to spare raises a plain ``TimeoutError``
+and is retried like other transient failures.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+from collections.abc import AsyncIterator
+from contextvars import ContextVar
+from logging import getLogger
+
+from .errors import DeadlineExceededError
+
+_LOGGER = getLogger(__name__)
+
+# Upper bound for a single request attempt, in seconds.
+DEFAULT_REQUEST_TIMEOUT = 30.0
+
+# Absolute deadline on the event loop clock, or None for no deadline.
+_deadline: ContextVar[float | None] = ContextVar("blueair_deadline", default=None)
+
+
+def remaining() -> float | None:
+    """Seconds left before the current deadline, ``None`` if there is none."""
+    when = _deadline.get()
+    if when is None:
+        return None
+    return when - asyncio.get_running_loop().time()
+
+
+@contextlib.asynccontextmanager
+async def deadline(seconds: float) -> AsyncIterator[None]:
+    """Give the enclosed operation at most ``seconds`` to finish."""
+    loop = asyncio.get_running_loop()
+    when = loop.time() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        when = min(when, outer)
+    token = _deadline.set(when)
+    try:
+        async with asyncio.timeout_at(when):
+            yield
+    except TimeoutError as e:
+        if isinstance(e, DeadlineExceededError) or loop.time() < when:
+            raise
+        raise DeadlineExceededError(f"deadline of {seconds}s exceeded") from e
+    finally:
+        _deadline.reset(token)
+
+
+def request_with_timeout(func):
+    """Bound one request attempt by ``self.request_timeout`` and the deadline.
+
+    Sits inside ``request_with_retry`` (so every attempt gets its own
+    timeout) and around ``request_with_errors``.
+    """
+    @functools.wraps(func)
+    async def request_with_timeout_wrapper(*args, **kwargs):
+        self = args[0]
+        timeout: float | None = self.request_timeout
+        left = remaining()
+        limited_by_deadline = left is not None and (timeout is None or left <= timeout)
+        if limited_by_deadline:
+            assert left is not None
+            if left <= 0:
+                raise DeadlineExceededError(f"no time left for {kwargs.get('url')}")
+            timeout = left
+        try:
+            async with asyncio.timeout(timeout):
+                return await func(*args, **kwargs)
+        except TimeoutError as e:
+            if isinstance(e, DeadlineExceededError) or not limited_by_deadline:
+                _LOGGER.debug("request to %s timed out after %ss", kwargs.get("url"), timeout)
+                raise
+            raise DeadlineExceededError(
+                f"deadline exceeded waiting for {kwargs.get('url')}"
+            ) from e
+
+    return request_with_timeout_wrapper
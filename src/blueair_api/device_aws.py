@@ -1,12 +1,20 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterable, Mapping
+from contextlib import asynccontextmanager
 from functools import cached_property
 from typing import Any
 
 from logging import getLogger
-from json import dumps
 
 from .callbacks import CallbacksMixin
-from .http_aws_blueair import HttpAwsBlueair
+from .coalesce import SetterCoalescer
+from .command_tracker import CommandConfirmation, CommandTracker
+from .errors import CommandRejectedError
+from .http_aws_blueair import HttpAwsBlueair, DEFAULT_DEVICE_INFO_CHUNK_SIZE
+from .mqtt_aws_blueair import MqttAwsBlueair
+from .offload import OffloadOptions
 from .sku_map import model_name_from_sku
+from .util import JsonForLogging
 from . import intermediate_representation_aws as ir
 from dataclasses import dataclass, field
 
@@ -158,11 +166,92 @@ AP_SUB_MODE_LABELS: dict[int, str] = {
     4: "eco",
 }
 
+DEFAULT_BATCH_CONCURRENCY = 4
+
+# Write order for DeviceAws.set_many.  Firmware ignores a sub-mode
+# written before the main mode (or power state) that owns it, and a
+# manual fan speed written while an auto / night preset is still active,
+# so each phase is sent only once the previous one has been accepted.
+# Attributes not listed here go out in a final phase.
+_BATCH_PHASES: tuple[frozenset[str], ...] = (
+    frozenset({"standby", "main_mode"}),
+    frozenset({
+        "heat_sub_mode",
+        "cool_sub_mode",
+        "ap_sub_mode",
+        "fan_auto_mode",
+        "night_mode",
+        "humidifier_mode",
+        "combo_mode",
+    }),
+)
+
+@dataclass(slots=True)
+class _ParsedRefresh:
+    """The intermediate representation ``_apply_refresh`` reads from."""
+    schema: tuple[Any, dict[str, ir.Sensor], dict[str, ir.Control]]
+    mqtt_sensor_slugs: list[str]
+    sensor_data: ir.SensorRecord
+    states: dict[str, Any]
+
+
+def _parse_refresh(
+    raw_info: dict[str, Any],
+    raw_sensors: Any,
+    parsed_schema: tuple[Any, dict[str, ir.Sensor], dict[str, ir.Control]] | None,
+) -> _ParsedRefresh:
+    """Build the IR of a refresh; pure, so it may run in a worker thread.
+
+    ``parsed_schema`` is the device's previous schema, reused while the
+    configuration block is the same object.
+    """
+    raw_ds: Any = ir.query_json(raw_info, "configuration.ds")
+    raw_dc: Any = ir.query_json(raw_info, "configuration.dc")
+    configuration = raw_info.get("configuration")
+    if parsed_schema is not None and parsed_schema[0] is configuration:
+        _, ds, dc = parsed_schema
+    else:
+        ds = ir.parse_json(ir.Sensor, raw_ds)
+        dc = ir.parse_json(ir.Control, raw_dc)
+
+    # Store the list of MQTT sensor slugs from the 5-second polling
+    # topic.  Defensive against malformed schemas: rt5s missing,
+    # rt5s.sn null, or wrong types all degrade to an empty list so
+    # apply_sensor_data and is_implemented checks stay correct.
+    rt5s_raw = raw_ds.get("rt5s") if isinstance(raw_ds, dict) else None
+    sn = rt5s_raw.get("sn") if isinstance(rt5s_raw, dict) else None
+    mqtt_sensor_slugs = [str(s) for s in sn] if isinstance(sn, list) else []
+
+    # Auto-populate dc from state keys the device reports but aren't
+    # declared in the dc schema.  Some devices (e.g. H38i, H76i,
+    # Mini Restful) have an incomplete dc yet still publish the
+    # corresponding states.  This generic fixup replaces per-model
+    # hard-coded patches and ensures future devices work without
+    # code changes.
+    for state in raw_info.get("states", []):
+        key = state.get("n")
+        if key and key not in dc and key != "online":
+            dc[key] = ir.Control(extra_fields={}, n=key, v=NotImplemented)
+
+    return _ParsedRefresh(
+        schema=(configuration, ds, dc),
+        mqtt_sensor_slugs=mqtt_sensor_slugs,
+        sensor_data=ir.SensorHistory(raw_sensors).to_latest(),
+        states=ir.SensorPack(raw_info["states"]).to_latest_value(),
+    )
+
+
+def _parse_refresh_many(
+    jobs: list[tuple[dict[str, Any], Any, Any]],
+) -> list[_ParsedRefresh]:
+    return [_parse_refresh(*job) for job in jobs]
+
+
 @dataclass(slots=True)
 class DeviceAws(CallbacksMixin):
     @classmethod
     async def create_device(cls, api, uuid, name, mac, type_name, refresh=False):
-        _LOGGER.debug("UUID:"+uuid)
+        _LOGGER.debug("UUID: %s", uuid)
         device_aws = DeviceAws(
             api=api,
             uuid=uuid,
@@ -172,7 +261,7 @@ class DeviceAws(CallbacksMixin):
         )
         if refresh:
             await device_aws.refresh()
-        _LOGGER.debug(f"create_device blueair device_aws: {device_aws}")
+        _LOGGER.debug("create_device blueair device_aws: %s", device_aws)
         return device_aws
 
     api: HttpAwsBlueair = field(repr=False)
@@ -257,13 +346,231 @@ class DeviceAws(CallbacksMixin):
     mqtt_sensor_slugs: list[str] = field(default_factory=list, repr=False, init=False)
     extra_sensors: dict[str, Any] = field(default_factory=dict, repr=False, init=False)
 
+    # Optional subset of telemetry series to poll; None polls every
+    # series the device declares and DeviceAws has an attribute for.
+    telemetry_sensor_subset: list[str] | None = field(default=None, repr=False)
+    # Optional debouncing for slider-driven setters (brightness, fan
+    # speed, heat temperature, night light); None sends every write.
+    setter_coalescer: SetterCoalescer | None = field(default=None, repr=False)
+    # Optional MQTT client (built with desired_state_commands=True) that
+    # setters send commands through; REST is used when it is
+    # disconnected or the shadow rejects the update.
+    command_channel: MqttAwsBlueair | None = field(default=None, repr=False)
+    # Optional tracker (shared with the MqttAwsBlueair feeding it shadow
+    # updates) that setters register their writes with; setters then
+    # return a CommandConfirmation instead of None.
+    command_tracker: CommandTracker | None = field(default=None, repr=False)
+    # Once the device's schema (the configuration block) has been
+    # fetched, poll /r/initial for states only and apply them against
+    # it.  The full payload is fetched again when the firmware changes.
+    states_only_polling: bool = field(default=False, repr=False)
+
+    # While set_many is running, setters defer their publish_updates.
+    _publish_holds: int = field(default=0, repr=False, init=False)
+    _publish_deferred: bool = field(default=False, repr=False, init=False)
+    # Latest tracked write per shadow field, see confirmation().
+    _confirmations: dict[str, CommandConfirmation] = field(
+        default_factory=dict, repr=False, init=False
+    )
+    # (configuration block, parsed ds, parsed dc) of the last refresh, so
+    # polls that reuse the configuration do not parse it again.
+    _parsed_schema: tuple[Any, dict[str, ir.Sensor], dict[str, ir.Control]] | None = field(
+        default=None, repr=False, init=False
+    )
+
+    def telemetry_sensors(self, raw_info: dict[str, Any]) -> list[str]:
+        """Telemetry series to request, from the device's ``ds`` schema.
+
+        Only series the device declares are requested, so a humidifier
+        is not asked for PM history it cannot have.
+        """
+        if (
+            self._parsed_schema is not None
+            and self._parsed_schema[0] is raw_info.get("configuration")
+        ):
+            declared = self._parsed_schema[1]
+        else:
+            raw_ds = ir.query_json(raw_info, "configuration.ds")
+            declared = ir.parse_json(ir.Sensor, raw_ds) if isinstance(raw_ds, dict) else {}
+        wanted = (
+            MQTT_SENSOR_FIELD_MAP if self.telemetry_sensor_subset is None
+            else self.telemetry_sensor_subset
+        )
+        return [sensor for sensor in wanted if sensor in declared]
+
+    async def _fetch_sensors(self, api: HttpAwsBlueair, raw_info: dict[str, Any]) -> Any:
+        sensors = self.telemetry_sensors(raw_info)
+        if not sensors:
+            _LOGGER.debug("%s declares no telemetry series; skipping fetch", self.uuid)
+            return None
+        return await api.device_sensors(self.name_api, self.uuid, sensors=sensors)
+
+    def _polls_states_only(self) -> bool:
+        """Whether the next poll can skip the configuration block."""
+        raw_info = getattr(self, "raw_info", None)
+        return (
+            self.states_only_polling
+            and isinstance(raw_info, dict)
+            and isinstance(raw_info.get("configuration"), dict)
+        )
+
+    def _merge_states(self, partial: dict[str, Any] | None) -> dict[str, Any] | None:
+        """Combine a states-only payload with the cached configuration.
+
+        Returns ``None`` when the full payload has to be fetched instead:
+        no states came back, or the firmware changed (and with it,
+        possibly, the schema).
+        """
+        if partial is None or not isinstance(partial.get("states"), list):
+            return None
+        if partial.get("configuration"):
+            # The cloud sent the schema anyway; it is the newest one.
+            return partial
+        known = ir.SensorPack(self.raw_info.get("states", [])).to_latest_value()
+        reported = ir.SensorPack(partial["states"]).to_latest_value()
+        for key in _FIRMWARE_SHADOW_FIELDS & reported.keys():
+            if reported[key] != known.get(key):
+                _LOGGER.debug(
+                    "%s firmware %s changed (%r -> %r); refetching schema",
+                    self.uuid, key, known.get(key), reported[key],
+                )
+                return None
+        # An empty configuration block is no schema; keep the cached one.
+        return {**self.raw_info, **partial, "configuration": self.raw_info["configuration"]}
+
+    async def _fetch_info(self) -> dict[str, Any]:
+        if self._polls_states_only():
+            partial = await self.api.device_info(self.name_api, self.uuid, states_only=True)
+            merged = self._merge_states(partial)
+            if merged is not None:
+                return merged
+        return await self.api.device_info(self.name_api, self.uuid)
+
     async def refresh(self):
-        _LOGGER.debug(f"refreshing blueair device aws: {self}")
-        self.raw_info = await self.api.device_info(self.name_api, self.uuid)
-        self.raw_sensors = await self.api.device_sensors(self.name_api, self.uuid)
-        _LOGGER.debug(dumps(self.raw_info, indent=2))
+        _LOGGER.debug("refreshing blueair device aws: %s", self)
+        raw_info = await self._fetch_info()
+        raw_sensors = await self._fetch_sensors(self.api, raw_info)
+        self._apply_refresh(raw_info, raw_sensors)
+
+    @classmethod
+    async def refresh_many(
+        cls,
+        devices: Iterable["DeviceAws"],
+        chunk_size: int = DEFAULT_DEVICE_INFO_CHUNK_SIZE,
+        offload: OffloadOptions | None = None,
+    ) -> None:
+        """Refresh a fleet of devices with batched ``/r/initial`` calls.
+
+        Device info for every device sharing an ``api`` client is fetched
+        through :meth:`HttpAwsBlueair.device_info_many`, so a poll cycle
+        costs one info request per ``chunk_size`` devices rather than one
+        per device.  Telemetry is still fetched per device (the endpoint
+        takes a single ``did``) but those requests run concurrently.
+
+        Devices with ``states_only_polling`` whose schema is cached are
+        polled for states in a separate batch; any the cloud does not
+        answer for, or whose firmware changed, join the full batch.
+
+        Groups of devices on different clients are refreshed concurrently.
+        A device the cloud returned no payload for, or whose telemetry
+        request failed, is left untouched and logged; the rest of the
+        fleet is still applied.
+
+        With ``offload``, the payloads of a batch of at least
+        ``offload.min_devices`` devices are parsed in a worker thread;
+        the attributes are still set (and listeners called) on the loop.
+        """
+        groups: dict[int, list[DeviceAws]] = {}
+        for device in devices:
+            groups.setdefault(id(device.api), []).append(device)
+        results = await asyncio.gather(
+            *(cls._refresh_group(group, chunk_size, offload) for group in groups.values()),
+            return_exceptions=True,
+        )
+        # Every group has been applied or has failed by now; a failed
+        # info batch still surfaces to the caller.
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    @classmethod
+    async def _refresh_group(
+        cls,
+        group: list["DeviceAws"],
+        chunk_size: int,
+        offload: OffloadOptions | None,
+    ) -> None:
+        """``refresh_many`` for devices sharing one ``api`` client."""
+        api = group[0].api
+        infos: dict[str, dict[str, Any]] = {}
+        states_only = {
+            device.uuid: device for device in group
+            if device.uuid is not None and device._polls_states_only()
+        }
+        if states_only:
+            partials = await api.device_info_many(
+                list(states_only), chunk_size=chunk_size, states_only=True
+            )
+            for uuid, device in states_only.items():
+                merged = device._merge_states(partials.get(uuid))
+                if merged is not None:
+                    infos[uuid] = merged
+        full = [
+            device.uuid for device in group
+            if device.uuid is not None and device.uuid not in infos
+        ]
+        if full or not states_only:
+            infos.update(await api.device_info_many(full, chunk_size=chunk_size))
+        refreshable: list[tuple[DeviceAws, dict[str, Any]]] = []
+        for device in group:
+            info = infos.get(device.uuid) if device.uuid is not None else None
+            if info is None:
+                _LOGGER.warning(
+                    "refresh_many: no device info returned for %s; "
+                    "keeping previous state", device.uuid
+                )
+            else:
+                refreshable.append((device, info))
+        sensors = await asyncio.gather(
+            *(device._fetch_sensors(api, info) for device, info in refreshable),
+            return_exceptions=True,
+        )
+        fetched: list[tuple[DeviceAws, dict[str, Any], Any]] = []
+        for (device, info), raw_sensors in zip(refreshable, sensors):
+            if isinstance(raw_sensors, Exception):
+                _LOGGER.warning(
+                    "refresh_many: telemetry for %s failed (%r); "
+                    "keeping previous state", device.uuid, raw_sensors
+                )
+            elif isinstance(raw_sensors, BaseException):
+                raise raw_sensors
+            else:
+                fetched.append((device, info, raw_sensors))
+        parsed: list[_ParsedRefresh | None] = [None] * len(fetched)
+        if offload is not None and len(fetched) >= offload.min_devices:
+            parsed = list(await offload.run(
+                _parse_refresh_many,
+                [
+                    (info, raw_sensors, device._parsed_schema)
+                    for device, info, raw_sensors in fetched
+                ],
+            ))
+        for (device, info, raw_sensors), parsed_refresh in zip(fetched, parsed):
+            device._apply_refresh(info, raw_sensors, parsed_refresh)
+
+    def _apply_refresh(self, raw_info, raw_sensors, parsed: "_ParsedRefresh | None" = None):
+        """Apply a ``/r/initial`` payload and telemetry to the attributes.
+
+        ``parsed`` is ``_parse_refresh``'s result for the same payloads
+        when it was built elsewhere (off the event loop).
+        """
+        if parsed is None:
+            parsed = _parse_refresh(raw_info, raw_sensors, self._parsed_schema)
+        self.raw_info = raw_info
+        self.raw_sensors = raw_sensors
+        _LOGGER.debug("%s", JsonForLogging(self.raw_info))
         if self.raw_sensors is not None:
-            _LOGGER.debug(dumps(self.raw_sensors, indent=2))
+            _LOGGER.debug("%s", JsonForLogging(self.raw_sensors))
 
         def info_safe_get(path):
             # directly reads for the schema. If the schema field is
@@ -281,19 +588,9 @@ class DeviceAws(CallbacksMixin):
         self.sku = info_safe_get("configuration.di.sku")
         self.hw = info_safe_get("configuration.di.hw")
 
-        raw_ds = ir.query_json(self.raw_info, "configuration.ds")
-        ds = ir.parse_json(ir.Sensor, raw_ds)
-        dc = ir.parse_json(ir.Control, ir.query_json(self.raw_info, "configuration.dc"))
-
-        # Store the list of MQTT sensor slugs from the 5-second polling
-        # topic.  Defensive against malformed schemas: rt5s missing,
-        # rt5s.sn null, or wrong types all degrade to an empty list so
-        # apply_sensor_data and is_implemented checks stay correct.
-        rt5s_raw = raw_ds.get("rt5s") if isinstance(raw_ds, dict) else None
-        sn = rt5s_raw.get("sn") if isinstance(rt5s_raw, dict) else None
-        self.mqtt_sensor_slugs = (
-            [str(s) for s in sn] if isinstance(sn, list) else []
-        )
+        self._parsed_schema = parsed.schema
+        _, ds, dc = parsed.schema
+        self.mqtt_sensor_slugs = parsed.mqtt_sensor_slugs
         # Log once per refresh so the expected MQTT slug set is visible
         # in user-supplied debug logs.
         _LOGGER.debug(
@@ -301,18 +598,7 @@ class DeviceAws(CallbacksMixin):
             self.uuid, self.mqtt_sensor_slugs
         )
 
-        # Auto-populate dc from state keys the device reports but aren't
-        # declared in the dc schema.  Some devices (e.g. H38i, H76i,
-        # Mini Restful) have an incomplete dc yet still publish the
-        # corresponding states.  This generic fixup replaces per-model
-        # hard-coded patches and ensures future devices work without
-        # code changes.
-        for state in self.raw_info.get("states", []):
-            key = state.get("n")
-            if key and key not in dc and key != "online":
-                dc[key] = ir.Control(extra_fields={}, n=key, v=NotImplemented)
-
-        sensor_data = ir.SensorHistory(self.raw_sensors).to_latest()
+        sensor_data = parsed.sensor_data
         self.sensor_data_timestamp = sensor_data.timestamp if sensor_data.timestamp else None
 
         def sensor_data_safe_get(key):
@@ -328,7 +614,7 @@ class DeviceAws(CallbacksMixin):
         self.fan_speed_0 = sensor_data_safe_get("fsp0")
         self.rssi = sensor_data_safe_get("rssi")
 
-        states = ir.SensorPack(self.raw_info["states"]).to_latest_value()
+        states = parsed.states
 
         def states_safe_get(key):
             return states.get(key) if key in dc else NotImplemented
@@ -393,7 +679,7 @@ class DeviceAws(CallbacksMixin):
         self.hour_format = states_safe_get("hourformat")
 
         self.publish_updates()
-        _LOGGER.debug(f"refreshed blueair device aws: {self}")
+        _LOGGER.debug("refreshed blueair device aws: %s", self)
 
     def apply_sensor_data(self, sensors: dict[str, float]) -> None:
         """Apply MQTT sensor data to device attributes.
@@ -477,15 +763,146 @@ class DeviceAws(CallbacksMixin):
             elif self.fan_speed == 64:
                 self.fan_speed = 3
 
+    def publish_updates(self) -> None:
+        if self._publish_holds:
+            self._publish_deferred = True
+            return
+        CallbacksMixin.publish_updates(self)
+
+    async def set_many(
+        self,
+        values: Mapping[str, Any],
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> None:
+        """Set several attributes at once, notifying listeners once.
+
+        ``values`` maps attribute names (``"main_mode"``,
+        ``"cool_fan_speed"``, ...) to the value their ``set_<name>``
+        setter takes.  Writes within a phase of ``_BATCH_PHASES`` are
+        sent concurrently, at most ``concurrency`` at a time; the power
+        and main mode go first and sub-modes / presets next, so the
+        firmware sees them in the order it needs.
+
+        If a write fails the later phases are not sent and the first
+        error is raised once the current phase has settled.
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be positive, got {concurrency}")
+        setters = {}
+        for attr in values:
+            setter = getattr(self, f"set_{attr}", None) if attr in self.__dataclass_fields__ else None
+            if setter is None:
+                raise ValueError(f"{attr!r} is not a settable DeviceAws attribute")
+            setters[attr] = setter
+        phases = [[attr for attr in setters if attr in phase] for phase in _BATCH_PHASES]
+        phases.append([attr for attr in setters if not any(attr in phase for phase in _BATCH_PHASES)])
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def write(attr: str) -> None:
+            async with semaphore:
+                await setters[attr](values[attr])
+
+        self._publish_holds += 1
+        try:
+            for phase_attrs in phases:
+                if not phase_attrs:
+                    continue
+                results = await asyncio.gather(
+                    *(write(attr) for attr in phase_attrs), return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        raise result
+        finally:
+            self._publish_holds -= 1
+            if not self._publish_holds and self._publish_deferred:
+                self._publish_deferred = False
+                self.publish_updates()
+
+    @asynccontextmanager
+    async def batch(
+        self, concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Collect attribute changes and send them with :meth:`set_many`.
+
+        Usage::
+
+            async with device.batch() as changes:
+                changes["main_mode"] = 2
+                changes["cool_sub_mode"] = 1
+                changes["cool_fan_speed"] = 37
+
+        Nothing is sent if the block raises.
+        """
+        changes: dict[str, Any] = {}
+        yield changes
+        if changes:
+            await self.set_many(changes, concurrency=concurrency)
+
+    async def _send(self, service_name: str, action_verb: str, value: Any) -> None:
+        """Write one attribute, over ``command_channel`` when it is usable."""
+        if self.command_tracker is None or self.uuid is None:
+            await self._transmit(service_name, action_verb, value)
+            return
+        confirmation = self.command_tracker.expect(self.uuid, service_name, value)
+        self._confirmations[service_name] = confirmation
+        try:
+            await self._transmit(service_name, action_verb, value)
+        except BaseException:
+            self.command_tracker.discard(confirmation)
+            if self._confirmations.get(service_name) is confirmation:
+                del self._confirmations[service_name]
+            raise
+
+    async def _transmit(self, service_name: str, action_verb: str, value: Any) -> None:
+        channel = self.command_channel
+        if channel is not None and self.uuid is not None and channel.commands_available(self.uuid):
+            try:
+                await channel.update_desired_state(self.uuid, {service_name: value})
+                self.api.invalidate_device_state(self.uuid)
+                return
+            except (CommandRejectedError, TimeoutError) as e:
+                _LOGGER.debug(
+                    "%s: MQTT command %s=%r failed (%s); falling back to REST",
+                    self.uuid, service_name, value, e,
+                )
+        await self.api.set_device_info(self.uuid, service_name, action_verb, value)
+
+    async def _set(
+        self, service_name: str, action_verb: str, value: Any, coalesce: bool = False
+    ) -> CommandConfirmation | None:
+        """Write an attribute the setter has already assigned, then publish.
+
+        With ``coalesce`` the write goes through ``setter_coalescer`` if
+        one is set, and the optimistic value is published right away,
+        before the debounced write.
+
+        Returns the confirmation of the latest write to the field when a
+        ``command_tracker`` is set.
+        """
+        if coalesce and self.setter_coalescer is not None:
+            self.publish_updates()
+            await self.setter_coalescer.submit(
+                (self.uuid, service_name),
+                value,
+                lambda v: self._send(service_name, action_verb, v),
+            )
+        else:
+            await self._send(service_name, action_verb, value)
+        self.publish_updates()
+        return self.confirmation(service_name)
+
+    def confirmation(self, service_name: str) -> CommandConfirmation | None:
+        """Confirmation of the latest tracked write to shadow field ``service_name``."""
+        return self._confirmations.get(service_name)
+
     async def set_brightness(self, value: int):
         self.brightness = value
-        await self.api.set_device_info(self.uuid, "brightness", "v", value)
-        self.publish_updates()
+        return await self._set("brightness", "v", value, coalesce=True)
 
     async def set_mood_brightness(self, value: int):
         self.mood_brightness = value
-        await self.api.set_device_info(self.uuid, "nlbrightness", "v", value)
-        self.publish_updates()
+        return await self._set("nlbrightness", "v", value)
 
     @property
     def _is_humidifier(self) -> bool:
@@ -536,111 +953,90 @@ class DeviceAws(CallbacksMixin):
                 value = 37
             elif value == 3:
                 value = 64
-        await self.api.set_device_info(self.uuid, "fanspeed", "v", value)
-        self.publish_updates()
+        return await self._set("fanspeed", "v", value, coalesce=True)
 
     async def set_standby(self, value: bool):
         self.standby = value
-        await self.api.set_device_info(self.uuid, "standby", "vb", value)
-        self.publish_updates()
+        return await self._set("standby", "vb", value)
 
     async def set_fan_auto_mode(self, fan_auto_mode: bool):
         self.fan_auto_mode = fan_auto_mode
-        await self.api.set_device_info(self.uuid, "automode", "vb", fan_auto_mode)
-        self.publish_updates()
+        return await self._set("automode", "vb", fan_auto_mode)
 
     async def set_auto_regulated_humidity(self, value: int):
         self.auto_regulated_humidity = value
-        await self.api.set_device_info(self.uuid, "autorh", "v", value)
-        self.publish_updates()
+        return await self._set("autorh", "v", value)
 
     async def set_humidifier_mode(self, value: bool):
         self.humidifier_mode = value
-        await self.api.set_device_info(self.uuid, "hummode", "vb", value)
-        self.publish_updates()
+        return await self._set("hummode", "vb", value)
 
     async def set_combo_mode(self, value: int):
         self.combo_mode = value
-        await self.api.set_device_info(self.uuid, "mode", "v", value)
-        self.publish_updates()
+        return await self._set("mode", "v", value)
 
     async def set_child_lock(self, child_lock: bool):
         self.child_lock = child_lock
-        await self.api.set_device_info(self.uuid, "childlock", "vb", child_lock)
-        self.publish_updates()
+        return await self._set("childlock", "vb", child_lock)
 
     async def set_night_mode(self, night_mode: bool):
         self.night_mode = night_mode
-        await self.api.set_device_info(self.uuid, "nightmode", "vb", night_mode)
-        self.publish_updates()
+        return await self._set("nightmode", "vb", night_mode)
 
     async def set_wick_dry_mode(self, value: bool):
         self.wick_dry_mode = value
-        await self.api.set_device_info(self.uuid, "wickdrys", "vb", value)
-        self.publish_updates()
+        return await self._set("wickdrys", "vb", value)
 
     async def set_germ_shield(self, value: bool):
         self.germ_shield = value
-        await self.api.set_device_info(self.uuid, "germshield", "vb", value)
-        self.publish_updates()
+        return await self._set("germshield", "vb", value)
 
     async def set_main_mode(self, value: int):
         self.main_mode = value
-        await self.api.set_device_info(self.uuid, "mainmode", "v", value)
-        self.publish_updates()
+        return await self._set("mainmode", "v", value)
 
     async def set_heat_temp(self, value: int):
         self.heat_temp = value
-        await self.api.set_device_info(self.uuid, "heattemp", "v", value)
-        self.publish_updates()
+        return await self._set("heattemp", "v", value, coalesce=True)
 
     async def set_heat_sub_mode(self, value: int):
         self.heat_sub_mode = value
-        await self.api.set_device_info(self.uuid, "heatsubmode", "v", value)
-        self.publish_updates()
+        return await self._set("heatsubmode", "v", value)
 
     async def set_heat_fan_speed(self, value: int):
         self.heat_fan_speed = value
-        await self.api.set_device_info(self.uuid, "heatfs", "v", value)
-        self.publish_updates()
+        return await self._set("heatfs", "v", value)
 
     async def set_cool_sub_mode(self, value: int):
         self.cool_sub_mode = value
-        await self.api.set_device_info(self.uuid, "coolsubmode", "v", value)
-        self.publish_updates()
+        return await self._set("coolsubmode", "v", value)
 
     async def set_cool_fan_speed(self, value: int):
         self.cool_fan_speed = value
-        await self.api.set_device_info(self.uuid, "coolfs", "v", value)
-        self.publish_updates()
+        return await self._set("coolfs", "v", value)
 
     async def set_ap_sub_mode(self, value: int):
         self.ap_sub_mode = value
-        await self.api.set_device_info(self.uuid, "apsubmode", "v", value)
-        self.publish_updates()
+        return await self._set("apsubmode", "v", value)
 
     async def set_fan_speed_0(self, value: int):
         self.fan_speed_0 = value
-        await self.api.set_device_info(self.uuid, "fsp0", "v", value)
-        self.publish_updates()
+        return await self._set("fsp0", "v", value)
 
     async def set_night_light_brightness(self, value: int):
         """Set the sunrise / night light stepless brightness (0-100)."""
         self.night_light_brightness = value
-        await self.api.set_device_info(self.uuid, "nlstepless", "v", value)
-        self.publish_updates()
+        return await self._set("nlstepless", "v", value, coalesce=True)
 
     async def set_timer_duration(self, value: int):
         """Set the sleep / off timer duration in seconds."""
         self.timer_duration = value
-        await self.api.set_device_info(self.uuid, "timdur", "v", value)
-        self.publish_updates()
+        return await self._set("timdur", "v", value)
 
     async def set_hour_format(self, value: bool):
         """Set the clock display: False = 12-hour, True = 24-hour."""
         self.hour_format = value
-        await self.api.set_device_info(self.uuid, "hourformat", "vb", value)
-        self.publish_updates()
+        return await self._set("hourformat", "vb", value)
 
     @property
     def model_name(self) -> str:
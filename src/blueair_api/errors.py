@@ -6,7 +6,82 @@ class BaseError(ClientError):
 
 
 class RateError(BaseError):
-    pass
+    """The server throttled the request (HTTP 429).
+
+    ``retry_after`` is the delay in seconds the server asked for, if
+    any, and ``host`` the throttling host.
+    """
+
+    def __init__(
+        self,
+        *args,
+        retry_after: float | None = None,
+        host: str | None = None,
+    ) -> None:
+        super().__init__(*args)
+        self.retry_after = retry_after
+        self.host = host
+
+
+class ServerError(BaseError, ValueError):
+    """The server failed the request with a 5xx status.
+
+    Also a ``ValueError`` for callers that caught the bare
+    ``ValueError("unknown status code ...")`` raised before.
+    """
+
+    def __init__(self, *args, status: int | None = None) -> None:
+        super().__init__(*args)
+        self.status = status
+
+
+class DeadlineExceededError(BaseError, TimeoutError):
+    """The operation's deadline ran out before the request finished.
+
+    Never retried: there is no budget left to retry in.
+    """
+
+
+class CircuitOpenError(BaseError):
+    """Requests to ``host`` are failing fast while its circuit is open.
+
+    ``retry_after`` is the number of seconds until a probe request will
+    be let through.
+    """
+
+    def __init__(
+        self,
+        *args,
+        host: str | None = None,
+        retry_after: float | None = None,
+    ) -> None:
+        super().__init__(*args)
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CommandRejectedError(BaseError):
+    """The device shadow did not accept a desired-state command.
+
+    ``code`` is the AWS IoT error code from the ``update/rejected``
+    response, or ``None`` when the command never reached the broker.
+    """
+
+    def __init__(self, *args, code: int | None = None) -> None:
+        super().__init__(*args)
+        self.code = code
+
+
+class ClientRequestError(BaseError):
+    """The server refused the request itself (a 4xx other than auth or 429).
+
+    Raised for an unknown device, a malformed command and the like:
+    logging in again would not help, so the session is kept.
+    """
+
+    def __init__(self, *args, status: int | None = None) -> None:
+        super().__init__(*args)
+        self.status = status
 
 
 class AuthError(BaseError):
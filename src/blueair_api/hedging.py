@@ -0,0 +1,220 @@
+"""Hedged reads to cut tail latency.
+
+Most execute-api responses are quick; the slow tail is made of the
+occasional request that stalls.  :class:`Hedger` sends a second,
+identical request when the first has not answered within the
+``quantile`` of recently observed latencies for the same operation, and
+takes whichever answer arrives first.  The other request is cancelled,
+which closes its connection.
+
+Hedging doubles the cost of the requests it fires, so it is bounded by
+a budget: every read earns ``budget_ratio`` of a hedge (up to
+``budget_burst`` saved up), and a hedge is only sent when a whole one
+is available.  The default ratio keeps extra traffic under 10 %.
+
+Only reads marked with :func:`hedged_read` are hedged; ``HttpAwsBlueair``
+marks ``devices``, ``device_info`` and ``device_telemetry`` (and so
+``device_sensors``).  Device commands and logins never are.
+
+Latency is measured from when a request is sent, not from when it
+started waiting for a rate-limit token or a scheduler slot: queueing
+behind a poll wave is not a slow server, and a backup request would
+only join the same queue.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import statistics
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterator
+from contextvars import ContextVar
+from logging import getLogger
+from typing import Any
+
+_LOGGER = getLogger(__name__)
+
+DEFAULT_HEDGE_QUANTILE = 0.95
+# Hedge delay before enough latencies have been seen to estimate one.
+DEFAULT_INITIAL_DELAY = 1.0
+DEFAULT_MIN_DELAY = 0.05
+DEFAULT_MAX_DELAY = 5.0
+DEFAULT_BUDGET_RATIO = 0.1
+DEFAULT_BUDGET_BURST = 5.0
+# Latencies kept per operation, and needed before the quantile is used.
+_LATENCY_WINDOW = 200
+_MIN_SAMPLES = 20
+
+_hedged_operation: ContextVar[str | None] = ContextVar("blueair_hedged_operation", default=None)
+# Resolved with the loop time at which the current attempt was sent.
+_sent: ContextVar[asyncio.Future[float] | None] = ContextVar("blueair_hedge_sent", default=None)
+
+
+@contextlib.contextmanager
+def hedged_read(operation: str) -> Iterator[None]:
+    """Allow requests made inside the block to be hedged.
+
+    ``operation`` groups requests whose latencies are comparable.
+    """
+    token = _hedged_operation.set(operation)
+    try:
+        yield
+    finally:
+        _hedged_operation.reset(token)
+
+
+class Hedger:
+    """Sends a backup request when the first one is slower than usual."""
+
+    def __init__(
+        self,
+        quantile: float = DEFAULT_HEDGE_QUANTILE,
+        initial_delay: float = DEFAULT_INITIAL_DELAY,
+        min_delay: float = DEFAULT_MIN_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        budget_ratio: float = DEFAULT_BUDGET_RATIO,
+        budget_burst: float = DEFAULT_BUDGET_BURST,
+    ) -> None:
+        if not 0 < quantile < 1:
+            raise ValueError(f"quantile must be between 0 and 1, got {quantile}")
+        if not 0 <= min_delay <= max_delay:
+            raise ValueError("delays must satisfy 0 <= min_delay <= max_delay")
+        if budget_ratio < 0 or budget_burst < 1:
+            raise ValueError("budget_ratio must be >= 0 and budget_burst >= 1")
+        self.quantile = quantile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_burst = budget_burst
+        self.budget = budget_burst
+        self.latencies: dict[str, deque[float]] = {}
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self, operation: str) -> float:
+        """Seconds to wait for the first request before hedging it."""
+        samples = self.latencies.get(operation)
+        if samples is None or len(samples) < _MIN_SAMPLES:
+            estimate = self.initial_delay
+        else:
+            estimate = statistics.quantiles(samples, n=100, method="inclusive")[
+                round(self.quantile * 100) - 1
+            ]
+        return min(self.max_delay, max(self.min_delay, estimate))
+
+    def _record(self, operation: str, seconds: float) -> None:
+        self.latencies.setdefault(operation, deque(maxlen=_LATENCY_WINDOW)).append(seconds)
+
+    def _record_since(self, operation: str, sent: asyncio.Future[float]) -> None:
+        if sent.done():
+            self._record(operation, asyncio.get_running_loop().time() - sent.result())
+
+    @staticmethod
+    def _start[T](
+        attempt: Callable[[], Awaitable[T]], clocked: bool
+    ) -> tuple[asyncio.Future[T], asyncio.Future[float]]:
+        loop = asyncio.get_running_loop()
+        sent: asyncio.Future[float] = loop.create_future()
+        if not clocked:
+            sent.set_result(loop.time())
+            return asyncio.ensure_future(attempt()), sent
+
+        async def clocked_attempt() -> T:
+            # The task runs in a copy of the context; this is its own.
+            _sent.set(sent)
+            return await attempt()
+
+        return asyncio.ensure_future(clocked_attempt()), sent
+
+    async def run[T](
+        self, operation: str, attempt: Callable[[], Awaitable[T]], *, clocked: bool = False
+    ) -> T:
+        """Run ``attempt()``, racing a second call if the first is slow.
+
+        With ``clocked`` the delay only starts once the attempt passes
+        :func:`request_with_hedge_clock`; otherwise it starts at once.
+        """
+        loop = asyncio.get_running_loop()
+        self.requests += 1
+        self.budget = min(self.budget_burst, self.budget + self.budget_ratio)
+        primary, primary_sent = self._start(attempt, clocked)
+        hedge: asyncio.Future[T] | None = None
+        try:
+            # Queueing for a token or a slot is not latency: wait until
+            # the request is sent (or fails before it could be).
+            first: set[asyncio.Future[Any]] = {primary, primary_sent}
+            await asyncio.wait(first, return_when=asyncio.FIRST_COMPLETED)
+            if not primary.done():
+                waited = loop.time() - primary_sent.result()
+                await asyncio.wait({primary}, timeout=max(0.0, self.delay(operation) - waited))
+            if primary.done() or self.budget < 1:
+                result = await primary
+                self._record_since(operation, primary_sent)
+                return result
+            self.budget -= 1
+            self.hedges += 1
+            _LOGGER.debug("%s slower than %.3fs; hedging", operation, self.delay(operation))
+            hedge, hedge_sent = self._start(attempt, clocked)
+            pending: set[asyncio.Future[T]] = {primary, hedge}
+            errors: dict[asyncio.Future[T], BaseException] = {}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        errors[task] = error
+                    elif winner is None or task is primary:
+                        winner = task
+                if winner is not None:
+                    if winner is hedge:
+                        self.hedge_wins += 1
+                        self._record_since(operation, hedge_sent)
+                    else:
+                        self._record_since(operation, primary_sent)
+                    return winner.result()
+            # Both failed; report the original request's error.
+            raise errors[primary] if primary in errors else next(iter(errors.values()))
+        finally:
+            for request in (primary, hedge):
+                if request is not None and not request.done():
+                    request.cancel()
+
+
+def request_with_hedging(func):
+    """Hedge the request through ``self.hedger`` inside :func:`hedged_read`.
+
+    Sits inside ``request_with_retry``: each attempt may be hedged, and
+    each of the racing requests goes through the circuit breaker, rate
+    limiter and scheduler on its own.  The hedge delay is timed from
+    :func:`request_with_hedge_clock`, further in.
+    """
+    @functools.wraps(func)
+    async def request_with_hedging_wrapper(*args: Any, **kwargs: Any):
+        self = args[0]
+        operation = _hedged_operation.get()
+        if self.hedger is None or operation is None:
+            return await func(*args, **kwargs)
+        return await self.hedger.run(operation, lambda: func(*args, **kwargs), clocked=True)
+
+    return request_with_hedging_wrapper
+
+
+def request_with_hedge_clock(func):
+    """Start the hedge timer of the enclosing attempt.
+
+    Sits inside ``request_with_rate_limit`` and ``request_with_scheduler``,
+    so the time spent waiting for a token or a slot is not counted as
+    latency.
+    """
+    @functools.wraps(func)
+    async def request_with_hedge_clock_wrapper(*args: Any, **kwargs: Any):
+        sent = _sent.get()
+        if sent is not None and not sent.done():
+            sent.set_result(asyncio.get_running_loop().time())
+        return await func(*args, **kwargs)
+
+    return request_with_hedge_clock_wrapper
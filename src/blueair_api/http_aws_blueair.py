@@ -1,73 +1,241 @@
+import asyncio
 import functools
-import json
 import base64
+import time
 
+from contextvars import Context, ContextVar
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
 from logging import getLogger
 from typing import Any
-from aiohttp import ClientSession, ClientResponse, FormData
+from aiohttp import ClientError, ClientResponse, ClientSession, ClientTimeout, FormData
 from datetime import datetime, timedelta
 
+from . import codec
+from .circuit_breaker import CircuitBreaker, CircuitState, request_with_circuit_breaker
 from .const import AWS_APIKEYS
-from .util_http import request_with_logging
-from .errors import SessionError, LoginError
+from .deadline import DEFAULT_REQUEST_TIMEOUT, request_with_timeout
+from .hedging import Hedger, hedged_read, request_with_hedge_clock, request_with_hedging
+from .offload import OffloadOptions
+from .credential_store import (
+    CredentialStore,
+    MemoryCredentialStore,
+    StoredCredentials,
+    credential_key,
+)
+from .rate_limit import (
+    RateLimiter,
+    parse_retry_after,
+    request_host,
+    request_with_rate_limit,
+)
+from .retry import RetryPolicy, request_with_retry
+from .scheduler import (
+    Priority,
+    RequestScheduler,
+    current_priority,
+    request_priority,
+    request_with_scheduler,
+)
+from .state_cache import StateCache
+from .telemetry_cache import TelemetryHistory
+from .util_http import ApiResponse, ConnectionOptions, request_with_logging
+from .errors import (
+    AuthError,
+    ClientRequestError,
+    LoginError,
+    RateError,
+    ServerError,
+    SessionError,
+)
 
 _LOGGER = getLogger(__name__)
 
+# Number of device ids packed into a single ``/r/initial``
+# ``deviceconfigquery``.  Keeps each request body (and the response,
+# which carries the full configuration block per device) bounded for
+# large fleets.
+DEFAULT_DEVICE_INFO_CHUNK_SIZE = 25
+
+# ``deviceconfigquery`` selectors.  A full query also returns each
+# device's ``configuration`` block (its schema), which is most of the
+# response; a states-only query leaves it out.
+_FULL_INFO_SELECTORS = ("sensors",)
+_STATES_ONLY_SELECTORS = ("states",)
+
+# Telemetry series requested when the caller doesn't pick any.
+DEFAULT_TELEMETRY_SENSORS = ("pm1", "pm2_5", "pm10", "tVOC", "hcho", "h", "t", "fsp0")
+
+# Refresh the access token this many seconds before its ``exp`` claim.
+# Inside the margin the current token is still handed out while a
+# single background refresh replaces it.
+DEFAULT_TOKEN_REFRESH_MARGIN = 300.0
+
+# MQTT custom-authorizer credentials from /c/login expire after 24 hours.
+MQTT_CREDENTIAL_LIFETIME = 24 * 60 * 60
+
+# The access token get_access_token last handed out in this context, so
+# request_with_active_session knows which token a rejected request sent.
+_sent_access_token: ContextVar[str | None] = ContextVar(
+    "blueair_sent_access_token", default=None
+)
+
+
+@dataclass
+class ReauthTiming:
+    """Latency of one re-authentication tier of ``refresh_access_token``.
+
+    ``"session"`` counts logins that minted a JWT from the cached Gigya
+    session; ``"password"`` counts full ``accounts.login`` logins,
+    including the time spent on a rejected session attempt first.
+    """
+    count: int = 0
+    total_seconds: float = 0.0
+    last_seconds: float | None = None
+
+    @property
+    def mean_seconds(self) -> float | None:
+        return self.total_seconds / self.count if self.count else None
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.last_seconds = seconds
+
+
+def _jwt_claims(token: str) -> dict[str, Any]:
+    """Decode the (unverified) claims segment of a JWT."""
+    payload = token.split(".")[1]
+    # Add padding if needed
+    payload += "=" * (-len(payload) % 4)
+    claims = codec.loads(base64.urlsafe_b64decode(payload))
+    if not isinstance(claims, dict):
+        raise TypeError("JWT claims are not an object")
+    return claims
+
 
 def request_with_active_session(func):
     @functools.wraps(func)
-    async def request_with_active_session_wrapper(*args, **kwargs) -> ClientResponse:
+    async def request_with_active_session_wrapper(*args, **kwargs):
         _LOGGER.debug("session")
+        self = args[0]
+        access_token = self.access_token
+        sent = _sent_access_token.set(None)
         try:
             return await func(*args, **kwargs)
         except SessionError:
+            # The request may have refreshed the token before sending it.
+            access_token = _sent_access_token.get() or access_token
+            if self.access_token is not access_token:
+                # Another caller already replaced the token this request
+                # was sent with; resend with the new one rather than
+                # throwing it away and logging in again.
+                _LOGGER.debug("got invalid session, token already refreshed; resending")
+                return await func(*args, **kwargs)
             _LOGGER.debug("got invalid session, attempting to repair and resend")
-            self = args[0]
-            self.session_token = None
-            self.session_secret = None
+            # Remember the rejected token so it isn't re-adopted from the
+            # credential store on the next refresh.
+            self._rejected_access_token = access_token
+            # The Gigya session is kept: refresh_access_token tries it
+            # first and only falls back to a password login if Gigya
+            # rejects it.
             self.access_token = None
+            self.access_token_expires_at = None
             self.user_id = None
             self.mqtt_auth_name = None
             self.mqtt_auth_signature = None
             self.mqtt_auth_token = None
+            self.mqtt_auth_expires_at = None
             self.jwt = None
             response = await func(*args, **kwargs)
             return response
+        finally:
+            _sent_access_token.reset(sent)
 
     return request_with_active_session_wrapper
 
 
+async def _response_json(response) -> Any:
+    if isinstance(response, ApiResponse):
+        return response.json
+    # Duck-typed aiohttp ClientResponse.
+    return await response.json(content_type=None)
+
+
+async def _response_text(response) -> str:
+    if isinstance(response, ApiResponse):
+        return response.text
+    return await response.text()
+
+
+def _is_auth_failure(status_code: int, response_json: Any) -> bool:
+    """True for 401/403, including Gigya's 401xxx / 403xxx ``errorCode``s."""
+    if status_code in (401, 403):
+        return True
+    error_code = response_json.get("errorCode") if isinstance(response_json, dict) else None
+    return isinstance(error_code, int) and error_code // 1000 in (401, 403)
+
+
+def _raise_rate_error(response, url: str, response_text: str):
+    headers = getattr(response, "headers", None) or {}
+    retry_after = parse_retry_after(headers.get("Retry-After"))
+    _LOGGER.debug("rate limited, retry after %s", retry_after)
+    raise RateError(response_text, retry_after=retry_after, host=request_host(url))
+
+
 def request_with_errors(func):
     @functools.wraps(func)
-    async def request_with_errors_wrapper(*args, **kwargs) -> ClientResponse:
+    async def request_with_errors_wrapper(*args, **kwargs):
         _LOGGER.debug("checking for errors")
-        response: ClientResponse = await func(*args, **kwargs)
+        response = await func(*args, **kwargs)
         status_code = response.status
+        if status_code == 429:
+            # Throttled; the body may well not be JSON, and the session
+            # is fine, so this must not become a SessionError.
+            _raise_rate_error(response, kwargs["url"], await _response_text(response))
         try:
-            response_json = await response.json(content_type=None)
-            if response_json is not None:
-                if "statusCode" in response_json:
-                    _LOGGER.debug("response json found, checking status code from response")
-                    status_code = response_json["statusCode"]
+            response_json = await _response_json(response)
         except Exception as e:
+            if status_code < 400:
+                # A success status with a body we cannot read: ambiguous,
+                # so treat it as a transient session/auth error.
+                _LOGGER.debug(
+                    "response body was not valid JSON (http status %s), "
+                    "treating as a transient session/auth error: %s", status_code, e
+                )
+                raise SessionError(f"non-JSON response (http status {status_code})") from e
+            # Gateways answer 5xx (and some 4xx) with HTML or empty
+            # bodies; the HTTP status alone classifies those.
             _LOGGER.debug(
-                f"response body was not valid JSON (http status {status_code}), "
-                f"treating as a transient session/auth error: {e}"
+                "error response body was not valid JSON (http status %s): %s",
+                status_code, e,
             )
-            raise SessionError(f"non-JSON response (http status {status_code})") from e
+            response_json = None
+        if response_json is not None and "statusCode" in response_json:
+            _LOGGER.debug("response json found, checking status code from response")
+            status_code = response_json["statusCode"]
         if status_code == 200:
             _LOGGER.debug("response 200")
             return response
-        if 400 <= status_code <= 500:
-            _LOGGER.debug(f"auth error, {status_code}")
+        if status_code == 429:
+            _raise_rate_error(response, kwargs["url"], await _response_text(response))
+        if 400 <= status_code < 500:
             url = kwargs["url"]
-            response_text = await response.text()
+            response_text = await _response_text(response)
             if "accounts.login" in url:
-                _LOGGER.debug("login error")
+                _LOGGER.debug("login error, %s", status_code)
                 raise LoginError(response_text)
-            else:
-                _LOGGER.debug("session error")
+            if _is_auth_failure(status_code, response_json):
+                _LOGGER.debug("session error, %s", status_code)
                 raise SessionError(response_text)
+            # Not an auth problem: logging in again would not help.
+            _LOGGER.debug("client error, %s", status_code)
+            raise ClientRequestError(response_text, status=status_code)
+        if status_code >= 500:
+            _LOGGER.debug("server error, %s", status_code)
+            raise ServerError(
+                f"server error (http status {status_code})", status=status_code
+            )
         raise ValueError(f"unknown status code {status_code}")
 
     return request_with_errors_wrapper
@@ -83,6 +251,18 @@ class HttpAwsBlueair:
         *,
         gigya_region: str | None = None,
         cloud_region: str | None = None,
+        token_refresh_margin: float = DEFAULT_TOKEN_REFRESH_MARGIN,
+        credential_store: CredentialStore | None = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        connection_options: ConnectionOptions | None = None,
+        incremental_telemetry: bool = True,
+        scheduler: RequestScheduler | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        request_timeout: float | None = DEFAULT_REQUEST_TIMEOUT,
+        hedger: Hedger | None = None,
+        state_cache: StateCache | None = None,
+        offload: OffloadOptions | None = None,
     ):
         """Construct the Blueair AWS HTTP client.
 
@@ -104,6 +284,60 @@ class HttpAwsBlueair:
             Optional override for the BlueCloud REST + MQTT region
             (controls ``execute-api`` host and ``iot.amazonaws.com``
             broker).  Defaults to ``region``.
+        token_refresh_margin
+            Seconds before the access token's ``exp`` claim at which a
+            background refresh starts.  Callers keep using the current
+            token until it actually expires.
+        credential_store
+            Where login results are persisted and looked up.  Defaults
+            to a private :class:`MemoryCredentialStore`.  Pass a shared
+            store (e.g. a :class:`FileCredentialStore`) to start from
+            cached credentials without a network round-trip and to let
+            several clients or processes share one login.  The store is
+            first read on the first :meth:`get_access_token` or
+            :meth:`get_user_id`, or by awaiting :meth:`load_credentials`.
+        rate_limiter
+            Paces requests per host and backs off when the server
+            answers 429.  Defaults to a private :class:`RateLimiter`;
+            share one between clients to pace them together.
+        retry_policy
+            When and how often a request that failed with a transient
+            error is re-sent.  Defaults to :class:`RetryPolicy`'s
+            defaults; pass ``RetryPolicy(max_attempts=1)`` to disable.
+        connection_options
+            Pool settings for the session the client creates when no
+            ``client_session`` is given.  Defaults to
+            :class:`ConnectionOptions`' defaults.
+        incremental_telemetry
+            Cache telemetry per device so :meth:`device_sensors` only
+            downloads the buckets since the last poll.  The returned
+            payload has the same shape either way.
+        scheduler
+            Caps requests in flight and lets interactive requests
+            (device commands) go ahead of background ones (polling).
+            Defaults to a private :class:`RequestScheduler`.
+        circuit_breaker
+            Fails requests to a host fast with ``CircuitOpenError``
+            after repeated server errors or timeouts, probing it again
+            periodically.  Defaults to a private :class:`CircuitBreaker`;
+            see :meth:`endpoint_available`.
+        request_timeout
+            Seconds each request attempt may take; ``None`` leaves only
+            aiohttp's own timeout.  Wrap calls in
+            :func:`blueair_api.deadline.deadline` to bound a whole
+            operation, retries and login included.
+        hedger
+            Enables hedged reads: :meth:`devices`, :meth:`device_info`
+            and :meth:`device_telemetry` send a backup request when the
+            first is slower than usual.  ``None`` (the default) disables
+            hedging.
+        state_cache
+            Serves :meth:`device_info` and :meth:`device_sensors` from
+            memory while recent enough, refetching stale entries in the
+            background.  ``None`` (the default) always fetches.
+        offload
+            Decodes large response bodies in a thread pool instead of
+            on the event loop.  ``None`` (the default) decodes inline.
 
         Most accounts have ``gigya_region == cloud_region``.  Splitting
         them is only needed when the device's live AWS IoT broker is
@@ -127,26 +361,116 @@ class HttpAwsBlueair:
                 f"{sorted(AWS_APIKEYS)}"
             )
 
-        self.session_token = None
-        self.session_secret = None
+        self.session_token: str | None = None
+        self.session_secret: str | None = None
 
-        self.access_token = None
-        self.user_id = None
+        self.access_token: str | None = None
+        self.access_token_expires_at: float | None = None
+        self.user_id: str | None = None
+        self.token_refresh_margin = token_refresh_margin
+        # Single in-flight login chain shared by every concurrent caller.
+        self._refresh_task: asyncio.Task | None = None
+        self.reauth_timings: dict[str, ReauthTiming] = {
+            "session": ReauthTiming(),
+            "password": ReauthTiming(),
+        }
 
-        self.mqtt_auth_name = None
-        self.mqtt_auth_signature = None
-        self.mqtt_auth_token = None
+        self.mqtt_auth_name: str | None = None
+        self.mqtt_auth_signature: str | None = None
+        self.mqtt_auth_token: str | None = None
+        self.mqtt_auth_expires_at: float | None = None
 
-        self.jwt = None
+        self.jwt: str | None = None
+
+        self.credential_store = (
+            credential_store if credential_store is not None else MemoryCredentialStore()
+        )
+        self._rejected_access_token: str | None = None
+        self._credentials_loaded = False
+        self._credentials_lock = asyncio.Lock()
+
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+        self.request_timeout = request_timeout
+        self.hedger = hedger
+        self.state_cache = state_cache
+        self.offload = offload
+        self.circuit_breaker = (
+            circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        )
+        self.incremental_telemetry = incremental_telemetry
+        self.telemetry_cache: dict[str, TelemetryHistory] = {}
 
         if client_session is None:
-            self.api_session = ClientSession(raise_for_status=False)
+            if connection_options is None:
+                connection_options = ConnectionOptions()
+            self.api_session = connection_options.create_session()
         else:
             self.api_session = client_session
+        self.connection_options = connection_options
+        self._prewarm_task: asyncio.Task | None = None
 
     async def cleanup_client_session(self):
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+        if self.state_cache is not None:
+            self.state_cache.clear()
         await self.api_session.close()
 
+    @property
+    def hosts(self) -> list[str]:
+        """The Gigya and BlueCloud REST hosts this client talks to."""
+        return [
+            AWS_APIKEYS[self.gigya_region]["gigyaRegion"],
+            f"{AWS_APIKEYS[self.cloud_region]['restApiId']}.execute-api."
+            f"{AWS_APIKEYS[self.cloud_region]['awsRegion']}",
+        ]
+
+    def circuit_states(self) -> dict[str, CircuitState]:
+        """Circuit state of each of :attr:`hosts`."""
+        return {host: self.circuit_breaker.state(host) for host in self.hosts}
+
+    def endpoint_available(self) -> bool:
+        """False while any host's circuit is open.
+
+        A poller can skip a cycle (and keep serving the state it has)
+        instead of sending requests that would fail with
+        ``CircuitOpenError``.  A half-open circuit counts as available
+        so the probe request gets sent.
+        """
+        return all(state is not CircuitState.OPEN for state in self.circuit_states().values())
+
+    async def prewarm(self) -> dict[str, bool]:
+        """Open keep-alive connections to :attr:`hosts` in parallel.
+
+        Sends an unauthenticated ``HEAD /`` to each host so the DNS
+        lookup and TLS handshake are done before the first real request
+        needs them.  Failures are logged and otherwise ignored; returns
+        whether each host answered.
+        """
+        hosts = self.hosts
+        results = await asyncio.gather(*(self._prewarm_host(host) for host in hosts))
+        return dict(zip(hosts, results))
+
+    async def _prewarm_host(self, host: str) -> bool:
+        options = self.connection_options or ConnectionOptions()
+        timeout = ClientTimeout(total=options.prewarm_timeout)
+        try:
+            async with self.api_session.head(f"https://{host}/", timeout=timeout) as response:
+                await response.read()
+        except (ClientError, TimeoutError) as e:
+            _LOGGER.debug("prewarm of %s failed: %r", host, e)
+            return False
+        _LOGGER.debug("prewarmed connection to %s", host)
+        return True
+
+    def _start_prewarm(self) -> None:
+        options = self.connection_options
+        if options is None or not options.prewarm_on_login or self._prewarm_task is not None:
+            return
+        self._prewarm_task = asyncio.create_task(self.prewarm())
+
     @property
     def region(self) -> str:
         """Back-compat alias for ``cloud_region``.
@@ -173,13 +497,32 @@ class HttpAwsBlueair:
         self.gigya_region = value
         self.cloud_region = value
 
+    @request_with_retry
+    @request_with_hedging
+    @request_with_circuit_breaker
+    @request_with_rate_limit
+    @request_with_scheduler
+    @request_with_hedge_clock
+    @request_with_timeout
     @request_with_errors
     @request_with_logging
     async def _get_request_with_logging_and_errors_raised(
-        self, url: str, headers: dict | None = None, params: dict | None = None
-    ) -> ClientResponse:
-        return await self.api_session.get(url=url, headers=headers, params=params)
+        self,
+        url: str,
+        headers: dict | None = None,
+        params: dict | None = None,
+        idempotent: bool = True,
+    ) -> ApiResponse:
+        async with self.api_session.get(url=url, headers=headers, params=params) as response:
+            return await self._read_response(response)
 
+    @request_with_retry
+    @request_with_hedging
+    @request_with_circuit_breaker
+    @request_with_rate_limit
+    @request_with_scheduler
+    @request_with_hedge_clock
+    @request_with_timeout
     @request_with_errors
     @request_with_logging
     async def _post_request_with_logging_and_errors_raised(
@@ -188,10 +531,18 @@ class HttpAwsBlueair:
         json_body: dict | None = None,
         form_data: FormData | None = None,
         headers: dict | None = None,
-    ) -> ClientResponse:
-        return await self.api_session.post(
+        idempotent: bool = True,
+    ) -> ApiResponse:
+        async with self.api_session.post(
             url=url, data=form_data, json=json_body, headers=headers
-        )
+        ) as response:
+            return await self._read_response(response)
+
+    async def _read_response(self, response: ClientResponse) -> ApiResponse:
+        api_response = await ApiResponse.read(response)
+        if self.offload is not None:
+            await self.offload.decode(api_response)
+        return api_response
 
     async def refresh_session(self) -> None:
         _LOGGER.debug("refresh_session")
@@ -201,12 +552,12 @@ class HttpAwsBlueair:
         form_data.add_field("loginID", self.username)
         form_data.add_field("password", self.password)
         form_data.add_field("targetEnv", "mobile")
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._post_request_with_logging_and_errors_raised(
                 url=url, form_data=form_data
             )
         )
-        response_json = await response.json(content_type="text/javascript")
+        response_json = response.json
         self.session_token = response_json["sessionInfo"]["sessionToken"]
         self.session_secret = response_json["sessionInfo"]["sessionSecret"]
 
@@ -219,38 +570,184 @@ class HttpAwsBlueair:
         form_data.add_field("oauth_token", self.session_token)
         form_data.add_field("secret", self.session_secret)
         form_data.add_field("targetEnv", "mobile")
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._post_request_with_logging_and_errors_raised(
                 url=url, form_data=form_data
             )
         )
-        response_json = await response.json(content_type="text/javascript")
+        response_json = response.json
         self.jwt = response_json["id_token"]
 
     async def refresh_access_token(self) -> None:
+        """Run the login chain, joining one already in flight.
+
+        Concurrent callers (e.g. every device refreshing right after the
+        token expired, or the MQTT reconnect hook) share a single
+        ``_refresh_access_token`` run instead of each starting their own.
+        """
+        task = self._refresh_task
+        if task is None or task.done():
+            task = self._start_refresh_task()
+        else:
+            _LOGGER.debug("refresh_access_token: joining in-flight refresh")
+        # Shield so one cancelled waiter doesn't abort the login for all.
+        await asyncio.shield(task)
+
+    def _start_refresh_task(self) -> asyncio.Task:
+        # The login is shared by every caller that joins it, so it runs
+        # in a fresh context rather than under the deadline of whichever
+        # caller started it.  Only the lane carries over: a command's
+        # login still goes ahead of polling.
+        task = asyncio.create_task(
+            self._refresh_access_token_in_lane(current_priority()), context=Context()
+        )
+        self._refresh_task = task
+        task.add_done_callback(self._refresh_task_done)
+        return task
+
+    async def _refresh_access_token_in_lane(self, priority: Priority) -> None:
+        with request_priority(priority):
+            await self._refresh_access_token()
+
+    def _refresh_task_done(self, task: asyncio.Task) -> None:
+        if self._refresh_task is task:
+            self._refresh_task = None
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.debug("access token refresh failed: %s", task.exception())
+
+    def _access_token_expires_in(self) -> float | None:
+        if self.access_token_expires_at is None:
+            return None
+        return self.access_token_expires_at - time.time()
+
+    @property
+    def credential_key(self) -> str:
+        """Key this client's credentials are stored under."""
+        return credential_key(self.username, self.gigya_region, self.cloud_region)
+
+    async def load_credentials(self) -> bool:
+        """Read this client's credentials from the store once.
+
+        Called on first use by :meth:`get_access_token` and
+        :meth:`get_user_id`; await it directly to warm up ahead of the
+        first request.  Returns True if a usable access token was adopted.
+        """
+        async with self._credentials_lock:
+            if self._credentials_loaded:
+                return self.access_token is not None
+            adopted = await self._load_stored_credentials(require_new=False)
+            self._credentials_loaded = True
+            return adopted
+
+    async def _load_stored_credentials(self, require_new: bool) -> bool:
+        """Adopt credentials from the store; True if a usable token was adopted.
+
+        With ``require_new`` only a token different from the one this
+        client already holds counts, so an explicit refresh never just
+        hands back the credentials it was asked to replace.
+        """
+        try:
+            # A FileCredentialStore reads from disk.
+            stored = await asyncio.to_thread(self.credential_store.load, self.credential_key)
+        except OSError as e:
+            _LOGGER.warning("Failed to read credential store: %s", e)
+            return False
+        if stored is None:
+            return False
+        if stored.session_token and stored.session_secret:
+            self.session_token = stored.session_token
+            self.session_secret = stored.session_secret
+        margin = self.token_refresh_margin if require_new else 0.0
+        if (
+            not stored.access_token_valid(margin)
+            or stored.access_token == self._rejected_access_token
+            or (require_new and stored.access_token == self.access_token)
+        ):
+            return False
+        self.access_token = stored.access_token
+        self.access_token_expires_at = stored.access_token_expires_at
+        self.user_id = stored.user_id
+        if stored.mqtt_credentials_valid():
+            self.mqtt_auth_name = stored.mqtt_auth_name
+            self.mqtt_auth_signature = stored.mqtt_auth_signature
+            self.mqtt_auth_token = stored.mqtt_auth_token
+            self.mqtt_auth_expires_at = stored.mqtt_auth_expires_at
+        return True
+
+    async def _save_credentials(self) -> None:
+        credentials = StoredCredentials(
+            session_token=self.session_token,
+            session_secret=self.session_secret,
+            access_token=self.access_token,
+            access_token_expires_at=self.access_token_expires_at,
+            user_id=self.user_id,
+            mqtt_auth_name=self.mqtt_auth_name,
+            mqtt_auth_signature=self.mqtt_auth_signature,
+            mqtt_auth_token=self.mqtt_auth_token,
+            mqtt_auth_expires_at=self.mqtt_auth_expires_at,
+        )
+        try:
+            # A FileCredentialStore may wait for another process's write.
+            await asyncio.to_thread(self.credential_store.save, self.credential_key, credentials)
+        except OSError as e:
+            _LOGGER.warning("Failed to write credential store: %s", e)
+
+    async def _refresh_access_token(self) -> None:
+        async with self.credential_store.refresh_lock(self.credential_key):
+            # Another client sharing the store may have logged in while
+            # we waited for the lock; use its result instead of logging
+            # in again.
+            if await self._load_stored_credentials(require_new=True):
+                _LOGGER.debug("refresh_access_token: adopted credentials from store")
+                return
+            await self._login()
+            await self._save_credentials()
+
+    async def _login(self) -> None:
         _LOGGER.debug("refresh_access_token")
-        # Always do a full re-authentication from scratch.
+        started = time.monotonic()
+        # Always mint a fresh JWT.
         # The JWT from Gigya has a very short lifetime (~5 minutes) and cannot
         # be reused.  Previously we skipped refresh_jwt() when self.jwt was
         # still set, which caused MQTT credential refreshes to send an expired
         # JWT and get stuck in a 401 loop.
-        self.session_token = None
-        self.session_secret = None
         self.jwt = None
-        await self.refresh_jwt()
+        # The first login walks three hops across both hosts; warm the
+        # BlueCloud connection while the Gigya hops run.
+        self._start_prewarm()
+        tier = "password"
+        if self.session_token is not None and self.session_secret is not None:
+            # Tier 1: the Gigya session outlives the JWT, so mint a new
+            # JWT from it and skip re-posting the password.
+            try:
+                await self.refresh_jwt()
+                tier = "session"
+            except (AuthError, ClientRequestError) as e:
+                _LOGGER.debug(
+                    "refresh_access_token: cached Gigya session rejected (%s); "
+                    "falling back to password login", e
+                )
+                self.session_token = None
+                self.session_secret = None
+                self.jwt = None
+        if self.jwt is None:
+            # Tier 2: full accounts.login with the password.
+            await self.refresh_session()
+            await self.refresh_jwt()
         url = f"https://{AWS_APIKEYS[self.cloud_region]['restApiId']}.execute-api.{AWS_APIKEYS[self.cloud_region]['awsRegion']}/prod/c/login"
         headers = {"idtoken": self.jwt, "authorization": f"Bearer {self.jwt}"}
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._post_request_with_logging_and_errors_raised(
                 url=url, headers=headers
             )
         )
-        response_json = await response.json()
+        response_json = response.json
         self.access_token = response_json["access_token"]
         # MQTT auth credentials from the same login response.
         self.mqtt_auth_name = response_json.get("ba_X-Amz-CustomAuthorizer-Name")
         self.mqtt_auth_signature = response_json.get("ba_X-Amz-CustomAuthorizer-Signature")
         self.mqtt_auth_token = response_json.get("ba_X-Amz-CustomAuthorizer-Token")
+        self.mqtt_auth_expires_at = time.time() + MQTT_CREDENTIAL_LIFETIME
         if self.mqtt_auth_name and self.mqtt_auth_signature and self.mqtt_auth_token:
             _LOGGER.debug("refresh_access_token: obtained access token and MQTT credentials")
         else:
@@ -261,17 +758,26 @@ class HttpAwsBlueair:
         # Extract the username claim from the JWT to use as userId in API paths
         try:
             assert self.access_token is not None
-            payload = self.access_token.split(".")[1]
-            # Add padding if needed
-            payload += "=" * (4 - len(payload) % 4)
-            claims = json.loads(base64.urlsafe_b64decode(payload))
+            claims: dict[str, Any] = _jwt_claims(self.access_token)
             self.user_id = claims.get("username", "")
-            _LOGGER.debug(f"Extracted user_id from JWT: {self.user_id}")
+            _LOGGER.debug("Extracted user_id from JWT: %s", self.user_id)
         except Exception as e:
-            _LOGGER.warning(f"Failed to extract user_id from access_token JWT: {e}")
+            _LOGGER.warning("Failed to extract user_id from access_token JWT: %s", e)
             self.user_id = None
+            claims = {}
+        exp = claims.get("exp")
+        if isinstance(exp, int | float) and not isinstance(exp, bool):
+            self.access_token_expires_at = float(exp)
+        else:
+            # No usable exp claim: fall back to refreshing on failure only.
+            self.access_token_expires_at = None
+        elapsed = time.monotonic() - started
+        self.reauth_timings[tier].record(elapsed)
+        _LOGGER.debug("refresh_access_token: %s tier took %.3fs", tier, elapsed)
 
     async def get_user_id(self) -> str:
+        if not self._credentials_loaded:
+            await self.load_credentials()
         if self.user_id is None:
             await self.refresh_access_token()
         assert self.user_id is not None
@@ -279,11 +785,23 @@ class HttpAwsBlueair:
 
     async def get_access_token(self) -> str:
         _LOGGER.debug("get_access_token")
-        if self.access_token is None:
+        if not self._credentials_loaded:
+            await self.load_credentials()
+        expires_in = self._access_token_expires_in()
+        if self.access_token is None or (expires_in is not None and expires_in <= 0):
             await self.refresh_access_token()
+        elif expires_in is not None and expires_in <= self.token_refresh_margin:
+            self._start_background_refresh()
         assert self.access_token is not None
+        _sent_access_token.set(self.access_token)
         return self.access_token
 
+    def _start_background_refresh(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        _LOGGER.debug("access token expires soon; refreshing in the background")
+        self._start_refresh_task()
+
     @request_with_active_session
     async def devices(self) -> dict[str, Any]:
         _LOGGER.debug("devices")
@@ -291,16 +809,29 @@ class HttpAwsBlueair:
         headers = {
             "Authorization": f"Bearer {await self.get_access_token()}",
         }
-        response: ClientResponse = (
-            await self._get_request_with_logging_and_errors_raised(
-                url=url, headers=headers
+        with hedged_read("devices"):
+            response: ApiResponse = (
+                await self._get_request_with_logging_and_errors_raised(
+                    url=url, headers=headers
+                )
             )
-        )
-        response_json = await response.json()
+        response_json = response.json
         return response_json["devices"]
 
     @request_with_active_session
-    async def device_sensors(self, device_name, device_uuid, duration: timedelta = timedelta(hours=10)):
+    async def device_telemetry(
+        self,
+        device_uuid: str,
+        start: int,
+        end: int,
+        sensors: Iterable[str] | None = None,
+    ) -> Any:
+        """Fetch raw 5-minute telemetry for ``[start, end]`` (unix seconds).
+
+        Uncached; see :meth:`device_sensors` for polling and
+        :func:`blueair_api.telemetry_export.iter_telemetry` for long
+        ranges.
+        """
         user_id = await self.get_user_id()
         url = f"https://{AWS_APIKEYS[self.cloud_region]['restApiId']}.execute-api.{AWS_APIKEYS[self.cloud_region]['awsRegion']}/prod/c/{user_id}/r/telemetry/5m/historical"
         headers = {
@@ -308,46 +839,166 @@ class HttpAwsBlueair:
         }
         params = {
             "did": device_uuid,
-            "from": int((datetime.now()-duration).timestamp()),
-            "to": int(datetime.now().timestamp()),
-            "s": ["pm1", "pm2_5", "pm10", "tVOC", "hcho", "h", "t", "fsp0"]
+            "from": start,
+            "to": end,
+            "s": list(DEFAULT_TELEMETRY_SENSORS if sensors is None else sensors),
         }
-        response: ClientResponse = (
-            await self._get_request_with_logging_and_errors_raised(
-                url=url, headers=headers, params=params
+        with hedged_read("device_telemetry"):
+            response: ApiResponse = (
+                await self._get_request_with_logging_and_errors_raised(
+                    url=url, headers=headers, params=params
+                )
             )
+        return response.json
+
+    async def device_sensors(
+        self,
+        device_name,
+        device_uuid,
+        duration: timedelta = timedelta(hours=10),
+        sensors: Iterable[str] | None = None,
+    ):
+        """Fetch 5-minute telemetry history for ``sensors``.
+
+        ``sensors`` defaults to :data:`DEFAULT_TELEMETRY_SENSORS`;
+        ``DeviceAws`` passes the series its schema declares.
+        """
+        sensors = list(DEFAULT_TELEMETRY_SENSORS if sensors is None else sensors)
+        return await self._cached(
+            (device_uuid, "device_sensors", duration, tuple(sensors)),
+            lambda: self._device_sensors(device_uuid, duration, sensors),
         )
-        response_json = await response.json()
-        return response_json
 
-    @request_with_active_session
-    async def device_info(self, device_name, device_uuid) -> dict[str, Any]:
-        _LOGGER.debug("device_info")
-        user_id = await self.get_user_id()
-        url = f"https://{AWS_APIKEYS[self.cloud_region]['restApiId']}.execute-api.{AWS_APIKEYS[self.cloud_region]['awsRegion']}/prod/c/{user_id}/r/initial"
-        headers = {
-            "Authorization": f"Bearer {await self.get_access_token()}",
-        }
-        json_body = {
+    async def _device_sensors(
+        self, device_uuid: str, duration: timedelta, sensors: list[str]
+    ) -> Any:
+        start = int((datetime.now()-duration).timestamp())
+        end = int(datetime.now().timestamp())
+        history = self.telemetry_cache.get(device_uuid) if self.incremental_telemetry else None
+        if history is not None and not history.covers(start, sensors):
+            history = None
+        response_json = await self.device_telemetry(
+            device_uuid,
+            history.fetch_from(start) if history is not None else start,
+            end,
+            sensors,
+        )
+        if not self.incremental_telemetry:
+            return response_json
+        if history is None:
+            history = TelemetryHistory()
+        if not history.merge(response_json, start, end, sensors):
+            self.telemetry_cache.pop(device_uuid, None)
+            return response_json
+        self.telemetry_cache[device_uuid] = history
+        return history.to_response()
+
+    @staticmethod
+    def _device_config_query(
+        device_uuids: Iterable[str], states_only: bool = False
+    ) -> dict[str, Any]:
+        selectors = _STATES_ONLY_SELECTORS if states_only else _FULL_INFO_SELECTORS
+        return {
             "deviceconfigquery": [
                 {
                     "id": device_uuid,
                     "r": {
-                        "r": [
-                            "sensors",
-                        ],
+                        "r": list(selectors),
                     },
-                },
+                }
+                for device_uuid in device_uuids
             ],
             "includestates": True
         }
-        response: ClientResponse = (
-            await self._post_request_with_logging_and_errors_raised(
-                url=url, headers=headers, json_body=json_body
+
+    @request_with_active_session
+    async def _initial_device_info(
+        self, device_uuids: list[str], states_only: bool = False
+    ) -> list[dict[str, Any]]:
+        user_id = await self.get_user_id()
+        url = f"https://{AWS_APIKEYS[self.cloud_region]['restApiId']}.execute-api.{AWS_APIKEYS[self.cloud_region]['awsRegion']}/prod/c/{user_id}/r/initial"
+        headers = {
+            "Authorization": f"Bearer {await self.get_access_token()}",
+        }
+        json_body = self._device_config_query(device_uuids, states_only)
+        # A POST, but a read: safe to send twice.
+        with hedged_read("device_states" if states_only else "device_info"):
+            response: ApiResponse = (
+                await self._post_request_with_logging_and_errors_raised(
+                    url=url, headers=headers, json_body=json_body
+                )
             )
+        response_json = response.json
+        return response_json["deviceInfo"]
+
+    async def device_info(
+        self, device_name, device_uuid, states_only: bool = False
+    ) -> dict[str, Any]:
+        """Fetch the ``/r/initial`` payload of one device.
+
+        With ``states_only`` the ``configuration`` block is not
+        requested; callers that already hold the device's schema only
+        need ``states``.
+        """
+        _LOGGER.debug("device_info")
+
+        async def fetch() -> dict[str, Any]:
+            device_info = await self._initial_device_info([device_uuid], states_only)
+            return device_info[0]
+
+        kind = "device_states" if states_only else "device_info"
+        return await self._cached((device_uuid, kind), fetch)
+
+    async def _cached(self, key, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        if self.state_cache is None:
+            return await fetch()
+        return await self.state_cache.get(key, fetch)
+
+    def invalidate_device_state(self, device_uuid: str) -> None:
+        """Drop cached reads of a device whose state was just changed."""
+        if self.state_cache is not None:
+            self.state_cache.invalidate(device_uuid)
+
+    async def device_info_many(
+        self,
+        device_uuids: Iterable[str],
+        chunk_size: int = DEFAULT_DEVICE_INFO_CHUNK_SIZE,
+        states_only: bool = False,
+    ) -> dict[str, dict[str, Any]]:
+        """Fetch ``/r/initial`` payloads for many devices at once.
+
+        Device ids are packed into ``deviceconfigquery`` lists of at most
+        ``chunk_size`` entries, so refreshing a fleet costs one request
+        per chunk instead of one per device.  Chunks are sent
+        concurrently.  ``states_only`` is passed on as for
+        :meth:`device_info`.
+
+        Returns a mapping of device uuid to the same payload
+        :meth:`device_info` returns for that device.  Devices the cloud
+        did not answer for are absent from the mapping.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        uuids = list(dict.fromkeys(device_uuids))
+        _LOGGER.debug("device_info_many: %d device(s)", len(uuids))
+        if not uuids:
+            return {}
+        chunks = [uuids[i:i + chunk_size] for i in range(0, len(uuids), chunk_size)]
+        responses = await asyncio.gather(
+            *(self._initial_device_info(chunk, states_only) for chunk in chunks)
         )
-        response_json = await response.json()
-        return response_json["deviceInfo"][0]
+        result: dict[str, dict[str, Any]] = {}
+        for device_infos in responses:
+            for device_info in device_infos:
+                device_id = device_info.get("id") if isinstance(device_info, dict) else None
+                if device_id is None:
+                    _LOGGER.debug("device_info_many: skipping entry without id")
+                    continue
+                result[device_id] = device_info
+        missing = [uuid for uuid in uuids if uuid not in result]
+        if missing:
+            _LOGGER.debug("device_info_many: no payload for %s", missing)
+        return result
 
     @request_with_active_session
     async def set_device_info(
@@ -355,17 +1006,32 @@ class HttpAwsBlueair:
     ) -> bool:
         _LOGGER.debug("set_device_info")
         url = f"https://{AWS_APIKEYS[self.cloud_region]['restApiId']}.execute-api.{AWS_APIKEYS[self.cloud_region]['awsRegion']}/prod/c/{device_uuid}/a/{service_name}"
-        headers = {
-            "Authorization": f"Bearer {await self.get_access_token()}",
-        }
-        json_body = {"n": service_name, action_verb: action_value}
-        response: ClientResponse = (
-            await self._post_request_with_logging_and_errors_raised(
-                url=url, headers=headers, json_body=json_body
-            )
-        )
-        response_text = await response.text()
-        return response_text == "Success"
+        # Commands go ahead of polling, including any login they need.
+        with request_priority(Priority.INTERACTIVE):
+            headers = {
+                "Authorization": f"Bearer {await self.get_access_token()}",
+            }
+            json_body = {"n": service_name, action_verb: action_value}
+            try:
+                response: ApiResponse = (
+                    await self._post_request_with_logging_and_errors_raised(
+                        url=url, headers=headers, json_body=json_body, idempotent=False
+                    )
+                )
+            finally:
+                # Even a failed command may have reached the device.
+                self.invalidate_device_state(device_uuid)
+        return response.text == "Success"
+
+    def iter_telemetry(self, device_uuids, start, end, **kwargs):
+        """Stream historical telemetry for many devices in time order.
+
+        Thin wrapper around :func:`blueair_api.telemetry_export.iter_telemetry`;
+        see there for the window and concurrency options.
+        """
+        from .telemetry_export import iter_telemetry
+
+        return iter_telemetry(self, device_uuids, start, end, **kwargs)
 
     async def discover_cloud_region(
         self,
@@ -1,16 +1,26 @@
 from typing import Any
 import logging
 
-from aiohttp import ClientSession, ClientResponse
+from aiohttp import ClientSession
 import base64
 
-from .util_http import request_with_logging
+from .deadline import DEFAULT_REQUEST_TIMEOUT, request_with_timeout
+from .retry import RetryPolicy, request_with_retry
+from .util_http import ApiResponse, request_with_logging
 from .const import API_KEY
-from .errors import LoginError
+from .errors import LoginError, ServerError
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _raise_for_server_error(response: ApiResponse) -> ApiResponse:
+    if response.status >= 500:
+        raise ServerError(
+            f"server error (http status {response.status})", status=response.status
+        )
+    return response
+
+
 class HttpBlueair:
     def __init__(
         self,
@@ -19,11 +29,15 @@ class HttpBlueair:
         home_host: str | None = None,
         auth_token: str | None = None,
         client_session: ClientSession | None = None,
+        retry_policy: RetryPolicy | None = None,
+        request_timeout: float | None = DEFAULT_REQUEST_TIMEOUT,
     ):
         self.username = username
         self.password = password
         self.home_host = home_host
         self.auth_token = auth_token
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.request_timeout = request_timeout
 
         if client_session is None:
             self.api_session = ClientSession(raise_for_status=False)
@@ -43,17 +57,27 @@ class HttpBlueair:
             self.auth_token = await self._get_auth_token()
         return self.auth_token
 
+    @request_with_retry
+    @request_with_timeout
     @request_with_logging
     async def _get_request_with_logging_and_errors_raised(
-        self, url: str, headers: dict | None = None
-    ) -> ClientResponse:
-        return await self.api_session.get(url=url, headers=headers)
+        self, url: str, headers: dict | None = None, idempotent: bool = True
+    ) -> ApiResponse:
+        async with self.api_session.get(url=url, headers=headers) as response:
+            return _raise_for_server_error(await ApiResponse.read(response))
 
+    @request_with_retry
+    @request_with_timeout
     @request_with_logging
     async def _post_request_with_logging_and_errors_raised(
-        self, url: str, json_body: dict, headers: dict | None = None
-    ) -> ClientResponse:
-        return await self.api_session.post(url=url, json=json_body, headers=headers)
+        self,
+        url: str,
+        json_body: dict,
+        headers: dict | None = None,
+        idempotent: bool = True,
+    ) -> ApiResponse:
+        async with self.api_session.post(url=url, json=json_body, headers=headers) as response:
+            return _raise_for_server_error(await ApiResponse.read(response))
 
     async def _get_home_host(self) -> str:
         """
@@ -65,14 +89,14 @@ class HttpBlueair:
         """
         url = f"https://api.blueair.io/v2/user/{self.username}/homehost/"
         headers = {"X-API-KEY-TOKEN": API_KEY}
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._get_request_with_logging_and_errors_raised(
                 url=url, headers=headers
             )
         )
         if response.status == 404:
             raise LoginError("invalid username")
-        return (await response.text()).replace('"', "")
+        return response.text.replace('"', "")
 
     async def _get_auth_token(self) -> str:
         """
@@ -87,12 +111,12 @@ class HttpBlueair:
             "Authorization": "Basic "
             + base64.b64encode((self.username + ":" + self.password).encode()).decode(),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._get_request_with_logging_and_errors_raised(
                 url=url, headers=headers
             )
         )
-        result = await response.text()
+        result = response.text
         if response.status == 404:
             raise LoginError("invalid username")
         if result == "true":
@@ -116,12 +140,12 @@ class HttpBlueair:
             "X-API-KEY-TOKEN": API_KEY,
             "X-AUTH-TOKEN": await self.get_auth_token(),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._get_request_with_logging_and_errors_raised(
                 url=url, headers=headers
             )
         )
-        return await response.json()
+        return response.json
 
     # Note: refreshes every 5 minutes
     async def get_attributes(self, device_uuid: str) -> dict[str, Any]:
@@ -142,12 +166,12 @@ class HttpBlueair:
             "X-API-KEY-TOKEN": API_KEY,
             "X-AUTH-TOKEN": await self.get_auth_token(),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._get_request_with_logging_and_errors_raised(
                 url=url, headers=headers
             )
         )
-        raw_attributes = await response.json()
+        raw_attributes = response.json
         attributes = {}
         for item in raw_attributes:
             attributes[item["name"]] = item["currentValue"]
@@ -171,12 +195,12 @@ class HttpBlueair:
             "X-API-KEY-TOKEN": API_KEY,
             "X-AUTH-TOKEN": await self.get_auth_token(),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._get_request_with_logging_and_errors_raised(
                 url=url, headers=headers
             )
         )
-        return await response.json()
+        return response.json
 
     # Note: refreshes every 5 minutes, timestamps are in seconds
     async def get_current_data_point(self, device_uuid: str) -> dict[str, Any]:
@@ -195,12 +219,12 @@ class HttpBlueair:
             "X-API-KEY-TOKEN": API_KEY,
             "X-AUTH-TOKEN": await self.get_auth_token(),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._get_request_with_logging_and_errors_raised(
                 url=url, headers=headers
             )
         )
-        return await response.json()
+        return response.json
 
     async def get_data_points_since(self, device_uuid: str, seconds_ago: int = 0, sample_period: int = 300) -> dict[str, Any]:
         """
@@ -218,12 +242,12 @@ class HttpBlueair:
             "X-API-KEY-TOKEN": API_KEY,
             "X-AUTH-TOKEN": await self.get_auth_token(),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._get_request_with_logging_and_errors_raised(
                 url=url, headers=headers
             )
         )
-        return await response.json()
+        return response.json
 
     async def set_fan_speed(self, device_uuid, new_speed: str):
         """
@@ -247,12 +271,12 @@ class HttpBlueair:
             "name": new_name,
             "uuid": str(device_uuid),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._post_request_with_logging_and_errors_raised(
-                url=url, json_body=json_body, headers=headers
+                url=url, json_body=json_body, headers=headers, idempotent=False
             )
         )
-        return await response.json()
+        return response.json
 
     async def set_brightness(self, device_uuid, new_brightness: int):
         if new_brightness not in [0, 1, 2, 3, 4]:
@@ -268,12 +292,12 @@ class HttpBlueair:
             "name": "brightness",
             "uuid": str(device_uuid),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._post_request_with_logging_and_errors_raised(
-                url=url, json_body=json_body, headers=headers
+                url=url, json_body=json_body, headers=headers, idempotent=False
             )
         )
-        return await response.json()
+        return response.json
 
     async def set_child_lock(self, device_uuid, enabled: bool):
         url = f"https://{await self.get_home_host()}/v2/device/{device_uuid}/attribute/child_lock/"
@@ -288,12 +312,12 @@ class HttpBlueair:
             "name": "child_lock",
             "uuid": str(device_uuid),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._post_request_with_logging_and_errors_raised(
-                url=url, json_body=json_body, headers=headers
+                url=url, json_body=json_body, headers=headers, idempotent=False
             )
         )
-        return await response.json()
+        return response.json
 
     async def set_fan_auto_mode(self, device_uuid, auto: bool):
         url = f"https://{await self.get_home_host()}/v2/device/{device_uuid}/attribute/mode/"
@@ -308,9 +332,9 @@ class HttpBlueair:
             "name": "mode",
             "uuid": str(device_uuid),
         }
-        response: ClientResponse = (
+        response: ApiResponse = (
             await self._post_request_with_logging_and_errors_raised(
-                url=url, json_body=json_body, headers=headers
+                url=url, json_body=json_body, headers=headers, idempotent=False
             )
         )
-        return await response.json()
+        return response.json
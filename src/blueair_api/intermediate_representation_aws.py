@@ -1,6 +1,7 @@
 import typing
 from typing import Any
 from collections.abc import Iterable
+import logging
 from logging import getLogger
 import dataclasses
 import base64
@@ -168,6 +169,9 @@ class SensorPack(list[Record]):
     """Represents a RFC8428 SensorPack, resolved to Python Types."""
 
     def __init__(self, stream: Iterable[MappingType]):
+        # Checked once per pack; these per-field logs are the hottest
+        # debug statements in a refresh.
+        debug = _LOGGER.isEnabledFor(logging.DEBUG)
         seq = []
         for record in stream:
             rs = None
@@ -176,10 +180,12 @@ class SensorPack(list[Record]):
             ru = None
             rv : float | bool | str | bytes | None = None
             for label, value in record.items():
-                _LOGGER.debug(f"parsing senml record field {label} with value {value}")
+                if debug:
+                    _LOGGER.debug("parsing senml record field %s with value %s", label, value)
                 if not isinstance(value, str | int | float | bool):
                     # Skip non-scalar values (e.g. 'vj' alarm JSON dicts).
-                    _LOGGER.debug(f"skipping non-scalar senml field {label}")
+                    if debug:
+                        _LOGGER.debug("skipping non-scalar senml field %s", label)
                     continue
                 match label:
                     case 'bn' | 'bt' | 'bu' | 'bv' | 'bs' | 'bver':
@@ -15,7 +15,6 @@ investigation of the Blueair cloud API responses and AWS IoT
 protocol behavior.
 """
 import asyncio
-import json
 import ssl
 import uuid
 import threading
@@ -25,7 +24,11 @@ from collections.abc import Callable, Awaitable
 
 import paho.mqtt.client as mqtt
 
+from . import codec
 from .const import AWS_MQTT_BROKERS
+from .command_tracker import CommandTracker
+from .credential_store import CredentialStore
+from .errors import CommandRejectedError
 
 _LOGGER = getLogger(__name__)
 
@@ -43,6 +46,10 @@ _DEFAULT_SENSOR_TTL = 1200
 # Re-subscribe at 75 % of the TTL to avoid data gaps.
 _TTL_RESUBSCRIBE_RATIO = 0.75
 
+# Seconds to wait for the shadow's accepted / rejected response to a
+# desired-state command.
+DEFAULT_COMMAND_TIMEOUT = 5.0
+
 
 class MqttAwsBlueair:
     """MQTT client for real-time Blueair device updates via AWS IoT.
@@ -73,6 +80,12 @@ class MqttAwsBlueair:
                 http_client.mqtt_auth_token,
             )
         mqtt_client.credential_refresher = refresh_creds
+
+    With ``desired_state_commands=True`` the client also subscribes to
+    each device's shadow ``update/accepted`` and ``update/rejected``
+    topics, and :meth:`update_desired_state` can send commands over the
+    open connection.  Assign the client to ``DeviceAws.command_channel``
+    to have the device setters use it, falling back to REST.
     """
 
     def __init__(
@@ -82,6 +95,7 @@ class MqttAwsBlueair:
         mqtt_auth_signature: str,
         mqtt_auth_token: str,
         user_id: str,
+        desired_state_commands: bool = False,
     ):
         self._region = region
         self._mqtt_auth_name = mqtt_auth_name
@@ -102,6 +116,9 @@ class MqttAwsBlueair:
         # (mqtt_auth_name, mqtt_auth_signature, mqtt_auth_token).
         self.credential_refresher: CredentialRefresher | None = None
 
+        # Optional tracker confirming device commands from reported state.
+        self.command_tracker: CommandTracker | None = None
+
         # Event loop for running the async credential refresher from
         # the synchronous paho callback thread.
         self._event_loop = None
@@ -112,6 +129,42 @@ class MqttAwsBlueair:
         self._sensor_ttl: int = _DEFAULT_SENSOR_TTL
         self._resubscribe_timer: threading.Timer | None = None
 
+        self.desired_state_commands = desired_state_commands
+        # clientToken -> (loop, future) for commands awaiting a response.
+        self._pending_commands: dict[
+            str, tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]
+        ] = {}
+        self._pending_lock = threading.Lock()
+
+    @classmethod
+    def from_credential_store(
+        cls, store: CredentialStore, key: str, region: str
+    ) -> "MqttAwsBlueair | None":
+        """Build a client from credentials saved by an ``HttpAwsBlueair``.
+
+        ``key`` is the saving client's ``credential_key`` and ``region``
+        its ``cloud_region``.  Returns ``None`` when the store holds no
+        unexpired MQTT credentials for ``key``; log in through
+        ``HttpAwsBlueair`` in that case.
+        """
+        credentials = store.load(key)
+        if (
+            credentials is None
+            or not credentials.mqtt_credentials_valid()
+            or not credentials.user_id
+        ):
+            return None
+        assert credentials.mqtt_auth_name is not None
+        assert credentials.mqtt_auth_signature is not None
+        assert credentials.mqtt_auth_token is not None
+        return cls(
+            region=region,
+            mqtt_auth_name=credentials.mqtt_auth_name,
+            mqtt_auth_signature=credentials.mqtt_auth_signature,
+            mqtt_auth_token=credentials.mqtt_auth_token,
+            user_id=credentials.user_id,
+        )
+
     @property
     def connected(self) -> bool:
         return self._connected
@@ -133,10 +186,81 @@ class MqttAwsBlueair:
             f"d/{device_uuid}/s/5s",
             f"$aws/things/{device_uuid}/shadow/update/documents",
         ]
+        if self.desired_state_commands:
+            topics += [
+                f"$aws/things/{device_uuid}/shadow/update/accepted",
+                f"$aws/things/{device_uuid}/shadow/update/rejected",
+            ]
         for topic in topics:
             self._client.subscribe(topic)
             _LOGGER.debug(f"Subscribed to {topic}")
 
+    def commands_available(self, device_uuid: str) -> bool:
+        """True if desired-state commands can be sent to ``device_uuid`` now."""
+        return (
+            self.desired_state_commands
+            and self._connected
+            and self._client is not None
+            and device_uuid in self._device_ids
+        )
+
+    async def update_desired_state(
+        self,
+        device_uuid: str,
+        state: dict[str, Any],
+        timeout: float = DEFAULT_COMMAND_TIMEOUT,
+    ) -> None:
+        """Publish ``state`` as the device shadow's desired state.
+
+        Returns once the shadow service accepts the update.  Raises
+        :class:`CommandRejectedError` if it is rejected or cannot be
+        published, and ``TimeoutError`` if no response arrives within
+        ``timeout`` seconds.
+        """
+        client = self._client
+        if client is None or not self.commands_available(device_uuid):
+            raise CommandRejectedError(
+                f"MQTT command channel not available for {device_uuid}"
+            )
+        token = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        with self._pending_lock:
+            self._pending_commands[token] = (loop, future)
+        try:
+            payload = codec.dumps({"state": {"desired": state}, "clientToken": token})
+            info = client.publish(
+                f"$aws/things/{device_uuid}/shadow/update", payload, qos=1
+            )
+            if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                raise CommandRejectedError(
+                    f"MQTT publish to {device_uuid} failed: rc={info.rc}"
+                )
+            _LOGGER.debug(f"Desired state for {device_uuid}: {state} (token={token})")
+            async with asyncio.timeout(timeout):
+                await future
+        finally:
+            with self._pending_lock:
+                self._pending_commands.pop(token, None)
+
+    def _settle_command(self, token: str, error: Exception | None) -> None:
+        """Resolve the command awaiting ``token``; safe from any thread."""
+        with self._pending_lock:
+            pending = self._pending_commands.pop(token, None)
+        if pending is None:
+            return
+        loop, future = pending
+
+        def settle() -> None:
+            if future.done():
+                return
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+        loop.call_soon_threadsafe(settle)
+
     def set_sensor_ttl(self, ttl_seconds: int) -> None:
         """Set the sensor data stream TTL from the device configuration.
 
@@ -349,6 +473,12 @@ class MqttAwsBlueair:
     def _on_disconnect(self, client, userdata, flags, reason_code, properties):
         self._connected = False
         self._cancel_resubscribe_timer()
+        # Responses to in-flight commands are lost with the connection;
+        # fail them now so callers fall back without waiting out the timeout.
+        with self._pending_lock:
+            tokens = list(self._pending_commands)
+        for token in tokens:
+            self._settle_command(token, CommandRejectedError("MQTT disconnected"))
         if reason_code == 0 or self._stopping:
             _LOGGER.info("MQTT disconnected cleanly")
         else:
@@ -371,13 +501,16 @@ class MqttAwsBlueair:
     def _on_message(self, client, userdata, msg):
         topic = msg.topic
         try:
-            payload = json.loads(msg.payload.decode())
-        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            # Straight from bytes; no intermediate str.
+            payload = codec.loads(msg.payload)
+        except ValueError as e:
             _LOGGER.warning(f"Failed to parse MQTT message on {topic}: {e}")
             return
 
         if topic.startswith("d/") and "/s/5s" in topic:
             self._handle_sensor_data(topic, payload)
+        elif topic.endswith(("/shadow/update/accepted", "/shadow/update/rejected")):
+            self._handle_update_response(topic, payload)
         elif "$aws/things" in topic:
             self._handle_state_change(topic, payload)
         elif topic.endswith("/event"):
@@ -426,12 +559,35 @@ class MqttAwsBlueair:
         )
 
         _LOGGER.debug(f"State change for {device_id}: {state}")
+        if self.command_tracker is not None and isinstance(state, dict):
+            self.command_tracker.observe_state(device_id, state)
         if self.on_state_change:
             try:
                 self.on_state_change(device_id, state)
             except Exception:
                 _LOGGER.exception(f"Error in on_state_change callback for {device_id}")
 
+    def _handle_update_response(self, topic: str, payload: Any) -> None:
+        """Match a shadow update/accepted or update/rejected to its command.
+
+        Responses to updates made by other clients carry no token of
+        ours and are ignored.
+        """
+        if not isinstance(payload, dict):
+            return
+        token = payload.get("clientToken")
+        if not isinstance(token, str):
+            return
+        if topic.endswith("/rejected"):
+            code = payload.get("code")
+            _LOGGER.debug(f"Desired state rejected on {topic}: {payload}")
+            self._settle_command(token, CommandRejectedError(
+                f"shadow update rejected: {payload.get('message', 'unknown error')}",
+                code=code if isinstance(code, int) else None,
+            ))
+        else:
+            self._settle_command(token, None)
+
     def _handle_event(self, topic: str, payload: Any) -> None:
         """Parse connectivity event from c/<userId>/s/event.
 
@@ -0,0 +1,114 @@
+"""Keeping the event loop responsive while large payloads are parsed.
+
+Decoding an ``/r/initial`` response for a large fleet, and building the
+intermediate representation of every device in it, is CPU work that
+runs on the event loop by default.  While it runs, MQTT callbacks and
+device commands wait.  :class:`OffloadOptions` moves that work to a
+thread pool once it is large enough to matter, and the results are
+applied back on the loop:
+
+* ``HttpAwsBlueair(offload=...)`` decodes response bodies of at least
+  ``min_response_bytes`` in the pool;
+* ``DeviceAws.refresh_many(..., offload=...)`` parses the payloads of
+  ``min_devices`` or more devices in one pool job.
+
+:class:`LoopLagMonitor` measures how late the loop wakes up, so the
+effect can be checked before and after enabling offloading.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import Callable
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any
+
+from .command_tracker import LatencyHistogram
+from .util_http import ApiResponse
+
+_LOGGER = getLogger(__name__)
+
+# Loop lag buckets, in seconds.
+DEFAULT_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+@dataclass(frozen=True)
+class OffloadOptions:
+    """When decoding and parsing move off the event loop.
+
+    ``executor`` defaults to the loop's default thread pool.
+    """
+    min_response_bytes: int = 256 * 1024
+    min_devices: int = 20
+    executor: Executor | None = None
+
+    async def run[T](self, func: Callable[..., T], *args: Any) -> T:
+        """Call ``func(*args)`` in the pool and return its result."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def decode(self, response: ApiResponse) -> None:
+        """Decode a large JSON body in the pool so later reads are free."""
+        if len(response.raw) >= self.min_response_bytes:
+            _LOGGER.debug("decoding %d bytes off the event loop", len(response.raw))
+            await self.run(response.decode)
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop runs a callback scheduled on time.
+
+    Every ``interval`` seconds the monitor measures by how much its own
+    wake-up was delayed; that delay is what any other callback (an MQTT
+    message, a device command) would have waited too.
+    """
+
+    def __init__(
+        self, interval: float = 0.25, bounds: tuple[float, ...] = DEFAULT_LAG_BUCKETS
+    ) -> None:
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        self.interval = interval
+        self.bounds = bounds
+        self.histogram = LatencyHistogram(bounds=bounds)
+        self.max_lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    def reset(self) -> LatencyHistogram:
+        """Start a new measurement period and return the previous one."""
+        previous = self.histogram
+        self.histogram = LatencyHistogram(bounds=self.bounds)
+        self.max_lag = 0.0
+        return previous
+
+    async def __aenter__(self) -> LoopLagMonitor:
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.histogram.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
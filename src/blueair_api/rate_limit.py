@@ -0,0 +1,223 @@
+"""Client-side request pacing for the AWS backend.
+
+Both hosts the AWS client talks to (Gigya and the BlueCloud
+``execute-api`` gateway) throttle with HTTP 429.  Without pacing, a
+large fleet refreshing at once bursts past the limit, and every
+throttled request used to be treated as a dead session.
+
+:class:`RateLimiter` keeps one :class:`TokenBucket` per host.  Each
+request takes a token before it is sent.  A 429 empties the bucket,
+blocks the host until ``Retry-After`` has passed and halves the refill
+rate (down to ``min_rate``); every successful request then nudges the
+rate back up towards the configured one.  Under sustained throttling
+the client settles just below the server's limit instead of
+oscillating between bursts and lock-outs.
+
+Tokens go to waiting requests by :class:`~.scheduler.Priority`: a
+device command waits for the next token, not behind every poll that
+was queued before it.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from logging import getLogger
+from urllib.parse import urlsplit
+
+from .errors import RateError
+from .scheduler import Priority, current_priority
+
+_LOGGER = getLogger(__name__)
+
+# Requests per second and burst size for each host.  Generous enough
+# that a handful of devices never wait, tight enough that a fleet
+# refresh is spread out instead of fired all at once.
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+# Floor for the adaptive rate after repeated throttling.
+DEFAULT_MIN_RATE = 0.2
+# Multiplicative decrease applied on every 429.
+DEFAULT_DECREASE_FACTOR = 0.5
+# Fraction of the configured rate won back per successful request.
+DEFAULT_RECOVERY_FRACTION = 0.05
+# Pause applied when a 429 carries no usable Retry-After header.
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the delay a ``Retry-After`` header asks for, in seconds.
+
+    Accepts both the delta-seconds and the HTTP-date form; returns
+    ``None`` if the header is absent or unparseable.
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
+class TokenBucket:
+    """Token bucket with an adaptive (AIMD) refill rate.
+
+    Waiters of one priority are served in order; a waiter leaves the
+    next token to any more urgent one.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        *,
+        min_rate: float = DEFAULT_MIN_RATE,
+        decrease_factor: float = DEFAULT_DECREASE_FACTOR,
+        recovery_fraction: float = DEFAULT_RECOVERY_FRACTION,
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.decrease_factor = decrease_factor
+        self.recovery_fraction = recovery_fraction
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self.throttle_count = 0
+        self._updated = time.monotonic()
+        # Waiters queue on their lane's lock, so each lane is served in
+        # order; only a lane's head waits for tokens.
+        self._locks = {priority: asyncio.Lock() for priority in Priority}
+        self._waiting = dict.fromkeys(Priority, 0)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(float(self.burst), self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def _more_urgent_waiting(self, priority: Priority) -> bool:
+        return any(self._waiting[other] for other in Priority if other < priority)
+
+    async def acquire(self, priority: Priority = Priority.BACKGROUND) -> None:
+        """Wait until a request may be sent and take a token for it."""
+        self._waiting[priority] += 1
+        try:
+            async with self._locks[priority]:
+                while True:
+                    now = time.monotonic()
+                    if now < self.blocked_until:
+                        await asyncio.sleep(self.blocked_until - now)
+                        continue
+                    self._refill(now)
+                    if self._more_urgent_waiting(priority):
+                        # Let it have the next token; check again after.
+                        await asyncio.sleep(max(1.0, 2 - self.tokens) / self.rate)
+                        continue
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self._waiting[priority] -= 1
+
+    def throttled(self, retry_after: float | None = None) -> None:
+        """Record a 429: pause for ``retry_after`` and slow down."""
+        now = time.monotonic()
+        self.throttle_count += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.tokens = 0.0
+        self._updated = now
+        delay = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+        self.blocked_until = max(self.blocked_until, now + delay)
+
+    def succeeded(self) -> None:
+        """Record a request the server accepted; win back some rate."""
+        if self.rate < self.max_rate:
+            self.rate = min(
+                self.max_rate, self.rate + self.max_rate * self.recovery_fraction
+            )
+
+
+class RateLimiter:
+    """Per-host token buckets shared by every request of a client.
+
+    Pass the same instance to several clients to pace them together,
+    e.g. all accounts polled from one IP address.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        *,
+        min_rate: float = DEFAULT_MIN_RATE,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.buckets: dict[str, TokenBucket] = {}
+
+    def bucket(self, host: str) -> TokenBucket:
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, min_rate=self.min_rate)
+            self.buckets[host] = bucket
+        return bucket
+
+    async def acquire(self, host: str, priority: Priority = Priority.BACKGROUND) -> None:
+        await self.bucket(host).acquire(priority)
+
+    def throttled(self, host: str, retry_after: float | None = None) -> None:
+        bucket = self.bucket(host)
+        bucket.throttled(retry_after)
+        _LOGGER.warning(
+            "%s is throttling requests; pausing %.1fs and pacing at %.2f req/s",
+            host,
+            retry_after if retry_after is not None else DEFAULT_RETRY_AFTER,
+            bucket.rate,
+        )
+
+    def succeeded(self, host: str) -> None:
+        self.bucket(host).succeeded()
+
+
+def request_host(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+def request_with_rate_limit(func):
+    """Pace requests through ``self.rate_limiter``, keyed by URL host.
+
+    Must wrap ``request_with_errors`` so it sees the ``RateError`` a
+    429 is classified as.  Tokens are taken in the current
+    :func:`~.scheduler.request_priority` lane.
+    """
+    @functools.wraps(func)
+    async def request_with_rate_limit_wrapper(*args, **kwargs):
+        self = args[0]
+        host = request_host(kwargs["url"])
+        await self.rate_limiter.acquire(host, current_priority())
+        try:
+            response = await func(*args, **kwargs)
+        except RateError as e:
+            if e.host is None:
+                e.host = host
+            self.rate_limiter.throttled(host, e.retry_after)
+            raise
+        self.rate_limiter.succeeded(host)
+        return response
+
+    return request_with_rate_limit_wrapper
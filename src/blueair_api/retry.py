@@ -0,0 +1,122 @@
+"""Retry policy for transient request failures.
+
+Both HTTP clients wrap their request helpers in
+:func:`request_with_retry`, which re-sends a request that failed with a
+transient error (a 5xx, a 429 or a dropped connection) after an
+exponentially growing, jittered delay.  The policy is bounded in both
+attempts and per-attempt delay so a cloud blip adds at most a few
+seconds to a poll instead of failing it.
+
+Requests that change device state are marked non-idempotent.  Those are
+only re-sent when the failed attempt provably never reached the server
+(the connection could not be opened, or the server throttled it).
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from logging import getLogger
+
+from aiohttp import ClientConnectionError, ClientConnectorError
+
+from .deadline import remaining
+from .errors import DeadlineExceededError, RateError, ServerError
+
+_LOGGER = getLogger(__name__)
+
+
+def _default_retry_on() -> tuple[type[BaseException], ...]:
+    return (ServerError, RateError, ClientConnectionError, asyncio.TimeoutError)
+
+
+def _default_retry_non_idempotent_on() -> tuple[type[BaseException], ...]:
+    return (RateError, ClientConnectorError)
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently to re-send a failed request.
+
+    ``max_attempts`` counts the first attempt, so ``1`` disables
+    retries.  The delay before retry ``n`` is ``base_delay * 2**(n-1)``
+    capped at ``max_delay``; ``jitter`` is the fraction of that delay
+    that is randomised (``1.0`` is "full jitter") so a fleet of clients
+    does not retry in lock-step.  A 429 waits for its ``Retry-After``
+    instead, and is not retried at all if that is longer than
+    ``max_delay``.
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    jitter: float = 1.0
+    retry_on: tuple[type[BaseException], ...] = field(default_factory=_default_retry_on)
+    # Errors after which a non-idempotent request cannot have been applied.
+    retry_non_idempotent_on: tuple[type[BaseException], ...] = field(
+        default_factory=_default_retry_non_idempotent_on
+    )
+    rng: Callable[[], float] = field(default=random.random, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {self.max_attempts}")
+        if not 0.0 <= self.jitter <= 1.0:
+            raise ValueError(f"jitter must be between 0 and 1, got {self.jitter}")
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before re-sending after failed attempt number ``attempt``."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (1.0 - self.jitter * self.rng())
+
+    def retry_delay(
+        self, error: BaseException, attempt: int, idempotent: bool = True
+    ) -> float | None:
+        """Seconds to wait before retrying ``error``, or ``None`` to give up."""
+        if attempt >= self.max_attempts or isinstance(error, DeadlineExceededError):
+            return None
+        retryable = self.retry_on if idempotent else self.retry_non_idempotent_on
+        if not isinstance(error, retryable):
+            return None
+        if isinstance(error, RateError) and error.retry_after is not None:
+            if error.retry_after > self.max_delay:
+                return None
+            return error.retry_after
+        return self.backoff(attempt)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+def request_with_retry(func):
+    """Re-send the request per ``self.retry_policy``.
+
+    Reads the ``url`` and optional ``idempotent`` keyword arguments of
+    the wrapped request helper; ``idempotent`` defaults to ``True``.
+    """
+    @functools.wraps(func)
+    async def request_with_retry_wrapper(*args, **kwargs):
+        self = args[0]
+        policy: RetryPolicy = self.retry_policy
+        idempotent = kwargs.get("idempotent", True)
+        attempt = 1
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = policy.retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    raise
+                left = remaining()
+                if left is not None and delay >= left:
+                    _LOGGER.debug("not retrying %s: deadline too close", kwargs.get("url"))
+                    raise
+                _LOGGER.debug(
+                    "attempt %d of %s failed (%r); retrying in %.2fs",
+                    attempt, kwargs.get("url"), e, delay,
+                )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    return request_with_retry_wrapper
@@ -0,0 +1,164 @@
+"""Priority lanes for requests sharing one client.
+
+A fleet poll keeps many ``device_info`` / ``device_sensors`` requests in
+flight on the shared session; without scheduling, a user command issued
+meanwhile queues behind all of them.  :class:`RequestScheduler` caps the
+requests in flight overall and per :class:`Priority` lane.  Whenever a
+slot frees up, waiting interactive requests get it before background
+ones, and the background lane's own cap keeps some slots free for
+commands even while a poll wave saturates it.
+
+The lane a request runs in is taken from a context variable, so it
+carries through retries and any login the request triggers::
+
+    with request_priority(Priority.INTERACTIVE):
+        await api.device_info(name, uuid)
+
+``HttpAwsBlueair.set_device_info`` always runs interactive; everything
+else defaults to the background lane.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import enum
+import functools
+from collections import deque
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from logging import getLogger
+
+_LOGGER = getLogger(__name__)
+
+
+class Priority(enum.IntEnum):
+    """Request lanes, most urgent first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# Requests in flight across all lanes; matches the default per-host
+# connection limit of ConnectionOptions.
+DEFAULT_TOTAL_LIMIT = 10
+DEFAULT_LANE_LIMITS: Mapping[Priority, int] = {
+    Priority.INTERACTIVE: 10,
+    # Leaves a few slots for commands during a poll wave.
+    Priority.BACKGROUND: 7,
+}
+
+_current_priority: ContextVar[Priority] = ContextVar(
+    "blueair_request_priority", default=Priority.BACKGROUND
+)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+@contextlib.contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Run requests made inside the block in the ``priority`` lane."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+@dataclass
+class _Lane:
+    limit: int
+    active: int = 0
+    waiters: deque[asyncio.Future[None]] = field(default_factory=deque)
+
+
+class RequestScheduler:
+    """Grants request slots by priority within overall and per-lane caps."""
+
+    def __init__(
+        self,
+        total_limit: int = DEFAULT_TOTAL_LIMIT,
+        lane_limits: Mapping[Priority, int] | None = None,
+    ) -> None:
+        limits = {**DEFAULT_LANE_LIMITS, **(lane_limits or {})}
+        if total_limit < 1 or any(limit < 1 for limit in limits.values()):
+            raise ValueError("scheduler limits must be positive")
+        self.total_limit = total_limit
+        self.lanes = {priority: _Lane(limits[priority]) for priority in Priority}
+
+    @property
+    def active(self) -> int:
+        return sum(lane.active for lane in self.lanes.values())
+
+    def waiting(self, priority: Priority) -> int:
+        return len(self.lanes[priority].waiters)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: Priority | None = None) -> AsyncIterator[None]:
+        """Hold a slot in ``priority``'s lane (the current one by default)."""
+        if priority is None:
+            priority = current_priority()
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def _can_start(self, priority: Priority) -> bool:
+        lane = self.lanes[priority]
+        return self.active < self.total_limit and lane.active < lane.limit
+
+    async def _acquire(self, priority: Priority) -> None:
+        lane = self.lanes[priority]
+        # Waiters are woken as soon as a slot frees up, so a free slot
+        # here is never one a more urgent request is waiting for.
+        if not lane.waiters and self._can_start(priority):
+            lane.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled; hand the slot on.
+                self._release(priority)
+            else:
+                lane.waiters.remove(waiter)
+            raise
+
+    def _release(self, priority: Priority) -> None:
+        self.lanes[priority].active -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        # Most urgent lane first; a lane held back only by its own cap
+        # leaves the remaining slots to the next one.
+        for priority in Priority:
+            lane = self.lanes[priority]
+            while lane.waiters and self._can_start(priority):
+                waiter = lane.waiters.popleft()
+                if waiter.done():
+                    continue
+                lane.active += 1
+                waiter.set_result(None)
+
+
+def request_with_scheduler(func):
+    """Run the request in a ``self.scheduler`` slot of the current lane.
+
+    Sits inside ``request_with_rate_limit`` so no slot is held while
+    waiting for a rate-limit token or a retry backoff.  The rate
+    limiter hands out tokens by the same lane, so an interactive request
+    does not wait for a token behind queued background ones either.
+    """
+    @functools.wraps(func)
+    async def request_with_scheduler_wrapper(*args, **kwargs):
+        self = args[0]
+        priority = current_priority()
+        async with self.scheduler.slot(priority):
+            _LOGGER.debug("running %s request", priority.name.lower())
+            return await func(*args, **kwargs)
+
+    return request_with_scheduler_wrapper
@@ -0,0 +1,132 @@
+"""Stale-while-revalidate cache for device reads.
+
+``DeviceAws.refresh`` makes two round-trips (``/r/initial`` and
+telemetry) every time it is called, even when a result from a few
+seconds earlier would do.  :class:`StateCache` keeps the last result of
+each read and answers from it:
+
+* an entry younger than ``fresh_ttl`` is returned as is;
+* an entry younger than ``stale_ttl`` is returned at once and refetched
+  in the background;
+* only a miss (no entry, or one older than ``stale_ttl``) waits for the
+  network.
+
+Concurrent reads of the same key share a single fetch.  Keys are tuples
+whose first item is the device uuid, so :meth:`StateCache.invalidate`
+can drop everything known about a device once a command has changed it.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any
+
+_LOGGER = getLogger(__name__)
+
+DEFAULT_FRESH_TTL = 10.0
+DEFAULT_STALE_TTL = 120.0
+
+type CacheKey = tuple[str, *tuple[Hashable, ...]]
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fetched_at: float
+
+
+class StateCache:
+    """Serves device reads from memory, refetching them in the background."""
+
+    def __init__(
+        self,
+        fresh_ttl: float = DEFAULT_FRESH_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 <= fresh_ttl <= stale_ttl:
+            raise ValueError("TTLs must satisfy 0 <= fresh_ttl <= stale_ttl")
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: dict[CacheKey, _Entry] = {}
+        self._fetches: dict[CacheKey, asyncio.Task] = {}
+        # Bumped by invalidate(); a fetch started under an older
+        # generation may hold pre-command state and is not stored.
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get(self, key: CacheKey, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key``, calling ``fetch`` as needed."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._clock() - entry.fetched_at
+            if age < self.fresh_ttl:
+                self.hits += 1
+                return entry.value
+            if age < self.stale_ttl:
+                self.stale_hits += 1
+                if key not in self._fetches:
+                    _LOGGER.debug("%s is %.1fs old; revalidating", key, age)
+                    # A fresh context: the revalidation runs at background
+                    # priority and outside the caller's deadline.
+                    self._start(key, fetch, contextvars.Context())
+                return entry.value
+            del self._entries[key]
+        self.misses += 1
+        task = self._fetches.get(key)
+        if task is None:
+            task = self._start(key, fetch, None)
+        # Shielded so one caller giving up does not cancel the others.
+        return await asyncio.shield(task)
+
+    def invalidate(self, device_uuid: str) -> None:
+        """Forget every entry for ``device_uuid``, including fetches in flight."""
+        self._generations[device_uuid] = self._generations.get(device_uuid, 0) + 1
+        for key in [key for key in self._entries if key[0] == device_uuid]:
+            del self._entries[key]
+        for key in [key for key in self._fetches if key[0] == device_uuid]:
+            # Callers already waiting still get the result; new ones refetch.
+            del self._fetches[key]
+
+    def clear(self) -> None:
+        """Drop all entries and cancel fetches in flight."""
+        for task in self._fetches.values():
+            task.cancel()
+        self._fetches.clear()
+        self._entries.clear()
+
+    def _start(
+        self,
+        key: CacheKey,
+        fetch: Callable[[], Awaitable[Any]],
+        context: contextvars.Context | None,
+    ) -> asyncio.Task:
+        generation = self._generations.get(key[0], 0)
+        task = asyncio.create_task(self._fetch(key, fetch, generation), context=context)
+        self._fetches[key] = task
+        task.add_done_callback(functools.partial(self._fetch_done, key))
+        return task
+
+    async def _fetch(
+        self, key: CacheKey, fetch: Callable[[], Awaitable[Any]], generation: int
+    ) -> Any:
+        value = await fetch()
+        if self._generations.get(key[0], 0) == generation:
+            self._entries[key] = _Entry(value, self._clock())
+        return value
+
+    def _fetch_done(self, key: CacheKey, task: asyncio.Task) -> None:
+        if self._fetches.get(key) is task:
+            del self._fetches[key]
+        if not task.cancelled() and (error := task.exception()) is not None:
+            # Waiters see the error themselves; a failed revalidation
+            # keeps serving the stale entry until it expires.
+            _LOGGER.debug("fetching %s failed: %r", key, error)
@@ -0,0 +1,108 @@
+"""Per-device cache for ``/r/telemetry/5m/historical`` responses.
+
+The telemetry endpoint returns fixed 5-minute buckets, and every poll
+used to download the full window (ten hours, ~120 buckets per device)
+only to read the newest one.  :class:`TelemetryHistory` keeps the
+buckets already seen, so ``HttpAwsBlueair.device_sensors`` only asks for
+the buckets since the last one it saw (plus a small overlap, because the
+newest bucket may still be filling up) and merges them in.
+
+:meth:`TelemetryHistory.to_response` rebuilds the endpoint's raw shape
+so :class:`~blueair_api.intermediate_representation_aws.SensorHistory`
+and other consumers see exactly what a full fetch would have returned.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from logging import getLogger
+from typing import Any
+
+_LOGGER = getLogger(__name__)
+
+# Buckets re-requested before the newest one already cached.  The
+# newest bucket is usually still being aggregated when it is first
+# returned, and late uploads can fill in the one before it.
+DEFAULT_TELEMETRY_OVERLAP = 15 * 60
+
+
+class TelemetryHistory:
+    """Rolling telemetry window for one device."""
+
+    def __init__(self) -> None:
+        self.sensors: list[str] = []
+        # timestamp -> (raw timestamp as sent by the server, sensor -> raw value)
+        self.points: dict[int, tuple[Any, dict[str, Any]]] = {}
+        self.window_start: int | None = None
+        self.fetched_to: int | None = None
+        self.meta: dict[str, Any] = {}
+        self.requested: set[str] = set()
+
+    @property
+    def last_timestamp(self) -> int | None:
+        return max(self.points) if self.points else None
+
+    def covers(self, start: int, sensors: Iterable[str]) -> bool:
+        """Whether the cache holds every bucket of ``sensors`` since ``start``."""
+        return (
+            self.window_start is not None
+            and self.window_start <= start
+            and set(sensors) <= self.requested
+        )
+
+    def fetch_from(self, start: int, overlap: int = DEFAULT_TELEMETRY_OVERLAP) -> int:
+        """The ``from`` parameter for an incremental fetch of the window since ``start``."""
+        last = self.last_timestamp
+        since = last if last is not None else self.fetched_to
+        if since is None:
+            return start
+        return max(start, since - overlap)
+
+    def merge(
+        self, response: Any, start: int, end: int, requested: Iterable[str] = ()
+    ) -> bool:
+        """Merge a telemetry response for ``requested`` sensors up to ``end``.
+
+        Buckets older than ``start`` are dropped.  Returns ``False``
+        (leaving the cache untouched) if the response isn't in the
+        expected shape.
+        """
+        try:
+            entry = response[0]
+            sensors = list(entry["sensors"])
+            datapoints = entry["datapoints"]
+            parsed = [(int(datapoint[0]), datapoint) for datapoint in datapoints]
+        except (LookupError, TypeError, ValueError):
+            _LOGGER.debug("unexpected telemetry response shape; not caching it")
+            return False
+        for sensor in sensors:
+            if sensor not in self.sensors:
+                self.sensors.append(sensor)
+        for timestamp, datapoint in parsed:
+            _, values = self.points.setdefault(timestamp, (datapoint[0], {}))
+            for idx, sensor in enumerate(sensors):
+                if idx + 1 < len(datapoint):
+                    values[sensor] = datapoint[idx + 1]
+        for timestamp in [t for t in self.points if t < start]:
+            del self.points[timestamp]
+        self.meta = {
+            key: value for key, value in entry.items()
+            if key not in ("sensors", "datapoints", "start", "end")
+        }
+        self.requested.update(requested)
+        self.window_start = start
+        self.fetched_to = end
+        return True
+
+    def to_response(self) -> list[dict[str, Any]]:
+        """The cached window in the endpoint's raw response shape."""
+        datapoints = [
+            [raw_timestamp, *(values.get(sensor) for sensor in self.sensors)]
+            for _, (raw_timestamp, values) in sorted(self.points.items())
+        ]
+        return [{
+            "datapoints": datapoints,
+            "sensors": list(self.sensors),
+            "start": str(self.window_start),
+            "end": str(self.fetched_to),
+            **self.meta,
+        }]
@@ -0,0 +1,150 @@
+"""Streaming export of historical telemetry.
+
+:func:`iter_telemetry` walks a long time range in fixed windows, fetches
+each window for all requested devices concurrently (bounded by
+``concurrency``) and yields one :class:`TelemetryRecord` per device and
+5-minute bucket in time order.  Only the window being yielded and the
+one being fetched ahead are held in memory, however long the range.
+
+:func:`write_ndjson` and :func:`write_csv` drain such a stream into a
+text file as it arrives.
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Any, TextIO
+
+from . import intermediate_representation_aws as ir
+from .http_aws_blueair import DEFAULT_TELEMETRY_SENSORS, HttpAwsBlueair
+
+_LOGGER = getLogger(__name__)
+
+DEFAULT_EXPORT_WINDOW = timedelta(hours=12)
+DEFAULT_EXPORT_CONCURRENCY = 4
+
+
+@dataclass(slots=True)
+class TelemetryRecord:
+    """One 5-minute telemetry bucket of one device."""
+    device_uuid: str
+    timestamp: int
+    values: dict[str, int]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"device_uuid": self.device_uuid, "timestamp": self.timestamp, **self.values}
+
+
+def _windows(start: int, end: int, window: int) -> Iterable[tuple[int, int]]:
+    while start < end:
+        window_end = min(start + window, end)
+        yield start, window_end
+        start = window_end
+
+
+def _timestamp(value: datetime | int | float) -> int:
+    return int(value.timestamp()) if isinstance(value, datetime) else int(value)
+
+
+async def iter_telemetry(
+    api: HttpAwsBlueair,
+    device_uuids: Iterable[str],
+    start: datetime | int | float,
+    end: datetime | int | float,
+    *,
+    window: timedelta = DEFAULT_EXPORT_WINDOW,
+    concurrency: int = DEFAULT_EXPORT_CONCURRENCY,
+    sensors: Sequence[str] | None = None,
+) -> AsyncIterator[TelemetryRecord]:
+    """Yield telemetry for ``device_uuids`` between ``start`` and ``end``.
+
+    ``start`` and ``end`` are datetimes or unix timestamps; each bucket
+    is yielded once, from the half-open window ``[from, to)`` it falls
+    in.  Records are ordered by timestamp, then by device in the order
+    given.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be positive, got {concurrency}")
+    window_seconds = int(window.total_seconds())
+    if window_seconds < 1:
+        raise ValueError(f"window must be at least one second, got {window}")
+    uuids = list(dict.fromkeys(device_uuids))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_device(uuid: str, window_start: int, window_end: int) -> list[TelemetryRecord]:
+        async with semaphore:
+            raw = await api.device_telemetry(uuid, window_start, window_end, sensors)
+        try:
+            history = ir.SensorHistory(raw)
+        except (LookupError, TypeError, ValueError):
+            _LOGGER.warning(
+                "iter_telemetry: unreadable telemetry for %s in [%s, %s)",
+                uuid, window_start, window_end,
+            )
+            return []
+        return [
+            TelemetryRecord(uuid, int(record.timestamp), record.values)
+            for record in history
+            if record.timestamp is not None and window_start <= record.timestamp < window_end
+        ]
+
+    async def fetch_window(window_start: int, window_end: int) -> list[TelemetryRecord]:
+        per_device = await asyncio.gather(
+            *(fetch_device(uuid, window_start, window_end) for uuid in uuids)
+        )
+        order = {uuid: index for index, uuid in enumerate(uuids)}
+        records = [record for records in per_device for record in records]
+        records.sort(key=lambda record: (record.timestamp, order[record.device_uuid]))
+        return records
+
+    in_flight: list[asyncio.Task[list[TelemetryRecord]]] = []
+    try:
+        for window_start, window_end in _windows(_timestamp(start), _timestamp(end), window_seconds):
+            # Fetch this window while the consumer drains the previous one.
+            in_flight.append(asyncio.create_task(fetch_window(window_start, window_end)))
+            if len(in_flight) > 1:
+                for record in await in_flight.pop(0):
+                    yield record
+        while in_flight:
+            for record in await in_flight.pop(0):
+                yield record
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def write_ndjson(records: AsyncIterable[TelemetryRecord], fp: TextIO) -> int:
+    """Write one JSON object per line; returns the number of records."""
+    count = 0
+    async for record in records:
+        fp.write(json.dumps(record.to_dict(), separators=(",", ":")))
+        fp.write("\n")
+        count += 1
+    return count
+
+
+async def write_csv(
+    records: AsyncIterable[TelemetryRecord],
+    fp: TextIO,
+    sensors: Sequence[str] = DEFAULT_TELEMETRY_SENSORS,
+) -> int:
+    """Write a CSV with a ``device_uuid,timestamp,<sensors...>`` header.
+
+    Missing values are left empty; returns the number of records.
+    """
+    writer = csv.writer(fp)
+    writer.writerow(["device_uuid", "timestamp", *sensors])
+    count = 0
+    async for record in records:
+        writer.writerow([
+            record.device_uuid,
+            record.timestamp,
+            *(record.values.get(sensor, "") for sensor in sensors),
+        ])
+        count += 1
+    return count
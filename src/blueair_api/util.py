@@ -1,4 +1,5 @@
 from typing import Any
+import json
 import logging
 
 from .const import SENSITIVE_FIELD_NAMES
@@ -27,6 +28,46 @@ def clean_dictionary_for_logging(dictionary: dict[str, Any]) -> dict[str, Any]:
     return mutable_dictionary
 
 
+class RedactedForLogging:
+    """Log argument that redacts a mapping only if the record is emitted.
+
+    Pass it as a ``%s`` argument instead of calling
+    :func:`clean_dictionary_for_logging` up front, so the recursive copy
+    is skipped entirely when the logger is not enabled for the level.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        value = self.value
+        if isinstance(value, dict):
+            value = clean_dictionary_for_logging(value)
+        elif isinstance(value, list):
+            value = [
+                clean_dictionary_for_logging(item) if isinstance(item, dict) else item
+                for item in value
+            ]
+        return str(value)
+
+    __repr__ = __str__
+
+
+class JsonForLogging:
+    """Log argument that pretty-prints JSON only if the record is emitted."""
+    __slots__ = ("value", "indent")
+
+    def __init__(self, value: Any, indent: int | None = 2):
+        self.value = value
+        self.indent = indent
+
+    def __str__(self) -> str:
+        return json.dumps(self.value, indent=self.indent)
+
+    __repr__ = __str__
+
+
 def safely_get_json_value(json, key, callable_to_cast=None):
     value = json
     for x in key.split("."):
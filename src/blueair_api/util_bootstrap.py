@@ -4,6 +4,7 @@ from aiohttp import ClientSession
 
 from .http_blueair import HttpBlueair
 from .http_aws_blueair import HttpAwsBlueair
+from .credential_store import CredentialStore
 from .device import Device
 from .device_aws import DeviceAws
 from typing import Optional
@@ -48,6 +49,7 @@ async def get_aws_devices(
     *,
     gigya_region: str | None = None,
     cloud_region: str | None = None,
+    credential_store: CredentialStore | None = None,
 ) -> tuple[HttpAwsBlueair, list[DeviceAws]]:
     api = HttpAwsBlueair(
         username=username,
@@ -56,6 +58,7 @@ async def get_aws_devices(
         client_session=client_session,
         gigya_region=gigya_region,
         cloud_region=cloud_region,
+        credential_store=credential_store,
     )
     api_devices = await api.devices()
     devices = []
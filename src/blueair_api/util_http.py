@@ -1,40 +1,143 @@
 import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
 
-from .util import clean_dictionary_for_logging
+from aiohttp import ClientResponse, ClientSession, TCPConnector
+
+from . import codec
+from .util import RedactedForLogging
 
 _LOGGER = logging.getLogger(__name__)
 
+_UNDECODED = object()
+
+
+@dataclass(slots=True)
+class ApiResponse:
+    """A fully read HTTP response whose body is decoded at most once.
+
+    The request helpers of both HTTP clients return this instead of the
+    aiohttp ``ClientResponse``: the body is read and the connection
+    released before the decorators run, and logging, error
+    classification and the caller all share the single decoded
+    ``json`` value.
+    """
+    status: int
+    headers: Mapping[str, str]
+    raw: bytes
+    encoding: str = "utf-8"
+    _json: Any = field(default=_UNDECODED, repr=False)
+    _json_error: ValueError | None = field(default=None, repr=False)
+
+    @classmethod
+    async def read(cls, response: ClientResponse) -> "ApiResponse":
+        """Read ``response`` to the end and release its connection."""
+        try:
+            raw = await response.read()
+        finally:
+            response.release()
+        return cls(
+            status=response.status,
+            headers=response.headers,
+            raw=raw,
+            encoding=response.charset or "utf-8",
+        )
+
+    @property
+    def text(self) -> str:
+        return self.raw.decode(self.encoding, errors="replace")
+
+    @property
+    def json(self) -> Any:
+        """The decoded JSON body; raises ``ValueError`` if it isn't JSON.
+
+        Decoding ignores the declared content type (Gigya answers with
+        ``text/javascript``) and is cached, including a failure.
+        """
+        self.decode()
+        if self._json_error is not None:
+            raise self._json_error
+        return self._json
+
+    def decode(self) -> None:
+        """Decode the body now, unless already done; see :attr:`json`."""
+        if self._json is _UNDECODED and self._json_error is None:
+            try:
+                if not self.raw.strip():
+                    raise ValueError("empty response body")
+                self._json = codec.loads(self.raw)
+            except ValueError as e:
+                self._json_error = e
+
+    @property
+    def is_json(self) -> bool:
+        try:
+            self.json
+        except ValueError:
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class ConnectionOptions:
+    """Connection pool settings for a client-owned ``ClientSession``.
+
+    Only used when the client creates its own session; a session passed
+    in by the caller is used as-is.  The defaults keep connections to
+    the few hosts the clients talk to alive between poll cycles and
+    cache their DNS answers, so a refresh doesn't pay a fresh DNS
+    lookup and TLS handshake each time.
+    """
+    limit: int = 100
+    limit_per_host: int = 10
+    ttl_dns_cache: int | None = 300
+    keepalive_timeout: float = 120.0
+    # Open connections to the region's hosts while the first login runs.
+    prewarm_on_login: bool = True
+    prewarm_timeout: float = 10.0
+
+    def create_session(self) -> ClientSession:
+        connector = TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.ttl_dns_cache,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return ClientSession(
+            connector=connector, raise_for_status=False, json_serialize=codec.dumps_text
+        )
+
 
 def request_with_logging(func):
     async def request_with_logging_wrapper(*args, **kwargs):
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            # Nothing below would be emitted; skip building the messages
+            # and the redacted copies entirely.
+            return await func(*args, **kwargs)
         url = kwargs["url"]
-        request_message = f"sending {url} request"
+        request_message = "sending %s request"
+        request_args: list[Any] = [url]
         headers = kwargs.get("headers")
         if headers is not None:
-            request_message = request_message + f"headers: {headers}"
+            request_message += " headers: %s"
+            request_args.append(headers)
         params = kwargs.get("params")
         if params is not None:
-            request_message = request_message + f"params: {params}"
+            request_message += " params: %s"
+            request_args.append(params)
         json_body = kwargs.get("json_body")
         if json_body is not None:
-            request_message = (
-                request_message
-                + f"sending {url} request with {clean_dictionary_for_logging(json_body)}"
-            )
-        _LOGGER.debug(request_message)
-        response = await func(*args, **kwargs)
-        _LOGGER.debug(
-            f"response headers:{clean_dictionary_for_logging(response.headers)}"
-        )
-        _LOGGER.debug(f"response status: {response.status}")
-        try:
-            response_json = await response.json(content_type=None)
-            _LOGGER.debug(
-                f"response json: {clean_dictionary_for_logging(response_json)}"
-            )
-        except Exception:
-            response_text = await response.text()
-            _LOGGER.debug(f"response raw: {response_text}")
+            request_message += " with %s"
+            request_args.append(RedactedForLogging(json_body))
+        _LOGGER.debug(request_message, *request_args)
+        response: ApiResponse = await func(*args, **kwargs)
+        _LOGGER.debug("response headers: %s", RedactedForLogging(dict(response.headers)))
+        _LOGGER.debug("response status: %s", response.status)
+        if response.is_json:
+            _LOGGER.debug("response json: %s", RedactedForLogging(response.json))
+        else:
+            _LOGGER.debug("response raw: %s", response.text)
         return response
 
     return request_with_logging_wrapper
@@ -0,0 +1,136 @@
+"""Tests for per-host circuit breaking."""
+from __future__ import annotations
+
+import json
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from blueair_api.circuit_breaker import CircuitBreaker, CircuitState
+from blueair_api.errors import CircuitOpenError, ClientRequestError, ServerError
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.retry import NO_RETRY
+
+HOST = "example.execute-api.us-east-2.amazonaws.com"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CircuitBreakerTest(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=self.clock)
+
+    def fail(self, times: int = 1, error: Exception | None = None) -> None:
+        for _ in range(times):
+            self.breaker.before_request(HOST)
+            self.breaker.failed(HOST, error or ServerError("boom", status=503))
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail(2)
+        self.breaker.before_request(HOST)
+        self.breaker.succeeded(HOST)
+        self.fail(2)
+        assert self.breaker.state(HOST) is CircuitState.CLOSED
+        self.fail()
+        assert self.breaker.state(HOST) is CircuitState.OPEN
+        with self.assertRaises(CircuitOpenError) as ctx:
+            self.breaker.before_request(HOST)
+        assert ctx.exception.host == HOST
+        assert ctx.exception.retry_after == 10
+
+    def test_half_open_admits_one_probe(self):
+        self.fail(3)
+        self.clock.now += 10
+        assert self.breaker.state(HOST) is CircuitState.HALF_OPEN
+        self.breaker.before_request(HOST)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(HOST)
+        self.breaker.succeeded(HOST)
+        assert self.breaker.state(HOST) is CircuitState.CLOSED
+
+    def test_failed_probe_reopens(self):
+        self.fail(3)
+        self.clock.now += 10
+        self.fail()
+        assert self.breaker.state(HOST) is CircuitState.OPEN
+        assert self.breaker.retry_after(HOST) == 10
+        assert self.breaker.circuits[HOST].times_opened == 2
+
+    def test_client_errors_do_not_trip(self):
+        self.fail(5, ClientRequestError("unknown device", status=404))
+        assert self.breaker.state(HOST) is CircuitState.CLOSED
+
+    def test_cancelled_probe_allows_another(self):
+        self.fail(3)
+        self.clock.now += 10
+        self.breaker.before_request(HOST)
+        self.breaker.cancelled(HOST)
+        self.breaker.before_request(HOST)
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            CircuitBreaker(failure_threshold=0)
+        with self.assertRaises(ValueError):
+            CircuitBreaker(reset_timeout=0)
+
+
+class _FakeClientResponse:
+    def __init__(self, status: int, body: Any):
+        self.status = status
+        self.headers: dict[str, str] = {}
+        self.charset = "utf-8"
+        self._raw = json.dumps(body).encode()
+
+    async def read(self) -> bytes:
+        return self._raw
+
+    def release(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FailingSession:
+    def __init__(self, status: int = 503):
+        self.status = status
+        self.calls = 0
+
+    def get(self, **kwargs):
+        self.calls += 1
+        return _FakeClientResponse(self.status, {"message": "unavailable"})
+
+
+class AwsClientCircuitTest(IsolatedAsyncioTestCase):
+
+    async def test_degraded_endpoint_fails_fast(self):
+        session = _FailingSession()
+        client = HttpAwsBlueair(
+            username="user@example.com",
+            password="hunter2",
+            client_session=session,  # type: ignore[arg-type]
+            retry_policy=NO_RETRY,
+            circuit_breaker=CircuitBreaker(failure_threshold=2),
+        )
+        client.access_token = "token"
+        client.user_id = "user-1"
+        assert client.endpoint_available()
+        for _ in range(2):
+            with self.assertRaises(ServerError):
+                await client.devices()
+        assert not client.endpoint_available()
+        with self.assertRaises(CircuitOpenError):
+            await client.devices()
+        assert session.calls == 2
+        rest_host = client.hosts[1]
+        assert client.circuit_states()[rest_host] is CircuitState.OPEN
@@ -0,0 +1,99 @@
+"""Tests for last-write-wins setter coalescing."""
+from __future__ import annotations
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+from blueair_api.coalesce import SetterCoalescer
+from blueair_api.device_aws import DeviceAws
+
+
+class Recorder:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.values: list = []
+        self.started: list = []
+        self.delay = delay
+        self.fail = fail
+
+    async def write(self, value):
+        self.started.append(value)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("write failed")
+        self.values.append(value)
+
+
+class SetterCoalescerTest(IsolatedAsyncioTestCase):
+
+    async def test_burst_sends_only_latest(self):
+        coalescer = SetterCoalescer(window=0.02)
+        recorder = Recorder()
+        await asyncio.gather(*(
+            coalescer.submit("brightness", value, recorder.write) for value in range(20)
+        ))
+        assert recorder.values == [19]
+        assert coalescer.sent == 1
+        assert coalescer.coalesced == 19
+        assert not coalescer.pending("brightness")
+
+    async def test_keys_are_independent(self):
+        coalescer = SetterCoalescer(window=0.0)
+        recorder = Recorder()
+        await asyncio.gather(
+            coalescer.submit(("a", "brightness"), 1, recorder.write),
+            coalescer.submit(("b", "brightness"), 2, recorder.write),
+        )
+        assert sorted(recorder.values) == [1, 2]
+
+    async def test_superseded_in_flight_write_is_cancelled(self):
+        coalescer = SetterCoalescer(window=0.0)
+        recorder = Recorder(delay=0.05)
+        first = asyncio.create_task(coalescer.submit("fanspeed", 1, recorder.write))
+        await asyncio.sleep(0.01)  # first write is now in flight
+        second = asyncio.create_task(coalescer.submit("fanspeed", 2, recorder.write))
+        await asyncio.gather(first, second)
+        assert recorder.started == [1, 2]
+        assert recorder.values == [2]
+
+    async def test_failure_reaches_every_superseded_caller(self):
+        coalescer = SetterCoalescer(window=0.01)
+        recorder = Recorder(fail=True)
+        results = await asyncio.gather(
+            coalescer.submit("heattemp", 200, recorder.write),
+            coalescer.submit("heattemp", 210, recorder.write),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert recorder.started == [210]
+
+    async def test_negative_window_rejected(self):
+        with self.assertRaises(ValueError):
+            SetterCoalescer(window=-1)
+
+
+class DeviceCoalescingTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.api = mock.AsyncMock()
+        self.device = DeviceAws(self.api, uuid="fake-uuid", name_api="fake-name-api")
+        self.published: list[int | None] = []
+        self.device.register_callback(lambda: self.published.append(self.device.brightness))
+
+    async def test_without_coalescer_every_write_is_sent(self):
+        for value in (10, 20, 30):
+            await self.device.set_brightness(value)
+        assert self.api.set_device_info.await_count == 3
+
+    async def test_slider_drag_sends_final_value_once(self):
+        self.device.setter_coalescer = SetterCoalescer(window=0.02)
+        await asyncio.gather(*(self.device.set_brightness(v) for v in (10, 20, 30, 40)))
+        self.api.set_device_info.assert_awaited_once_with("fake-uuid", "brightness", "v", 40)
+        assert self.device.brightness == 40
+        # The optimistic value was published before the write went out.
+        assert self.published[0] == 10
+
+    async def test_fan_speed_mapping_applies_to_coalesced_value(self):
+        self.device.hw = "hum2_l"
+        self.device.setter_coalescer = SetterCoalescer(window=0.0)
+        await self.device.set_fan_speed(2)
+        self.api.set_device_info.assert_awaited_once_with("fake-uuid", "fanspeed", "v", 37)
@@ -0,0 +1,68 @@
+"""Tests for the pluggable JSON codec."""
+from __future__ import annotations
+
+import importlib.util
+from unittest import TestCase, skipUnless
+
+from blueair_api import codec
+
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+HAS_MSGSPEC = importlib.util.find_spec("msgspec") is not None
+
+SAMPLE = {"state": {"desired": {"fanspeed": 37, "standby": False}}, "name": "Café", "t": 1.5}
+
+
+class CodecTestMixin:
+    name: str
+
+    def setUp(self):
+        self.previous = codec.get_codec().name
+        codec.use_codec(self.name)
+
+    def tearDown(self):
+        codec.use_codec(self.previous)
+
+    def test_round_trip(self):
+        encoded = codec.dumps(SAMPLE)
+        assert isinstance(encoded, bytes)
+        assert codec.loads(encoded) == SAMPLE
+        assert codec.loads(encoded.decode()) == SAMPLE
+        assert codec.dumps_text(SAMPLE) == encoded.decode()
+
+    def test_compact_output(self):
+        assert codec.dumps({"a": [1, 2]}) == b'{"a":[1,2]}'
+
+    def test_malformed_input_raises_value_error(self):
+        for data in (b"Success", b"{", b"\xff\xfe\x00"):
+            with self.assertRaises(ValueError):
+                codec.loads(data)
+
+
+class StdlibCodecTest(CodecTestMixin, TestCase):
+    name = "json"
+
+
+@skipUnless(HAS_ORJSON, "orjson not installed")
+class OrjsonCodecTest(CodecTestMixin, TestCase):
+    name = "orjson"
+
+
+@skipUnless(HAS_MSGSPEC, "msgspec not installed")
+class MsgspecCodecTest(CodecTestMixin, TestCase):
+    name = "msgspec"
+
+
+class CodecSelectionTest(TestCase):
+
+    def test_fastest_installed_codec_is_default(self):
+        assert codec.get_codec().name == next(iter(codec.available_codecs()))
+        assert "json" in codec.available_codecs()
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            codec.use_codec("yaml")
+
+    @skipUnless(not HAS_ORJSON, "orjson installed")
+    def test_missing_codec(self):
+        with self.assertRaises(ValueError):
+            codec.use_codec("orjson")
@@ -0,0 +1,112 @@
+"""Tests for confirming device commands from shadow echoes."""
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
+
+from blueair_api.command_tracker import CommandTracker, LatencyHistogram
+from blueair_api.device_aws import DeviceAws
+from blueair_api.mqtt_aws_blueair import MqttAwsBlueair
+
+DEVICE = "device-1"
+
+
+def shadow_document(reported: dict) -> mock.MagicMock:
+    msg = mock.MagicMock()
+    msg.topic = f"$aws/things/{DEVICE}/shadow/update/documents"
+    msg.payload = json.dumps({"current": {"state": {"reported": reported}}}).encode()
+    return msg
+
+
+class LatencyHistogramTest(TestCase):
+
+    def test_buckets_and_quantiles(self):
+        histogram = LatencyHistogram(bounds=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 0.6, 2.0):
+            histogram.observe(seconds)
+        assert histogram.counts == [1, 2, 1]
+        assert histogram.quantile(0.5) == 1.0
+        assert histogram.quantile(1.0) == float("inf")
+        assert histogram.mean == 0.7875
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        assert histogram.quantile(0.5) is None
+        assert histogram.mean is None
+        with self.assertRaises(ValueError):
+            histogram.quantile(2)
+
+
+class CommandTrackerTest(IsolatedAsyncioTestCase):
+
+    async def test_matching_report_confirms(self):
+        tracker = CommandTracker()
+        confirmation = tracker.expect(DEVICE, "fanspeed", 37)
+        tracker.observe_state(DEVICE, {"fanspeed": 11, "standby": False})
+        await asyncio.sleep(0)
+        assert not confirmation.done()
+        tracker.observe_state(DEVICE, {"fanspeed": 37})
+        assert await confirmation is True
+        assert confirmation.latency is not None
+        assert tracker.histograms["fanspeed"].count == 1
+        assert tracker.pending() == []
+
+    async def test_other_device_does_not_confirm(self):
+        tracker = CommandTracker(timeout=0.02)
+        confirmation = tracker.expect(DEVICE, "standby", True)
+        tracker.observe_state("device-2", {"standby": True})
+        assert await confirmation is False
+        assert tracker.histograms["standby"].timeouts == 1
+        assert tracker.histograms["standby"].count == 0
+
+    async def test_newer_command_supersedes(self):
+        tracker = CommandTracker()
+        first = tracker.expect(DEVICE, "brightness", 10)
+        second = tracker.expect(DEVICE, "brightness", 20)
+        assert await first is False
+        tracker.observe_state(DEVICE, {"brightness": 20})
+        assert await second is True
+
+    async def test_report_from_mqtt_thread(self):
+        tracker = CommandTracker()
+        confirmation = tracker.expect(DEVICE, "childlock", True)
+        client = MqttAwsBlueair("us", "name", "sig", "token", "user")
+        client.command_tracker = tracker
+        await asyncio.to_thread(
+            client._on_message, None, None, shadow_document({"childlock": True})
+        )
+        assert await confirmation is True
+
+    async def test_invalid_timeout(self):
+        with self.assertRaises(ValueError):
+            CommandTracker(timeout=0)
+
+
+class DeviceConfirmationTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.api = mock.AsyncMock()
+        self.tracker = CommandTracker(timeout=0.05)
+        self.device = DeviceAws(
+            self.api, uuid=DEVICE, hw="hum2_l", command_tracker=self.tracker
+        )
+
+    async def test_setter_returns_confirmation_of_wire_value(self):
+        confirmation = await self.device.set_fan_speed(2)
+        assert confirmation is not None
+        assert confirmation.value == 37
+        assert self.device.confirmation("fanspeed") is confirmation
+        self.tracker.observe_state(DEVICE, {"fanspeed": 37})
+        assert await confirmation is True
+
+    async def test_failed_write_is_not_tracked(self):
+        self.api.set_device_info.side_effect = ValueError("boom")
+        with self.assertRaises(ValueError):
+            await self.device.set_standby(True)
+        assert self.device.confirmation("standby") is None
+        assert self.tracker.pending() == []
+
+    async def test_without_tracker_setters_return_none(self):
+        device = DeviceAws(self.api, uuid=DEVICE)
+        assert await device.set_standby(True) is None
@@ -0,0 +1,243 @@
+"""Tests for credential stores and warm starts of the AWS clients."""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import os
+import stat
+import tempfile
+import threading
+import time
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
+
+from blueair_api.credential_store import (
+    FileCredentialStore,
+    MemoryCredentialStore,
+    StoredCredentials,
+    credential_key,
+)
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.mqtt_aws_blueair import MqttAwsBlueair
+
+
+def make_credentials(**overrides) -> StoredCredentials:
+    values = {
+        "session_token": "session",
+        "session_secret": "secret",
+        "access_token": "cached-token",
+        "access_token_expires_at": time.time() + 3600,
+        "user_id": "user-1",
+        "mqtt_auth_name": "authorizer",
+        "mqtt_auth_signature": "signature",
+        "mqtt_auth_token": "mqtt-token",
+        "mqtt_auth_expires_at": time.time() + 3600,
+    }
+    values.update(overrides)
+    return StoredCredentials(**values)
+
+
+def make_client(store) -> HttpAwsBlueair:
+    return HttpAwsBlueair(
+        username="User@Example.com",
+        password="hunter2",
+        client_session=object(),  # type: ignore[arg-type]
+        credential_store=store,
+    )
+
+
+class StoredCredentialsTest(TestCase):
+
+    def test_validity_honours_expiry_and_margin(self) -> None:
+        credentials = make_credentials(access_token_expires_at=time.time() + 60)
+        assert credentials.access_token_valid()
+        assert not credentials.access_token_valid(margin=120)
+        assert not make_credentials(access_token_expires_at=time.time() - 1).access_token_valid()
+        assert make_credentials(access_token_expires_at=None).access_token_valid()
+        assert not make_credentials(user_id=None).access_token_valid()
+
+    def test_mqtt_validity(self) -> None:
+        assert make_credentials().mqtt_credentials_valid()
+        assert not make_credentials(mqtt_auth_token=None).mqtt_credentials_valid()
+        assert not make_credentials(mqtt_auth_expires_at=time.time() - 1).mqtt_credentials_valid()
+
+    def test_dict_round_trip_ignores_unknown_keys(self) -> None:
+        credentials = make_credentials()
+        data = credentials.to_dict()
+        data["from_a_newer_version"] = True
+        assert StoredCredentials.from_dict(data) == credentials
+
+    def test_key_is_case_insensitive_on_username(self) -> None:
+        assert credential_key("A@B.com", "us", "eu") == credential_key("a@b.com", "us", "eu")
+        assert credential_key("a@b.com", "us", "eu") != credential_key("a@b.com", "us", "us")
+
+
+class MemoryCredentialStoreTest(TestCase):
+
+    def test_round_trip_returns_copies(self) -> None:
+        store = MemoryCredentialStore()
+        assert store.load("k") is None
+        credentials = make_credentials()
+        store.save("k", credentials)
+        loaded = store.load("k")
+        assert loaded == credentials
+        assert loaded is not credentials
+
+
+class FileCredentialStoreTest(IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "credentials.json")
+
+    def test_round_trip_and_permissions(self) -> None:
+        store = FileCredentialStore(self.path)
+        assert store.load("k") is None
+        credentials = make_credentials()
+        store.save("k", credentials)
+        store.save("other", make_credentials(user_id="user-2"))
+        assert FileCredentialStore(self.path).load("k") == credentials
+        assert FileCredentialStore(self.path).load("other").user_id == "user-2"
+        assert stat.S_IMODE(os.stat(self.path).st_mode) == 0o600
+
+    def test_corrupt_file_is_ignored(self) -> None:
+        with open(self.path, "w") as fp:
+            fp.write("{not json")
+        store = FileCredentialStore(self.path)
+        with self.assertLogs("blueair_api.credential_store", level="WARNING"):
+            assert store.load("k") is None
+
+    async def test_refresh_lock_is_exclusive_across_stores(self) -> None:
+        # Two stores on one path stand in for two worker processes.
+        first = FileCredentialStore(self.path)
+        second = FileCredentialStore(self.path)
+        order = []
+
+        async def hold():
+            async with first.refresh_lock("k"):
+                order.append("first-acquired")
+                await asyncio.sleep(0.2)
+                order.append("first-released")
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.05)
+        async with second.refresh_lock("k"):
+            order.append("second-acquired")
+        await holder
+        assert order == ["first-acquired", "first-released", "second-acquired"]
+
+    async def test_contended_write_lock_does_not_block_the_loop(self) -> None:
+        store = FileCredentialStore(self.path)
+        client = make_client(store)
+        client.access_token = "fresh-token"
+        client.user_id = "user-1"
+        # Another process in the middle of a write.
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        self.addCleanup(os.close, fd)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        save = asyncio.create_task(client._save_credentials())
+        await asyncio.sleep(0.05)
+        assert store.load(client.credential_key) is None
+        assert not save.done()
+
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        await save
+        assert store.load(client.credential_key).access_token == "fresh-token"
+
+
+class WarmStartTest(IsolatedAsyncioTestCase):
+
+    async def test_client_starts_from_cached_credentials(self) -> None:
+        store = MemoryCredentialStore()
+        store.save(credential_key("user@example.com", "us", "us"), make_credentials())
+        client = make_client(store)
+        with mock.patch.object(client, "_login") as login:
+            assert await client.get_access_token() == "cached-token"
+            assert await client.get_user_id() == "user-1"
+        login.assert_not_called()
+        assert client.mqtt_auth_token == "mqtt-token"
+        assert client.session_token == "session"
+
+    async def test_expired_access_token_keeps_gigya_session(self) -> None:
+        store = MemoryCredentialStore()
+        store.save(
+            credential_key("user@example.com", "us", "us"),
+            make_credentials(access_token_expires_at=time.time() - 10),
+        )
+        client = make_client(store)
+        assert not await client.load_credentials()
+        assert client.access_token is None
+        assert client.session_token == "session"
+
+    async def test_store_is_read_off_the_loop_on_first_use(self) -> None:
+        store = MemoryCredentialStore()
+        store.save(credential_key("user@example.com", "us", "us"), make_credentials())
+        loop_thread = threading.get_ident()
+        reads = []
+
+        def load(key):
+            reads.append(threading.get_ident())
+            return MemoryCredentialStore.load(store, key)
+
+        with mock.patch.object(store, "load", side_effect=load):
+            client = make_client(store)
+            assert reads == []
+            assert await client.get_user_id() == "user-1"
+            assert await client.get_access_token() == "cached-token"
+        assert len(reads) == 1
+        assert reads[0] != loop_thread
+
+    async def test_clients_sharing_a_store_log_in_once(self) -> None:
+        store = MemoryCredentialStore()
+        first = make_client(store)
+        second = make_client(store)
+        logins = []
+
+        def fake_login_for(client):
+            async def fake_login():
+                logins.append(client)
+                await asyncio.sleep(0.01)
+                client.access_token = "fresh-token"
+                client.access_token_expires_at = time.time() + 3600
+                client.user_id = "user-1"
+            return fake_login
+
+        with mock.patch.object(first, "_login", side_effect=fake_login_for(first)), \
+                mock.patch.object(second, "_login", side_effect=fake_login_for(second)):
+            tokens = await asyncio.gather(first.get_access_token(), second.get_access_token())
+        assert tokens == ["fresh-token", "fresh-token"]
+        assert len(logins) == 1
+
+    async def test_rejected_token_is_not_readopted(self) -> None:
+        store = MemoryCredentialStore()
+        store.save(credential_key("user@example.com", "us", "us"), make_credentials())
+        client = make_client(store)
+        client._rejected_access_token = "cached-token"
+        client.access_token = None
+
+        async def fake_login():
+            client.access_token = "fresh-token"
+            client.user_id = "user-1"
+
+        with mock.patch.object(client, "_login", side_effect=fake_login) as login:
+            assert await client.get_access_token() == "fresh-token"
+        login.assert_awaited_once()
+        assert store.load(client.credential_key).access_token == "fresh-token"
+
+
+class MqttFromCredentialStoreTest(TestCase):
+
+    def test_builds_client_from_store(self) -> None:
+        store = MemoryCredentialStore()
+        store.save("k", make_credentials())
+        client = MqttAwsBlueair.from_credential_store(store, "k", region="us")
+        assert client is not None
+        assert client._mqtt_auth_token == "mqtt-token"
+        assert client._user_id == "user-1"
+
+    def test_returns_none_without_valid_credentials(self) -> None:
+        store = MemoryCredentialStore()
+        assert MqttAwsBlueair.from_credential_store(store, "k", region="us") is None
+        store.save("k", make_credentials(mqtt_auth_expires_at=time.time() - 1))
+        assert MqttAwsBlueair.from_credential_store(store, "k", region="us") is None
@@ -0,0 +1,162 @@
+"""Tests for per-request timeouts and operation deadlines."""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, mock
+
+from blueair_api.deadline import deadline, remaining
+from blueair_api.errors import DeadlineExceededError, ServerError
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.http_blueair import HttpBlueair
+from blueair_api.retry import RetryPolicy
+from blueair_api.scheduler import Priority, current_priority, request_priority
+
+
+class _FakeClientResponse:
+    def __init__(self, status: int, body: Any, delay: float = 0.0):
+        self.status = status
+        self.headers: dict[str, str] = {}
+        self.charset = "utf-8"
+        self.delay = delay
+        self._raw = json.dumps(body).encode()
+
+    async def read(self) -> bytes:
+        return self._raw
+
+    def release(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    def __init__(self, *responses: _FakeClientResponse):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+def _aws_client(session, **kwargs) -> HttpAwsBlueair:
+    client = HttpAwsBlueair(
+        username="user@example.com",
+        password="hunter2",
+        client_session=session,
+        **kwargs,
+    )
+    client.access_token = "token"
+    client.user_id = "user-1"
+    return client
+
+
+class DeadlineContextTest(IsolatedAsyncioTestCase):
+
+    async def test_cancels_on_time(self):
+        with self.assertRaises(DeadlineExceededError) as ctx:
+            async with deadline(0.01):
+                await asyncio.sleep(1)
+        assert isinstance(ctx.exception, TimeoutError)
+
+    async def test_nested_deadline_only_shortens(self):
+        assert remaining() is None
+        async with deadline(0.5), deadline(10):
+            left = remaining()
+            assert left is not None and left <= 0.5
+        assert remaining() is None
+
+
+class AwsClientTimeoutTest(IsolatedAsyncioTestCase):
+
+    async def test_slow_attempt_times_out_and_is_retried(self):
+        session = _FakeSession(
+            _FakeClientResponse(200, {"devices": ["slow"]}, delay=1),
+            _FakeClientResponse(200, {"devices": ["a"]}),
+        )
+        client = _aws_client(
+            session, request_timeout=0.01, retry_policy=RetryPolicy(base_delay=0.0)
+        )
+        assert await client.devices() == ["a"]
+        assert session.calls == 2
+
+    async def test_deadline_bounds_retries(self):
+        session = _FakeSession(_FakeClientResponse(200, {"devices": []}, delay=1))
+        client = _aws_client(session, retry_policy=RetryPolicy(base_delay=0.0))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with self.assertRaises(DeadlineExceededError):
+            async with deadline(0.05):
+                await client.devices()
+        assert loop.time() - started < 0.5
+        # The budget ran out during the first attempt; nothing was retried.
+        assert session.calls == 1
+
+    async def test_no_retry_when_backoff_exceeds_budget(self):
+        session = _FakeSession(
+            _FakeClientResponse(503, {}),
+            _FakeClientResponse(200, {"devices": []}),
+        )
+        client = _aws_client(session, retry_policy=RetryPolicy(base_delay=5.0, jitter=0.0))
+        with self.assertRaises(ServerError):
+            async with deadline(1):
+                await client.devices()
+        assert session.calls == 1
+
+    async def test_deadline_does_not_trip_circuit(self):
+        session = _FakeSession(_FakeClientResponse(200, {"devices": []}, delay=1))
+        client = _aws_client(session)
+        for _ in range(6):
+            with self.assertRaises(DeadlineExceededError):
+                async with deadline(0.01):
+                    await client.devices()
+        assert client.endpoint_available()
+
+    async def test_shared_login_outlives_the_starting_callers_deadline(self):
+        client = _aws_client(_FakeSession(_FakeClientResponse(200, {})))
+        client.access_token = None
+        seen: list[tuple[float | None, Priority]] = []
+
+        async def fake_login():
+            seen.append((remaining(), current_priority()))
+            await asyncio.sleep(0.1)
+            client.access_token = "fresh-token"
+
+        with mock.patch.object(client, "_refresh_access_token", side_effect=fake_login):
+            async def impatient():
+                with request_priority(Priority.INTERACTIVE):
+                    async with deadline(0.02):
+                        await client.get_access_token()
+
+            first = asyncio.create_task(impatient())
+            await asyncio.sleep(0)
+            second = asyncio.create_task(client.get_access_token())
+            with self.assertRaises(DeadlineExceededError):
+                await first
+            assert await second == "fresh-token"
+        assert seen == [(None, Priority.INTERACTIVE)]
+
+
+class LegacyClientTimeoutTest(IsolatedAsyncioTestCase):
+
+    async def test_request_timeout(self):
+        session = _FakeSession(_FakeClientResponse(200, {}, delay=1))
+        client = HttpBlueair(
+            username="user@example.com",
+            password="hunter2",
+            home_host="home.example",
+            auth_token="token",
+            client_session=session,  # type: ignore[arg-type]
+            retry_policy=RetryPolicy(max_attempts=2, base_delay=0.0),
+            request_timeout=0.01,
+        )
+        with self.assertRaises(TimeoutError):
+            await client._get_request_with_logging_and_errors_raised(url="https://home.example/x")
+        assert session.calls == 2
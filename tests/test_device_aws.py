@@ -10,10 +10,12 @@ Then use pytest to drive the tests
 
     $ pytest tests
 """
+import asyncio
 import typing
 from typing import Any
 
 import contextlib
+import copy
 import dataclasses
 from importlib import resources
 import json
@@ -23,8 +25,10 @@ from unittest import IsolatedAsyncioTestCase, TestCase
 import pytest
 
 from blueair_api.device_aws import DeviceAws, AttributeType
+from blueair_api.errors import ServerError
 from blueair_api.sku_map import UNKNOWN_MODEL
 from blueair_api import http_aws_blueair
+from blueair_api.http_aws_blueair import HttpAwsBlueair
 from blueair_api import intermediate_representation_aws as ir
 
 
@@ -101,7 +105,7 @@ class DeviceAwsTestBase(IsolatedAsyncioTestCase):
                 "datapoints": [],
                 "sensors": []
             }]}
-        async def fake_sensors(device_name, device_uuid):
+        async def fake_sensors(device_name, device_uuid, **kwargs):
             return self.device_sensor_helper["mock_data"]
 
         self.api.device_sensors.side_effect = fake_sensors
@@ -367,6 +371,200 @@ class DeviceAwsSetterTest(DeviceAwsTestBase):
         assert self.device.fan_speed_0 == 2
 
 
+class RefreshManyTest(DeviceAwsTestBase):
+    """Tests for the batched DeviceAws.refresh_many()."""
+
+    def setUp(self):
+        super().setUp()
+        with open(resources.files().joinpath('device_info/max_211i.json')) as sample_file:
+            self.info = json.load(sample_file)
+        self.other = DeviceAws(self.api,
+             name_api="other-name-api",
+             uuid="other-uuid",
+             name="other-name",
+             mac="other-mac",
+             type_name='fake-type-name')
+
+    async def test_refresh_many_uses_one_batched_call(self):
+        async def fake_many(uuids, chunk_size=None):
+            return dict.fromkeys(uuids, self.info)
+        self.api.device_info_many.side_effect = fake_many
+
+        await DeviceAws.refresh_many([self.device, self.other], chunk_size=10)
+
+        self.api.device_info_many.assert_awaited_once_with(
+            ["fake-uuid", "other-uuid"], chunk_size=10)
+        self.api.device_info.assert_not_awaited()
+        assert self.api.device_sensors.await_count == 2
+        assert self.device.name == "Bedroom Purifier"
+        assert self.other.name == "Bedroom Purifier"
+        assert self.other.fan_speed == self.device.fan_speed
+
+    async def test_refresh_many_skips_missing_devices(self):
+        async def fake_many(uuids, chunk_size=None):
+            return {"fake-uuid": self.info}
+        self.api.device_info_many.side_effect = fake_many
+
+        with self.assertLogs("blueair_api.device_aws", level="WARNING"):
+            await DeviceAws.refresh_many([self.device, self.other])
+
+        assert self.device.name == "Bedroom Purifier"
+        assert self.other.name == "other-name"
+        self.api.device_sensors.assert_awaited_once_with(
+            "fake-name-api", "fake-uuid", sensors=["pm1", "pm2_5", "pm10", "fsp0", "rssi"])
+
+    async def test_refresh_many_skips_failed_telemetry(self):
+        async def fake_many(uuids, chunk_size=None):
+            return dict.fromkeys(uuids, self.info)
+        self.api.device_info_many.side_effect = fake_many
+
+        async def fake_sensors(device_name, device_uuid, **kwargs):
+            if device_uuid == "other-uuid":
+                raise ServerError("telemetry unavailable", status=503)
+            return self.device_sensor_helper["mock_data"]
+        self.api.device_sensors.side_effect = fake_sensors
+
+        with self.assertLogs("blueair_api.device_aws", level="WARNING") as logs:
+            await DeviceAws.refresh_many([self.device, self.other])
+
+        assert "other-uuid" in logs.output[0]
+        assert self.device.name == "Bedroom Purifier"
+        assert self.other.name == "other-name"
+
+    async def test_refresh_many_runs_clients_concurrently(self):
+        other_api = mock.create_autospec(HttpAwsBlueair, instance=True)
+        other_api.device_sensors.side_effect = self.api.device_sensors.side_effect
+        self.other.api = other_api
+        both_started = asyncio.Barrier(2)
+
+        async def fake_many(uuids, chunk_size=None):
+            # Deadlocks unless both clients are polled at the same time.
+            async with asyncio.timeout(1):
+                await both_started.wait()
+            return dict.fromkeys(uuids, self.info)
+        self.api.device_info_many.side_effect = fake_many
+        other_api.device_info_many.side_effect = fake_many
+
+        await DeviceAws.refresh_many([self.device, self.other])
+
+        assert self.device.name == "Bedroom Purifier"
+        assert self.other.name == "Bedroom Purifier"
+
+
+class TelemetrySensorsTest(DeviceAwsTestBase):
+    """Telemetry queries follow the device's ds schema."""
+
+    def setUp(self):
+        super().setUp()
+        with open(resources.files().joinpath('device_info/H38i.json')) as sample_file:
+            info = json.load(sample_file)
+        self.device_info_helper.info.update(info)
+
+    async def test_humidifier_not_asked_for_pm(self):
+        await self.device.refresh()
+        self.api.device_sensors.assert_awaited_once_with(
+            "fake-name-api", "fake-uuid", sensors=["t", "h", "fsp0", "rssi"])
+
+    async def test_caller_subset(self):
+        self.device.telemetry_sensor_subset = ["h", "pm2_5"]
+        await self.device.refresh()
+        self.api.device_sensors.assert_awaited_once_with(
+            "fake-name-api", "fake-uuid", sensors=["h"])
+
+    async def test_no_declared_series_skips_fetch(self):
+        self.device.telemetry_sensor_subset = ["pm2_5"]
+        await self.device.refresh()
+        self.api.device_sensors.assert_not_awaited()
+        assert self.device.pm2_5 is NotImplemented
+
+
+class StatesOnlyPollingTest(DeviceAwsTestBase):
+    """Once the schema is known, polls only fetch states."""
+
+    def setUp(self):
+        super().setUp()
+        with open(resources.files().joinpath('device_info/max_211i.json')) as sample_file:
+            self.info = json.load(sample_file)
+        self.device.states_only_polling = True
+
+        async def fake_device_info(device_name, device_uuid, states_only=False):
+            if states_only:
+                return {"id": device_uuid, "states": copy.deepcopy(self.info["states"])}
+            return copy.deepcopy(self.info)
+        self.api.device_info.side_effect = fake_device_info
+
+    def set_state(self, name, value):
+        for state in self.info["states"]:
+            if state["n"] == name:
+                state["v"] = value
+
+    async def test_first_refresh_fetches_schema(self):
+        await self.device.refresh()
+        self.api.device_info.assert_awaited_once_with("fake-name-api", "fake-uuid")
+        assert self.device.name == "Bedroom Purifier"
+
+    async def test_later_polls_fetch_states_only(self):
+        await self.device.refresh()
+        self.set_state("fanspeed", 42)
+        await self.device.refresh()
+        self.api.device_info.assert_awaited_with(
+            "fake-name-api", "fake-uuid", states_only=True)
+        assert self.api.device_info.await_count == 2
+        assert self.device.fan_speed == 42
+        assert self.device.name == "Bedroom Purifier"
+        assert "configuration" in self.device.raw_info
+
+    async def test_schema_is_parsed_once(self):
+        await self.device.refresh()
+        with mock.patch.object(ir, "parse_json", wraps=ir.parse_json) as parse_json:
+            await self.device.refresh()
+        parse_json.assert_not_called()
+
+    async def test_empty_configuration_keeps_cached_schema(self):
+        await self.device.refresh()
+        schema = self.device.raw_info["configuration"]
+
+        async def fake_device_info(device_name, device_uuid, states_only=False):
+            return {"id": device_uuid, "states": copy.deepcopy(self.info["states"]),
+                    "configuration": {}}
+        self.api.device_info.side_effect = fake_device_info
+        await self.device.refresh()
+
+        assert self.device.raw_info["configuration"] is schema
+        assert self.device.name == "Bedroom Purifier"
+
+    async def test_firmware_change_refetches_schema(self):
+        await self.device.refresh()
+        self.set_state("cfv", 16777479)
+        self.info["configuration"]["di"]["name"] = "Renamed"
+        await self.device.refresh()
+        self.api.device_info.assert_awaited_with("fake-name-api", "fake-uuid")
+        assert self.api.device_info.await_count == 3
+        assert self.device.name == "Renamed"
+
+    async def test_disabled_by_default(self):
+        self.device.states_only_polling = False
+        await self.device.refresh()
+        await self.device.refresh()
+        self.api.device_info.assert_awaited_with("fake-name-api", "fake-uuid")
+
+    async def test_refresh_many_batches_states_only(self):
+        await self.device.refresh()
+        calls = []
+
+        async def fake_many(uuids, chunk_size=None, states_only=False):
+            calls.append((uuids, states_only))
+            info = await self.api.device_info.side_effect("", "", states_only)
+            return dict.fromkeys(uuids, info)
+        self.api.device_info_many.side_effect = fake_many
+        other = DeviceAws(self.api, name_api="other-name-api", uuid="other-uuid")
+
+        await DeviceAws.refresh_many([self.device, other])
+
+        assert calls == [(["fake-uuid"], True), (["other-uuid"], False)]
+        assert other.name == "Bedroom Purifier"
+
+
 class EmptyDeviceAwsTest(DeviceAwsTestBase):
     """Tests for a emptydevice.
 
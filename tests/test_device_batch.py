@@ -0,0 +1,86 @@
+"""Tests for multi-attribute command batches on ``DeviceAws``."""
+from __future__ import annotations
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+from blueair_api.device_aws import DeviceAws
+
+
+class DeviceBatchTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.api = mock.AsyncMock()
+        self.device = DeviceAws(self.api, uuid="fake-uuid", name_api="fake-name-api")
+        self.published = 0
+
+        def on_update():
+            self.published += 1
+
+        self.device.register_callback(on_update)
+        self.log: list[tuple[str, str]] = []
+        self.active = 0
+        self.max_active = 0
+
+        async def set_device_info(uuid, service_name, action_verb, value):
+            self.log.append(("start", service_name))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            await asyncio.sleep(0.01)
+            self.active -= 1
+            self.log.append(("end", service_name))
+
+        self.api.set_device_info.side_effect = set_device_info
+
+    async def test_heat_to_cool_scene(self):
+        await self.device.set_many({
+            "cool_fan_speed": 37,
+            "cool_sub_mode": 1,
+            "main_mode": 2,
+        })
+        assert self.log.index(("end", "mainmode")) < self.log.index(("start", "coolsubmode"))
+        assert self.log.index(("end", "coolsubmode")) < self.log.index(("start", "coolfs"))
+        assert (self.device.main_mode, self.device.cool_sub_mode, self.device.cool_fan_speed) == (2, 1, 37)
+        assert self.published == 1
+
+    async def test_same_phase_runs_concurrently_within_limit(self):
+        await self.device.set_many(
+            {"brightness": 50, "child_lock": True, "germ_shield": True, "heat_fan_speed": 11},
+            concurrency=2,
+        )
+        assert self.api.set_device_info.await_count == 4
+        assert self.max_active == 2
+        assert self.published == 1
+
+    async def test_batch_context(self):
+        self.device.hw = "hum2_l"
+        async with self.device.batch() as changes:
+            changes["standby"] = False
+            changes["fan_speed"] = 2
+        self.api.set_device_info.assert_any_await("fake-uuid", "standby", "vb", False)
+        self.api.set_device_info.assert_any_await("fake-uuid", "fanspeed", "v", 37)
+        assert self.published == 1
+
+    async def test_batch_not_sent_when_block_raises(self):
+        with self.assertRaises(RuntimeError):
+            async with self.device.batch() as changes:
+                changes["standby"] = True
+                raise RuntimeError("abort")
+        self.api.set_device_info.assert_not_awaited()
+
+    async def test_failure_stops_later_phases(self):
+        async def fail(uuid, service_name, action_verb, value):
+            raise ValueError("rejected")
+
+        self.api.set_device_info.side_effect = fail
+        with self.assertRaises(ValueError):
+            await self.device.set_many({"main_mode": 1, "heat_temp": 210})
+        assert self.api.set_device_info.await_count == 1
+        # Like a failing single setter, nothing is published.
+        assert self.published == 0
+
+    async def test_unknown_attribute_rejected_before_sending(self):
+        for name in ("pm2_5", "many", "not_an_attribute"):
+            with self.assertRaises(ValueError):
+                await self.device.set_many({"standby": True, name: 1})
+        self.api.set_device_info.assert_not_awaited()
@@ -0,0 +1,225 @@
+"""Tests for hedged reads."""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from blueair_api.errors import ServerError
+from blueair_api.hedging import Hedger, hedged_read
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.rate_limit import RateLimiter
+from blueair_api.retry import NO_RETRY
+from blueair_api.scheduler import RequestScheduler
+
+
+class _Attempts:
+    """Successive calls sleep for the given delays, then return their index."""
+
+    def __init__(self, *delays: float, fail: tuple[int, ...] = ()):
+        self.delays = list(delays)
+        self.fail = fail
+        self.calls = 0
+        self.cancelled: list[int] = []
+
+    async def __call__(self) -> int:
+        index = self.calls
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delays[index])
+        except asyncio.CancelledError:
+            self.cancelled.append(index)
+            raise
+        if index in self.fail:
+            raise ServerError(f"attempt {index} failed", status=503)
+        return index
+
+
+class HedgerDelayTest(TestCase):
+
+    def test_initial_delay_until_enough_samples(self):
+        hedger = Hedger(initial_delay=0.5)
+        assert hedger.delay("devices") == 0.5
+        for _ in range(10):
+            hedger._record("devices", 0.1)
+        assert hedger.delay("devices") == 0.5
+
+    def test_delay_follows_quantile(self):
+        hedger = Hedger(quantile=0.9, min_delay=0.0)
+        for i in range(1, 101):
+            hedger._record("devices", i / 100)
+        assert abs(hedger.delay("devices") - 0.9) < 0.02
+
+    def test_delay_is_clamped(self):
+        hedger = Hedger(min_delay=0.2, max_delay=0.3)
+        for _ in range(50):
+            hedger._record("fast", 0.01)
+            hedger._record("slow", 10)
+        assert hedger.delay("fast") == 0.2
+        assert hedger.delay("slow") == 0.3
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            Hedger(quantile=1)
+        with self.assertRaises(ValueError):
+            Hedger(min_delay=2, max_delay=1)
+        with self.assertRaises(ValueError):
+            Hedger(budget_burst=0.5)
+
+
+class HedgerRunTest(IsolatedAsyncioTestCase):
+
+    async def test_fast_request_is_not_hedged(self):
+        hedger = Hedger(initial_delay=0.5)
+        attempts = _Attempts(0)
+        assert await hedger.run("devices", attempts) == 0
+        assert attempts.calls == 1
+        assert (hedger.requests, hedger.hedges, hedger.hedge_wins) == (1, 0, 0)
+
+    async def test_slow_request_is_hedged_and_loser_cancelled(self):
+        hedger = Hedger(initial_delay=0.01, min_delay=0.0)
+        attempts = _Attempts(1, 0)
+        assert await hedger.run("devices", attempts) == 1
+        await asyncio.sleep(0)
+        assert attempts.cancelled == [0]
+        assert (hedger.hedges, hedger.hedge_wins) == (1, 1)
+
+    async def test_primary_can_still_win(self):
+        hedger = Hedger(initial_delay=0.01, min_delay=0.0)
+        attempts = _Attempts(0.02, 1)
+        assert await hedger.run("devices", attempts) == 0
+        await asyncio.sleep(0)
+        assert attempts.cancelled == [1]
+        assert (hedger.hedges, hedger.hedge_wins) == (1, 0)
+
+    async def test_failed_primary_falls_back_to_hedge(self):
+        hedger = Hedger(initial_delay=0.01, min_delay=0.0)
+        attempts = _Attempts(0.02, 0.03, fail=(0,))
+        assert await hedger.run("devices", attempts) == 1
+
+    async def test_both_failing_raises_primary_error(self):
+        hedger = Hedger(initial_delay=0.01, min_delay=0.0)
+        attempts = _Attempts(0.02, 0.03, fail=(0, 1))
+        with self.assertRaisesRegex(ServerError, "attempt 0"):
+            await hedger.run("devices", attempts)
+
+    async def test_budget_limits_hedges(self):
+        hedger = Hedger(initial_delay=0.0, min_delay=0.0, budget_ratio=0.0, budget_burst=1)
+        assert await hedger.run("devices", _Attempts(0.01, 0)) == 1
+        attempts = _Attempts(0.01, 0)
+        assert await hedger.run("devices", attempts) == 0
+        assert attempts.calls == 1
+        assert hedger.hedges == 1
+
+    async def test_caller_cancellation_cancels_both(self):
+        hedger = Hedger(initial_delay=0.0, min_delay=0.0)
+        attempts = _Attempts(1, 1)
+        task = asyncio.create_task(hedger.run("devices", attempts))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        assert sorted(attempts.cancelled) == [0, 1]
+
+
+class _FakeClientResponse:
+    def __init__(self, body: Any, delay: float = 0.0):
+        self.status = 200
+        self.headers: dict[str, str] = {}
+        self.charset = "utf-8"
+        self.delay = delay
+        self._raw = json.dumps(body).encode()
+
+    async def read(self) -> bytes:
+        return self._raw
+
+    def release(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    def __init__(self, *responses: _FakeClientResponse):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+    post = get
+
+
+class AwsClientHedgingTest(IsolatedAsyncioTestCase):
+
+    def _client(self, session, hedger: Hedger | None, **kwargs: Any) -> HttpAwsBlueair:
+        client = HttpAwsBlueair(
+            username="user@example.com",
+            password="hunter2",
+            client_session=session,  # type: ignore[arg-type]
+            retry_policy=NO_RETRY,
+            hedger=hedger,
+            **kwargs,
+        )
+        client.access_token = "token"
+        client.user_id = "user-1"
+        return client
+
+    async def test_devices_read_is_hedged(self):
+        session = _FakeSession(
+            _FakeClientResponse({"devices": ["stalled"]}, delay=1),
+            _FakeClientResponse({"devices": ["a"]}),
+        )
+        hedger = Hedger(initial_delay=0.01, min_delay=0.0)
+        client = self._client(session, hedger)
+        assert await client.devices() == ["a"]
+        assert session.calls == 2
+        assert hedger.hedge_wins == 1
+
+    async def test_hedging_is_off_by_default(self):
+        session = _FakeSession(_FakeClientResponse({"devices": ["a"]}, delay=0.05))
+        client = self._client(session, None)
+        with hedged_read("devices"):
+            assert await client.devices() == ["a"]
+        assert session.calls == 1
+
+    async def test_unmarked_requests_are_not_hedged(self):
+        session = _FakeSession(_FakeClientResponse({}, delay=0.05))
+        hedger = Hedger(initial_delay=0.0, min_delay=0.0)
+        client = self._client(session, hedger)
+        await client._post_request_with_logging_and_errors_raised(
+            url="https://example.com/set", headers={}, json_body={}
+        )
+        assert session.calls == 1
+        assert hedger.requests == 0
+
+    async def test_queueing_for_tokens_and_slots_is_not_latency(self):
+        # A 10 ms server behind a 20 req/s limiter: a wave of 40 reads
+        # queues for up to 2 s locally, which must not trigger hedges.
+        class _SteadySession:
+            calls = 0
+
+            def get(self, **kwargs):
+                self.calls += 1
+                return _FakeClientResponse({"devices": []}, delay=0.01)
+
+        session = _SteadySession()
+        hedger = Hedger(initial_delay=0.1, min_delay=0.0)
+        client = self._client(
+            session,
+            hedger,
+            rate_limiter=RateLimiter(rate=20.0, burst=1),
+            scheduler=RequestScheduler(total_limit=4),
+        )
+        await asyncio.gather(*(client.devices() for _ in range(40)))
+        assert hedger.hedges == 0
+        assert session.calls == 40
+        assert max(hedger.latencies["devices"]) < 0.1
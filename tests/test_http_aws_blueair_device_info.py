@@ -0,0 +1,96 @@
+"""Tests for the ``/r/initial`` device info calls on ``HttpAwsBlueair``.
+
+No network is required; the request helper is replaced with a fake that
+records the ``deviceconfigquery`` it was sent and answers with one
+payload per requested device id.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, mock
+
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.util_http import ApiResponse
+
+
+def _json_response(body: Any) -> ApiResponse:
+    return ApiResponse(status=200, headers={}, raw=json.dumps(body).encode())
+
+
+def _make() -> HttpAwsBlueair:
+    client = HttpAwsBlueair(
+        username="user@example.com",
+        password="hunter2",
+        client_session=object(),  # type: ignore[arg-type]
+    )
+    client.access_token = "fake-access-token"
+    client.user_id = "fake-user-id"
+    return client
+
+
+class DeviceInfoManyTest(IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.client = _make()
+        self.queries: list[list[str]] = []
+        self.selectors: list[list[str]] = []
+
+        async def fake_post(url, headers=None, json_body=None, form_data=None):
+            ids = [query["id"] for query in json_body["deviceconfigquery"]]
+            self.queries.append(ids)
+            self.selectors.append(json_body["deviceconfigquery"][0]["r"]["r"])
+            # The cloud silently drops ids it doesn't know.
+            return _json_response({
+                "deviceInfo": [
+                    {"id": device_id, "states": []}
+                    for device_id in ids
+                    if device_id != "unknown"
+                ]
+            })
+
+        patcher = mock.patch.object(
+            self.client, "_post_request_with_logging_and_errors_raised",
+            side_effect=fake_post,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_single_device_info_unchanged(self) -> None:
+        info = await self.client.device_info("name", "uuid-1")
+        assert info == {"id": "uuid-1", "states": []}
+        assert self.queries == [["uuid-1"]]
+
+    async def test_states_only_selectors(self) -> None:
+        await self.client.device_info("name", "uuid-1", states_only=True)
+        await self.client.device_info_many(["a", "b"], states_only=True)
+        await self.client.device_info("name", "uuid-1")
+        assert self.selectors == [["states"], ["states"], ["sensors"]]
+
+    async def test_many_packs_ids_into_one_query(self) -> None:
+        infos = await self.client.device_info_many(["a", "b", "c"])
+        assert set(infos) == {"a", "b", "c"}
+        assert infos["b"] == {"id": "b", "states": []}
+        assert self.queries == [["a", "b", "c"]]
+
+    async def test_many_chunks_requests(self) -> None:
+        uuids = [f"uuid-{i}" for i in range(7)]
+        infos = await self.client.device_info_many(uuids, chunk_size=3)
+        assert list(infos) == uuids
+        assert [len(q) for q in self.queries] == [3, 3, 1]
+
+    async def test_many_deduplicates_ids(self) -> None:
+        await self.client.device_info_many(["a", "a", "b"])
+        assert self.queries == [["a", "b"]]
+
+    async def test_many_omits_devices_without_payload(self) -> None:
+        infos = await self.client.device_info_many(["a", "unknown"])
+        assert set(infos) == {"a"}
+
+    async def test_many_empty_input_sends_nothing(self) -> None:
+        assert await self.client.device_info_many([]) == {}
+        assert self.queries == []
+
+    async def test_many_rejects_bad_chunk_size(self) -> None:
+        with self.assertRaises(ValueError):
+            await self.client.device_info_many(["a"], chunk_size=0)
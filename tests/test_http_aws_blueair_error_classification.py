@@ -14,8 +14,9 @@ from __future__ import annotations
 
 from unittest import IsolatedAsyncioTestCase
 
-from blueair_api.errors import LoginError, SessionError
-from blueair_api.http_aws_blueair import request_with_errors
+from blueair_api.errors import ClientRequestError, LoginError, ServerError, SessionError
+from blueair_api.http_aws_blueair import request_with_active_session, request_with_errors
+from blueair_api.util_http import ApiResponse
 
 
 class _FakeResponse:
@@ -52,26 +53,38 @@ class TestNonJsonResponseBody(IsolatedAsyncioTestCase):
                 url="https://example/prod/c/registered-devices", response=response
             )
 
-    async def test_empty_body_non_login_url_raises_session_error(self) -> None:
-        # The observed production failure: a zero-byte body during
-        # refresh_jwt(), surfaced by orjson as a JSONDecodeError.
+    async def test_empty_body_5xx_raises_server_error(self) -> None:
+        # The observed production failure: a zero-byte body from the
+        # gateway.  The session is fine, so no re-login; ServerError is
+        # retried and counts towards the circuit breaker.
         response = _FakeResponse(
             502, json_exc=ValueError("unexpected character: line 1 column 1 (char 0)")
         )
-        with self.assertRaises(SessionError):
+        with self.assertRaises(ServerError) as ctx:
             await _wrapped(
                 url="https://example/prod/c/registered-devices", response=response
             )
+        assert ctx.exception.status == 502
+
+    async def test_html_5xx_raises_server_error(self) -> None:
+        for status in (503, 504):
+            response = _FakeResponse(status, json_exc=ValueError("not json"))
+            with self.assertRaises(ServerError):
+                await _wrapped(
+                    url="https://example/prod/c/registered-devices", response=response
+                )
+
+    async def test_non_json_4xx_classified_by_status(self) -> None:
+        url = "https://example/prod/c/registered-devices"
+        with self.assertRaises(ClientRequestError) as ctx:
+            await _wrapped(url=url, response=_FakeResponse(404, json_exc=ValueError("x")))
+        assert ctx.exception.status == 404
+        with self.assertRaises(SessionError):
+            await _wrapped(url=url, response=_FakeResponse(401, json_exc=ValueError("x")))
 
-    async def test_empty_body_login_url_still_raises_session_error(self) -> None:
-        # Non-JSON classification happens before the login/session URL
-        # branch, so even a /accounts.login URL gets a SessionError
-        # (a ClientError subclass, still retryable) rather than a raw
-        # parse exception. It intentionally does not need to be a
-        # LoginError specifically -- the caller just needs something
-        # it knows how to retry.
+    async def test_non_json_login_error(self) -> None:
         response = _FakeResponse(400, json_exc=ValueError("not json"))
-        with self.assertRaises(SessionError):
+        with self.assertRaises(LoginError):
             await _wrapped(url="https://example/accounts.login", response=response)
 
 
@@ -90,9 +103,10 @@ class TestExistingClassificationUnaffected(IsolatedAsyncioTestCase):
         with self.assertRaises(LoginError):
             await _wrapped(url="https://example/accounts.login", response=response)
 
-    async def test_400_non_login_url_raises_session_error(self) -> None:
-        response = _FakeResponse(400, {"error": "expired"})
-        with self.assertRaises(SessionError):
+    async def test_400_non_login_url_raises_client_request_error(self) -> None:
+        # A bad payload is not an auth failure; see TestStatusClassification.
+        response = _FakeResponse(400, {"error": "bad request"})
+        with self.assertRaises(ClientRequestError):
             await _wrapped(
                 url="https://example/prod/c/registered-devices", response=response
             )
@@ -103,3 +117,93 @@ class TestExistingClassificationUnaffected(IsolatedAsyncioTestCase):
             await _wrapped(
                 url="https://example/prod/c/registered-devices", response=response
             )
+
+
+class TestApiResponseEnvelope(IsolatedAsyncioTestCase):
+    """The envelope the request helpers return is classified the same way."""
+
+    async def test_200_envelope_returned_as_is(self) -> None:
+        response = ApiResponse(status=200, headers={}, raw=b'{"ok": true}')
+        result = await _wrapped(
+            url="https://example/prod/c/registered-devices", response=response
+        )
+        self.assertIs(result, response)
+
+    async def test_status_code_in_body_wins(self) -> None:
+        response = ApiResponse(status=200, headers={}, raw=b'{"statusCode": 403}')
+        with self.assertRaises(LoginError):
+            await _wrapped(url="https://example/accounts.login", response=response)
+
+    async def test_non_json_envelope_raises_session_error(self) -> None:
+        response = ApiResponse(status=200, headers={}, raw=b"")
+        with self.assertRaises(SessionError):
+            await _wrapped(
+                url="https://example/prod/c/registered-devices", response=response
+            )
+
+    async def test_html_envelope_5xx_raises_server_error(self) -> None:
+        response = ApiResponse(
+            status=503, headers={}, raw=b"<html>Service Unavailable</html>"
+        )
+        with self.assertRaises(ServerError):
+            await _wrapped(
+                url="https://example/prod/c/registered-devices", response=response
+            )
+
+
+class TestStatusClassification(IsolatedAsyncioTestCase):
+    """Only auth failures become ``SessionError`` (and so a re-login)."""
+
+    url = "https://example/prod/c/fake-uuid/a/fanspeed"
+
+    async def test_401_and_403_raise_session_error(self) -> None:
+        for status in (401, 403):
+            with self.assertRaises(SessionError):
+                await _wrapped(url=self.url, response=_FakeResponse(status, {}))
+
+    async def test_gigya_auth_error_code_raises_session_error(self) -> None:
+        response = ApiResponse(
+            status=200, headers={}, raw=b'{"statusCode": 400, "errorCode": 403005}'
+        )
+        with self.assertRaises(SessionError):
+            await _wrapped(url="https://example/accounts.getJWT", response=response)
+
+    async def test_other_4xx_raise_client_request_error(self) -> None:
+        for status in (400, 404, 409, 422):
+            with self.assertRaises(ClientRequestError) as ctx:
+                await _wrapped(url=self.url, response=_FakeResponse(status, {}))
+            assert ctx.exception.status == status
+
+    async def test_gigya_parameter_error_is_not_auth(self) -> None:
+        response = ApiResponse(
+            status=200, headers={}, raw=b'{"statusCode": 400, "errorCode": 400006}'
+        )
+        with self.assertRaises(ClientRequestError):
+            await _wrapped(url="https://example/accounts.getJWT", response=response)
+
+    async def test_500_raises_server_error(self) -> None:
+        with self.assertRaises(ServerError) as ctx:
+            await _wrapped(url=self.url, response=_FakeResponse(500, {}))
+        assert ctx.exception.status == 500
+
+
+class _Client:
+    def __init__(self, error: Exception) -> None:
+        self.access_token = "token"
+        self.error = error
+        self.calls = 0
+
+    @request_with_active_session
+    async def command(self) -> None:
+        self.calls += 1
+        raise self.error
+
+
+class TestActiveSessionKeepsCredentials(IsolatedAsyncioTestCase):
+
+    async def test_client_error_does_not_drop_session(self) -> None:
+        client = _Client(ClientRequestError("unknown device", status=404))
+        with self.assertRaises(ClientRequestError):
+            await client.command()
+        assert client.calls == 1
+        assert client.access_token == "token"
@@ -0,0 +1,111 @@
+"""Tests for connection pool setup and pre-warming on ``HttpAwsBlueair``."""
+from __future__ import annotations
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from aiohttp import ClientConnectionError
+
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.util_http import ConnectionOptions
+
+
+class _FakeHeadResponse:
+    async def read(self) -> bytes:
+        return b""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    def __init__(self, failing_hosts=()):
+        self.failing_hosts = set(failing_hosts)
+        self.urls: list[str] = []
+        self.closed = False
+
+    def head(self, url, timeout=None):
+        self.urls.append(url)
+        if any(host in url for host in self.failing_hosts):
+            raise ClientConnectionError("unreachable")
+        return _FakeHeadResponse()
+
+    async def close(self):
+        self.closed = True
+
+
+def _make(session, **kwargs) -> HttpAwsBlueair:
+    return HttpAwsBlueair(
+        username="user@example.com",
+        password="hunter2",
+        client_session=session,
+        **kwargs,
+    )
+
+
+class PrewarmTest(IsolatedAsyncioTestCase):
+
+    def test_hosts_follow_regions(self):
+        client = _make(object(), gigya_region="eu", cloud_region="us")
+        assert client.hosts == [
+            "accounts.eu1.gigya.com",
+            "on1keymlmh.execute-api.us-east-2.amazonaws.com",
+        ]
+
+    async def test_prewarm_touches_every_host(self):
+        session = _FakeSession()
+        result = await _make(session).prewarm()
+        assert sorted(session.urls) == [
+            "https://accounts.us1.gigya.com/",
+            "https://on1keymlmh.execute-api.us-east-2.amazonaws.com/",
+        ]
+        assert all(result.values())
+
+    async def test_prewarm_failure_is_not_fatal(self):
+        session = _FakeSession(failing_hosts=["gigya"])
+        result = await _make(session).prewarm()
+        assert result == {
+            "accounts.us1.gigya.com": False,
+            "on1keymlmh.execute-api.us-east-2.amazonaws.com": True,
+        }
+
+    async def test_no_prewarm_on_login_for_caller_session(self):
+        client = _make(_FakeSession())
+        client._start_prewarm()
+        assert client._prewarm_task is None
+
+    async def test_prewarm_on_login_runs_once(self):
+        session = _FakeSession()
+        client = _make(session, connection_options=ConnectionOptions())
+        client._start_prewarm()
+        task = client._prewarm_task
+        client._start_prewarm()
+        assert client._prewarm_task is task
+        assert task is not None
+        await task
+        assert len(session.urls) == 2
+
+    async def test_own_session_uses_connection_options(self):
+        client = HttpAwsBlueair(
+            username="user@example.com",
+            password="hunter2",
+            connection_options=ConnectionOptions(limit_per_host=3),
+        )
+        try:
+            assert client.api_session.connector is not None
+            assert client.api_session.connector.limit_per_host == 3
+        finally:
+            await client.cleanup_client_session()
+
+    async def test_cleanup_cancels_pending_prewarm(self):
+        session = _FakeSession()
+        client = _make(session, connection_options=ConnectionOptions())
+        client._start_prewarm()
+        await client.cleanup_client_session()
+        assert client._prewarm_task is not None
+        with self.assertRaises(asyncio.CancelledError):
+            await client._prewarm_task
+        assert session.closed
@@ -0,0 +1,255 @@
+"""Tests for access token lifetime handling on ``HttpAwsBlueair``.
+
+Covers decoding ``exp`` from the ``/c/login`` access token, refreshing
+ahead of expiry in the background, and sharing a single in-flight login
+chain between concurrent callers.  No network is required.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import time
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, mock
+
+from blueair_api.errors import SessionError
+from blueair_api.http_aws_blueair import HttpAwsBlueair, request_with_active_session
+from blueair_api.util_http import ApiResponse
+
+
+def make_jwt(claims: dict[str, Any]) -> str:
+    def segment(obj: dict[str, Any]) -> str:
+        raw = base64.urlsafe_b64encode(json.dumps(obj).encode()).decode()
+        return raw.rstrip("=")
+    return f"{segment({'alg': 'none'})}.{segment(claims)}.signature"
+
+
+def _json_response(body: Any) -> ApiResponse:
+    return ApiResponse(status=200, headers={}, raw=json.dumps(body).encode())
+
+
+def _make(**kwargs) -> HttpAwsBlueair:
+    return HttpAwsBlueair(
+        username="user@example.com",
+        password="hunter2",
+        client_session=object(),  # type: ignore[arg-type]
+        **kwargs,
+    )
+
+
+class LoginClaimsTest(IsolatedAsyncioTestCase):
+
+    async def test_exp_and_username_decoded_from_access_token(self) -> None:
+        client = _make()
+        exp = int(time.time()) + 3600
+        access_token = make_jwt({"username": "user-1", "exp": exp})
+
+        async def fake_refresh_jwt():
+            client.jwt = "fake-jwt"
+
+        with mock.patch.object(client, "refresh_session"), \
+                mock.patch.object(client, "refresh_jwt", side_effect=fake_refresh_jwt), \
+                mock.patch.object(
+                    client, "_post_request_with_logging_and_errors_raised",
+                    return_value=_json_response({"access_token": access_token}),
+                ):
+            await client.refresh_access_token()
+
+        assert client.access_token == access_token
+        assert client.user_id == "user-1"
+        assert client.access_token_expires_at == exp
+
+    async def test_missing_exp_disables_proactive_refresh(self) -> None:
+        client = _make()
+
+        async def fake_refresh_jwt():
+            client.jwt = "fake-jwt"
+
+        with mock.patch.object(client, "refresh_session"), \
+                mock.patch.object(client, "refresh_jwt", side_effect=fake_refresh_jwt), \
+                mock.patch.object(
+                    client, "_post_request_with_logging_and_errors_raised",
+                    return_value=_json_response({"access_token": make_jwt({"username": "u"})}),
+                ):
+            await client.refresh_access_token()
+
+        assert client.access_token_expires_at is None
+
+
+class TokenRefreshTest(IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.client = _make(token_refresh_margin=60)
+        self.logins = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+        async def fake_login() -> None:
+            self.logins += 1
+            await self.release.wait()
+            self.client.access_token = f"token-{self.logins}"
+            self.client.user_id = "user"
+            self.client.access_token_expires_at = time.time() + 3600
+
+        patcher = mock.patch.object(
+            self.client, "_refresh_access_token", side_effect=fake_login
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_concurrent_callers_share_one_login(self) -> None:
+        self.release.clear()
+        waiters = [asyncio.create_task(self.client.get_access_token()) for _ in range(50)]
+        await asyncio.sleep(0)
+        self.release.set()
+        tokens = await asyncio.gather(*waiters)
+        assert self.logins == 1
+        assert set(tokens) == {"token-1"}
+
+    async def test_expired_token_refreshes_before_returning(self) -> None:
+        self.client.access_token = "old"
+        self.client.access_token_expires_at = time.time() - 1
+        assert await self.client.get_access_token() == "token-1"
+
+    async def test_expiring_token_refreshes_in_background(self) -> None:
+        self.client.access_token = "old"
+        self.client.access_token_expires_at = time.time() + 30
+        self.release.clear()
+        # Still-valid token is handed out immediately.
+        assert await self.client.get_access_token() == "old"
+        assert await self.client.get_access_token() == "old"
+        self.release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert self.logins == 1
+        assert await self.client.get_access_token() == "token-1"
+
+    async def test_fresh_token_does_not_refresh(self) -> None:
+        self.client.access_token = "current"
+        self.client.access_token_expires_at = time.time() + 3600
+        assert await self.client.get_access_token() == "current"
+        assert self.logins == 0
+
+    async def test_cancelled_waiter_does_not_abort_shared_login(self) -> None:
+        self.release.clear()
+        first = asyncio.create_task(self.client.get_access_token())
+        second = asyncio.create_task(self.client.get_access_token())
+        await asyncio.sleep(0)
+        first.cancel()
+        self.release.set()
+        assert await second == "token-1"
+
+    async def test_token_refreshed_inside_request_then_rejected(self) -> None:
+        self.client.access_token = "old"
+        self.client.access_token_expires_at = time.time() - 1
+        sent = []
+
+        @request_with_active_session
+        async def request(self):
+            sent.append(await self.get_access_token())
+            if len(sent) == 1:
+                raise SessionError("expired")
+            return "ok"
+
+        assert await request(self.client) == "ok"
+        # token-1 was the one rejected, so it is replaced, not resent.
+        assert sent == ["token-1", "token-2"]
+        assert self.client._rejected_access_token == "token-1"
+
+
+class ActiveSessionTest(IsolatedAsyncioTestCase):
+
+    async def test_stale_failure_does_not_clear_refreshed_token(self) -> None:
+        client = _make()
+        client.access_token = "old"
+        client.session_token = "gigya-session"
+        calls = []
+
+        @request_with_active_session
+        async def request(self):
+            calls.append(self.access_token)
+            if len(calls) == 1:
+                # Someone else refreshed while this request was in flight.
+                self.access_token = "new"
+                raise SessionError("expired")
+            return "ok"
+
+        assert await request(client) == "ok"
+        assert calls == ["old", "new"]
+        assert client.access_token == "new"
+        assert client.session_token == "gigya-session"
+
+
+class TieredReauthTest(IsolatedAsyncioTestCase):
+    """refresh_access_token reuses the Gigya session before the password."""
+
+    def setUp(self) -> None:
+        self.client = _make()
+        self.calls: list[str] = []
+        self.rejected_sessions: set[str] = set()
+
+        async def fake_post(url, form_data=None, headers=None, json_body=None):
+            endpoint = url.rsplit("/", 1)[-1]
+            self.calls.append(endpoint)
+            if endpoint == "accounts.login":
+                return _json_response({"sessionInfo": {
+                    "sessionToken": "new-session", "sessionSecret": "secret",
+                }})
+            if endpoint == "accounts.getJWT":
+                if self.client.session_token in self.rejected_sessions:
+                    raise SessionError("invalid session")
+                return _json_response({"id_token": "jwt"})
+            return _json_response({"access_token": make_jwt({"username": "u"})})
+
+        patcher = mock.patch.object(
+            self.client, "_post_request_with_logging_and_errors_raised",
+            side_effect=fake_post,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_cold_start_uses_password(self) -> None:
+        await self.client.refresh_access_token()
+        assert self.calls == ["accounts.login", "accounts.getJWT", "login"]
+        assert self.client.reauth_timings["password"].count == 1
+        assert self.client.reauth_timings["session"].count == 0
+
+    async def test_cached_session_skips_password(self) -> None:
+        self.client.session_token = "cached-session"
+        self.client.session_secret = "secret"
+        await self.client.refresh_access_token()
+        assert self.calls == ["accounts.getJWT", "login"]
+        assert self.client.session_token == "cached-session"
+        timing = self.client.reauth_timings["session"]
+        assert timing.count == 1
+        assert timing.last_seconds is not None
+        assert timing.mean_seconds == timing.last_seconds
+
+    async def test_rejected_session_falls_back_to_password(self) -> None:
+        self.client.session_token = "cached-session"
+        self.client.session_secret = "secret"
+        self.rejected_sessions.add("cached-session")
+        await self.client.refresh_access_token()
+        assert self.calls == [
+            "accounts.getJWT", "accounts.login", "accounts.getJWT", "login",
+        ]
+        assert self.client.session_token == "new-session"
+        assert self.client.reauth_timings["password"].count == 1
+        assert self.client.reauth_timings["session"].count == 0
+
+    async def test_session_failure_keeps_gigya_session(self) -> None:
+        self.client.session_token = "cached-session"
+        self.client.session_secret = "secret"
+        self.client.access_token = "old"
+        attempts = []
+
+        @request_with_active_session
+        async def request(self):
+            attempts.append(self.access_token)
+            if len(attempts) == 1:
+                raise SessionError("expired")
+            return await self.get_access_token()
+
+        await request(self.client)
+        assert self.calls == ["accounts.getJWT", "login"]
@@ -7,8 +7,11 @@ with credential refresh via paho's on_pre_connect hook.
 import asyncio
 import json
 import threading
-from unittest import TestCase, mock
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
 
+from blueair_api.device_aws import DeviceAws
+from blueair_api.errors import CommandRejectedError
+from blueair_api.http_aws_blueair import HttpAwsBlueair
 from blueair_api.mqtt_aws_blueair import MqttAwsBlueair
 
 
@@ -609,6 +612,104 @@ class TestConnectDisconnect(TestCase):
         assert client._client is None
 
 
+class TestDesiredStateCommands(IsolatedAsyncioTestCase):
+    """Tests for sending commands as desired shadow state."""
+
+    def setUp(self):
+        self.client = make_mqtt_client(desired_state_commands=True)
+        self.client.register_device(FAKE_DEVICE_UUID)
+        self.paho = mock.MagicMock()
+        self.paho.publish.return_value.rc = 0
+        self.client._client = self.paho
+        self.client._connected = True
+
+    def published(self) -> tuple[str, dict]:
+        topic, payload = self.paho.publish.call_args.args
+        return topic, json.loads(payload)
+
+    async def respond(self, suffix: str, **fields):
+        # Wait for the publish, then answer the way the shadow service would.
+        while not self.paho.publish.called:
+            await asyncio.sleep(0)
+        token = self.published()[1]["clientToken"]
+        topic = f"$aws/things/{FAKE_DEVICE_UUID}/shadow/update/{suffix}"
+        self.client._on_message(self.paho, None, make_mqtt_message(topic, {"clientToken": token, **fields}))
+
+    async def test_subscribes_to_update_responses(self):
+        self.client._on_connect(self.paho, None, None, 0, None)
+        self.client._cancel_resubscribe_timer()
+        topics = [call.args[0] for call in self.paho.subscribe.call_args_list]
+        assert f"$aws/things/{FAKE_DEVICE_UUID}/shadow/update/accepted" in topics
+        assert f"$aws/things/{FAKE_DEVICE_UUID}/shadow/update/rejected" in topics
+
+    async def test_accepted(self):
+        await asyncio.gather(
+            self.client.update_desired_state(FAKE_DEVICE_UUID, {"fanspeed": 37}),
+            self.respond("accepted"),
+        )
+        topic, payload = self.published()
+        assert topic == f"$aws/things/{FAKE_DEVICE_UUID}/shadow/update"
+        assert payload["state"] == {"desired": {"fanspeed": 37}}
+        assert self.client._pending_commands == {}
+
+    async def test_rejected(self):
+        with self.assertRaises(CommandRejectedError) as ctx:
+            await asyncio.gather(
+                self.client.update_desired_state(FAKE_DEVICE_UUID, {"fanspeed": 37}),
+                self.respond("rejected", code=400, message="Invalid JSON"),
+            )
+        assert ctx.exception.code == 400
+
+    async def test_timeout(self):
+        with self.assertRaises(TimeoutError):
+            await self.client.update_desired_state(FAKE_DEVICE_UUID, {"standby": True}, timeout=0.01)
+        assert self.client._pending_commands == {}
+
+    async def test_disconnect_fails_pending_commands(self):
+        async def drop():
+            while not self.paho.publish.called:
+                await asyncio.sleep(0)
+            self.client._on_disconnect(self.paho, None, None, 1, None)
+
+        with self.assertRaises(CommandRejectedError):
+            await asyncio.gather(
+                self.client.update_desired_state(FAKE_DEVICE_UUID, {"standby": True}),
+                drop(),
+            )
+
+    async def test_unavailable_when_disabled(self):
+        client = make_mqtt_client()
+        client.register_device(FAKE_DEVICE_UUID)
+        client._client = self.paho
+        client._connected = True
+        assert not client.commands_available(FAKE_DEVICE_UUID)
+        with self.assertRaises(CommandRejectedError):
+            await client.update_desired_state(FAKE_DEVICE_UUID, {"standby": True})
+        self.paho.publish.assert_not_called()
+
+    async def test_device_setter_uses_channel(self):
+        api = mock.AsyncMock(spec=HttpAwsBlueair)
+        device = DeviceAws(api, uuid=FAKE_DEVICE_UUID, command_channel=self.client)
+        await asyncio.gather(device.set_child_lock(True), self.respond("accepted"))
+        assert self.published()[1]["state"] == {"desired": {"childlock": True}}
+        api.set_device_info.assert_not_awaited()
+        api.invalidate_device_state.assert_called_once_with(FAKE_DEVICE_UUID)
+
+    async def test_device_setter_falls_back_to_rest_on_rejection(self):
+        api = mock.AsyncMock(spec=HttpAwsBlueair)
+        device = DeviceAws(api, uuid=FAKE_DEVICE_UUID, command_channel=self.client)
+        await asyncio.gather(device.set_child_lock(True), self.respond("rejected", code=403))
+        api.set_device_info.assert_awaited_once_with(FAKE_DEVICE_UUID, "childlock", "vb", True)
+
+    async def test_device_setter_uses_rest_while_disconnected(self):
+        self.client._connected = False
+        api = mock.AsyncMock(spec=HttpAwsBlueair)
+        device = DeviceAws(api, uuid=FAKE_DEVICE_UUID, command_channel=self.client)
+        await device.set_brightness(40)
+        self.paho.publish.assert_not_called()
+        api.set_device_info.assert_awaited_once_with(FAKE_DEVICE_UUID, "brightness", "v", 40)
+
+
 class TestOnConnectFail(TestCase):
     """Tests for the on_connect_fail handler."""
 
@@ -0,0 +1,151 @@
+"""Tests for off-loop decoding and the loop lag monitor."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import resources
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, mock
+
+from blueair_api.device_aws import DeviceAws
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.offload import LoopLagMonitor, OffloadOptions
+from blueair_api.util_http import ApiResponse
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self) -> None:
+        super().__init__(max_workers=1)
+        self.jobs = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        self.jobs += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+class OffloadOptionsTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.executor = RecordingExecutor()
+        self.addCleanup(self.executor.shutdown)
+        self.offload = OffloadOptions(min_response_bytes=64, executor=self.executor)
+
+    async def test_large_body_decoded_in_pool(self):
+        body = {"devices": [{"uuid": f"device-{i}"} for i in range(10)]}
+        response = ApiResponse(status=200, headers={}, raw=json.dumps(body).encode())
+        await self.offload.decode(response)
+        assert self.executor.jobs == 1
+        assert response.json == body
+
+    async def test_small_body_decoded_inline(self):
+        response = ApiResponse(status=200, headers={}, raw=b'{"devices": []}')
+        await self.offload.decode(response)
+        assert self.executor.jobs == 0
+        assert response.json == {"devices": []}
+
+    async def test_decode_failure_kept_for_reader(self):
+        response = ApiResponse(status=502, headers={}, raw=b"<html>" + b" " * 100)
+        await self.offload.decode(response)
+        assert self.executor.jobs == 1
+        assert not response.is_json
+
+
+class _FakeClientResponse:
+    def __init__(self, body: Any):
+        self.status = 200
+        self.headers: dict[str, str] = {}
+        self.charset = "utf-8"
+        self._raw = json.dumps(body).encode()
+
+    async def read(self) -> bytes:
+        return self._raw
+
+    def release(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    def __init__(self, body: Any):
+        self.body = body
+
+    def get(self, **kwargs):
+        return _FakeClientResponse(self.body)
+
+
+class AwsClientOffloadTest(IsolatedAsyncioTestCase):
+
+    async def test_client_decodes_large_responses_in_pool(self):
+        executor = RecordingExecutor()
+        self.addCleanup(executor.shutdown)
+        devices = [{"uuid": f"device-{i}", "name": "purifier"} for i in range(20)]
+        client = HttpAwsBlueair(
+            username="user@example.com",
+            password="hunter2",
+            client_session=_FakeSession({"devices": devices}),  # type: ignore[arg-type]
+            offload=OffloadOptions(min_response_bytes=256, executor=executor),
+        )
+        client.access_token = "token"
+        client.user_id = "user-1"
+        assert await client.devices() == devices
+        assert executor.jobs == 1
+
+
+class RefreshManyOffloadTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        with open(resources.files().joinpath("device_info/max_211i.json")) as sample_file:
+            info = json.load(sample_file)
+        self.api = mock.create_autospec(HttpAwsBlueair, instance=True)
+
+        async def fake_many(uuids, chunk_size=None):
+            return dict.fromkeys(uuids, info)
+
+        async def fake_sensors(device_name, device_uuid, **kwargs):
+            return [{"datapoints": [], "sensors": []}]
+
+        self.api.device_info_many.side_effect = fake_many
+        self.api.device_sensors.side_effect = fake_sensors
+        self.devices = [DeviceAws(self.api, uuid=f"uuid-{i}") for i in range(3)]
+        self.executor = RecordingExecutor()
+        self.addCleanup(self.executor.shutdown)
+
+    async def test_large_batch_parsed_in_pool(self):
+        offload = OffloadOptions(min_devices=3, executor=self.executor)
+        await DeviceAws.refresh_many(self.devices, offload=offload)
+        assert self.executor.jobs == 1
+        for device in self.devices:
+            assert device.name == "Bedroom Purifier"
+            assert device.fan_speed is not None
+
+    async def test_small_batch_parsed_inline(self):
+        offload = OffloadOptions(min_devices=4, executor=self.executor)
+        await DeviceAws.refresh_many(self.devices, offload=offload)
+        assert self.executor.jobs == 0
+        assert self.devices[0].name == "Bedroom Purifier"
+
+
+class LoopLagMonitorTest(IsolatedAsyncioTestCase):
+
+    async def test_measures_blocked_loop(self):
+        async with LoopLagMonitor(interval=0.01) as monitor:
+            await asyncio.sleep(0.02)
+            time.sleep(0.05)
+            await asyncio.sleep(0.02)
+        assert not monitor.running
+        assert monitor.max_lag >= 0.03
+        previous = monitor.reset()
+        assert previous.count >= 1
+        assert monitor.histogram.count == 0
+        assert monitor.max_lag == 0
+
+    def test_invalid_interval(self):
+        with self.assertRaises(ValueError):
+            LoopLagMonitor(interval=0)
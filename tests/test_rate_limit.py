@@ -0,0 +1,183 @@
+"""Tests for client-side request pacing and HTTP 429 handling."""
+from __future__ import annotations
+
+import asyncio
+import time
+from email.utils import formatdate
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from blueair_api.errors import RateError, SessionError
+from blueair_api.http_aws_blueair import (
+    HttpAwsBlueair,
+    request_with_active_session,
+    request_with_errors,
+)
+from blueair_api.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    parse_retry_after,
+    request_with_rate_limit,
+)
+from blueair_api.scheduler import Priority
+from blueair_api.util_http import ApiResponse
+
+GATEWAY_URL = "https://abc.execute-api.us-east-2.amazonaws.com/prod/c/registered-devices"
+
+
+class ParseRetryAfterTest(TestCase):
+
+    def test_delta_seconds(self):
+        assert parse_retry_after("7") == 7.0
+        assert parse_retry_after(" 1.5 ") == 1.5
+
+    def test_negative_is_clamped(self):
+        assert parse_retry_after("-3") == 0.0
+
+    def test_http_date(self):
+        value = formatdate(time.time() + 30, usegmt=True)
+        delay = parse_retry_after(value)
+        assert delay is not None
+        assert 28 <= delay <= 31
+
+    def test_missing_or_garbage(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+
+class TokenBucketTest(IsolatedAsyncioTestCase):
+
+    async def test_burst_then_paced(self):
+        bucket = TokenBucket(rate=50.0, burst=2)
+        started = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        # Two tokens from the burst, two more at 50/s.
+        assert time.monotonic() - started >= 0.03
+
+    async def test_throttled_halves_rate_down_to_floor(self):
+        bucket = TokenBucket(rate=4.0, burst=4, min_rate=1.0)
+        bucket.throttled(0.0)
+        assert bucket.rate == 2.0
+        bucket.throttled(0.0)
+        bucket.throttled(0.0)
+        assert bucket.rate == 1.0
+        assert bucket.throttle_count == 3
+        assert bucket.tokens == 0.0
+
+    async def test_success_recovers_rate(self):
+        bucket = TokenBucket(rate=4.0, burst=4, min_rate=1.0, recovery_fraction=0.25)
+        bucket.throttled(0.0)
+        bucket.succeeded()
+        assert bucket.rate == 3.0
+        bucket.succeeded()
+        bucket.succeeded()
+        assert bucket.rate == 4.0
+
+    async def test_retry_after_blocks_acquire(self):
+        bucket = TokenBucket(rate=1000.0, burst=10)
+        bucket.throttled(0.05)
+        started = time.monotonic()
+        await bucket.acquire()
+        assert time.monotonic() - started >= 0.05
+
+    async def test_interactive_takes_the_next_token(self):
+        bucket = TokenBucket(rate=20.0, burst=1)
+        await bucket.acquire()
+        order: list[Priority] = []
+
+        async def take(priority):
+            await bucket.acquire(priority)
+            order.append(priority)
+
+        background = [asyncio.create_task(take(Priority.BACKGROUND)) for _ in range(5)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(take(Priority.INTERACTIVE))
+        await asyncio.gather(interactive, *background)
+        assert order[0] is Priority.INTERACTIVE
+
+
+class _Client:
+    def __init__(self, response: ApiResponse):
+        self.rate_limiter = RateLimiter()
+        self.response = response
+        self.access_token = "token"
+        self.calls = 0
+
+    @request_with_active_session
+    async def call(self):
+        return await self._request(url=GATEWAY_URL)
+
+    @request_with_rate_limit
+    @request_with_errors
+    async def _request(self, *, url: str) -> ApiResponse:
+        self.calls += 1
+        return self.response
+
+
+class ThrottledResponseTest(IsolatedAsyncioTestCase):
+
+    async def test_429_raises_rate_error_with_retry_after(self):
+        client = _Client(ApiResponse(
+            status=429, headers={"Retry-After": "12"}, raw=b"Too Many Requests",
+        ))
+        with self.assertRaises(RateError) as ctx:
+            await client.call()
+        assert ctx.exception.retry_after == 12.0
+        assert ctx.exception.host == "abc.execute-api.us-east-2.amazonaws.com"
+        assert not isinstance(ctx.exception, SessionError)
+
+    async def test_429_keeps_session_and_is_not_resent(self):
+        client = _Client(ApiResponse(status=429, headers={}, raw=b""))
+        with self.assertRaises(RateError):
+            await client.call()
+        assert client.access_token == "token"
+        assert client.calls == 1
+
+    async def test_status_code_429_in_body(self):
+        client = _Client(ApiResponse(
+            status=200, headers={}, raw=b'{"statusCode": 429, "message": "slow down"}',
+        ))
+        with self.assertRaises(RateError) as ctx:
+            await client.call()
+        assert ctx.exception.retry_after is None
+
+    async def test_429_slows_down_the_host(self):
+        client = _Client(ApiResponse(status=429, headers={"Retry-After": "0"}, raw=b""))
+        with self.assertRaises(RateError):
+            await client.call()
+        bucket = client.rate_limiter.buckets["abc.execute-api.us-east-2.amazonaws.com"]
+        assert bucket.throttle_count == 1
+        assert bucket.rate < bucket.max_rate
+
+    async def test_success_takes_a_token(self):
+        client = _Client(ApiResponse(status=200, headers={}, raw=b"{}"))
+        await client.call()
+        bucket = client.rate_limiter.buckets["abc.execute-api.us-east-2.amazonaws.com"]
+        assert bucket.tokens < bucket.burst
+
+
+class ClientRateLimiterTest(TestCase):
+
+    def test_shared_limiter(self):
+        limiter = RateLimiter(rate=1.0)
+        clients = [
+            HttpAwsBlueair(
+                username=f"user{i}@example.com",
+                password="hunter2",
+                client_session=object(),  # type: ignore[arg-type]
+                rate_limiter=limiter,
+            )
+            for i in range(2)
+        ]
+        assert all(client.rate_limiter is limiter for client in clients)
+
+    def test_default_limiter_is_private(self):
+        a, b = (
+            HttpAwsBlueair(
+                username="user@example.com",
+                password="hunter2",
+                client_session=object(),  # type: ignore[arg-type]
+            )
+            for _ in range(2)
+        )
+        assert a.rate_limiter is not b.rate_limiter
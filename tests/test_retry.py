@@ -0,0 +1,186 @@
+"""Tests for the transient-failure retry policy."""
+from __future__ import annotations
+
+import json
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from aiohttp import ClientConnectorError, ServerDisconnectedError
+from aiohttp.client_reqrep import ConnectionKey
+
+from blueair_api.errors import RateError, ServerError, SessionError
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.http_blueair import HttpBlueair
+from blueair_api.retry import NO_RETRY, RetryPolicy
+
+
+def _connector_error() -> ClientConnectorError:
+    key = ConnectionKey("example.com", 443, True, None, None, None, None)
+    return ClientConnectorError(key, OSError("connection refused"))
+
+
+class _FakeClientResponse:
+    def __init__(self, status: int, body: Any):
+        self.status = status
+        self.headers: dict[str, str] = {}
+        self.charset = "utf-8"
+        self._raw = body if isinstance(body, bytes) else json.dumps(body).encode()
+
+    async def read(self) -> bytes:
+        return self._raw
+
+    def release(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    """Replays queued responses (or raises queued errors) for any request."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def _next(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    get = _next
+    post = _next
+
+
+FAST = RetryPolicy(base_delay=0.0)
+
+
+class RetryPolicyTest(TestCase):
+
+    def test_backoff_grows_and_is_capped(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=3.0, jitter=0.0)
+        assert [policy.backoff(n) for n in (1, 2, 3, 4)] == [1.0, 2.0, 3.0, 3.0]
+
+    def test_full_jitter(self):
+        policy = RetryPolicy(base_delay=1.0, jitter=1.0, rng=lambda: 0.75)
+        assert policy.backoff(1) == 0.25
+
+    def test_gives_up_after_max_attempts(self):
+        policy = RetryPolicy(max_attempts=2)
+        assert policy.retry_delay(ServerError("boom"), 1) is not None
+        assert policy.retry_delay(ServerError("boom"), 2) is None
+
+    def test_auth_errors_are_not_retried(self):
+        assert RetryPolicy().retry_delay(SessionError("expired"), 1) is None
+
+    def test_rate_error_waits_for_retry_after(self):
+        policy = RetryPolicy(max_delay=5.0)
+        assert policy.retry_delay(RateError(retry_after=2.0), 1) == 2.0
+        assert policy.retry_delay(RateError(retry_after=60.0), 1) is None
+
+    def test_non_idempotent_only_retries_unsent_requests(self):
+        policy = RetryPolicy()
+        assert policy.retry_delay(ServerError("boom"), 1, idempotent=False) is None
+        assert policy.retry_delay(ServerDisconnectedError(), 1, idempotent=False) is None
+        assert policy.retry_delay(_connector_error(), 1, idempotent=False) is not None
+        assert policy.retry_delay(RateError(), 1, idempotent=False) is not None
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+        with self.assertRaises(ValueError):
+            RetryPolicy(jitter=1.5)
+
+
+class AwsClientRetryTest(IsolatedAsyncioTestCase):
+
+    def _make(self, session, policy=FAST) -> HttpAwsBlueair:
+        client = HttpAwsBlueair(
+            username="user@example.com",
+            password="hunter2",
+            client_session=session,
+            retry_policy=policy,
+        )
+        client.access_token = "token"
+        client.user_id = "user-1"
+        return client
+
+    async def test_5xx_read_is_retried(self):
+        session = _FakeSession(
+            _FakeClientResponse(503, {"message": "unavailable"}),
+            _FakeClientResponse(200, {"devices": ["a"]}),
+        )
+        client = self._make(session)
+        assert await client.devices() == ["a"]
+        assert session.calls == 2
+
+    async def test_dropped_connection_is_retried(self):
+        session = _FakeSession(
+            ServerDisconnectedError(),
+            _FakeClientResponse(200, {"devices": []}),
+        )
+        assert await self._make(session).devices() == []
+        assert session.calls == 2
+
+    async def test_gives_up_with_server_error(self):
+        session = _FakeSession(*(_FakeClientResponse(502, {}) for _ in range(3)))
+        with self.assertRaises(ServerError) as ctx:
+            await self._make(session).devices()
+        assert ctx.exception.status == 502
+        assert isinstance(ctx.exception, ValueError)
+        assert session.calls == 3
+
+    async def test_set_device_info_not_resent_after_5xx(self):
+        session = _FakeSession(
+            _FakeClientResponse(503, {}),
+            _FakeClientResponse(200, {"result": "ok"}),
+        )
+        with self.assertRaises(ServerError):
+            await self._make(session).set_device_info("uuid", "fanspeed", "v", 2)
+        assert session.calls == 1
+
+    async def test_set_device_info_resent_when_never_sent(self):
+        session = _FakeSession(
+            _connector_error(),
+            _FakeClientResponse(200, {"result": "ok"}),
+        )
+        await self._make(session).set_device_info("uuid", "fanspeed", "v", 2)
+        assert session.calls == 2
+
+    async def test_no_retry_policy(self):
+        session = _FakeSession(_FakeClientResponse(503, {}))
+        with self.assertRaises(ServerError):
+            await self._make(session, NO_RETRY).devices()
+        assert session.calls == 1
+
+
+class LegacyClientRetryTest(IsolatedAsyncioTestCase):
+
+    def _make(self, session) -> HttpBlueair:
+        return HttpBlueair(
+            username="user@example.com",
+            password="hunter2",
+            home_host="home.example.com",
+            auth_token="token",
+            client_session=session,
+            retry_policy=FAST,
+        )
+
+    async def test_5xx_read_is_retried(self):
+        session = _FakeSession(
+            _FakeClientResponse(500, b"oops"),
+            _FakeClientResponse(200, [{"uuid": "a"}]),
+        )
+        assert await self._make(session).get_devices() == [{"uuid": "a"}]
+        assert session.calls == 2
+
+    async def test_setter_not_resent_after_5xx(self):
+        session = _FakeSession(_FakeClientResponse(500, b"oops"))
+        with self.assertRaises(ServerError):
+            await self._make(session).set_child_lock("uuid", True)
+        assert session.calls == 1
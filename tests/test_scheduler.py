@@ -0,0 +1,166 @@
+"""Tests for priority-lane request scheduling."""
+from __future__ import annotations
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.rate_limit import RateLimiter
+from blueair_api.retry import NO_RETRY
+from blueair_api.scheduler import (
+    Priority,
+    RequestScheduler,
+    current_priority,
+    request_priority,
+)
+from blueair_api.util_http import ApiResponse
+
+
+class RequestSchedulerTest(IsolatedAsyncioTestCase):
+
+    async def hold(self, scheduler, priority, started, release):
+        async with scheduler.slot(priority):
+            started.append(priority)
+            await release.wait()
+
+    async def test_lane_cap_keeps_slots_for_interactive(self):
+        scheduler = RequestScheduler(
+            total_limit=3, lane_limits={Priority.BACKGROUND: 2, Priority.INTERACTIVE: 3}
+        )
+        started: list[Priority] = []
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(self.hold(scheduler, Priority.BACKGROUND, started, release))
+            for _ in range(4)
+        ]
+        await asyncio.sleep(0)
+        assert started == [Priority.BACKGROUND] * 2
+        assert scheduler.waiting(Priority.BACKGROUND) == 2
+
+        tasks.append(asyncio.create_task(self.hold(scheduler, Priority.INTERACTIVE, started, release)))
+        await asyncio.sleep(0)
+        assert started[-1] == Priority.INTERACTIVE
+        release.set()
+        await asyncio.gather(*tasks)
+        assert scheduler.active == 0
+
+    async def test_interactive_waiter_goes_first(self):
+        scheduler = RequestScheduler(total_limit=1)
+        order: list[Priority] = []
+        first_release = asyncio.Event()
+        release = asyncio.Event()
+        release.set()
+        first = asyncio.create_task(self.hold(scheduler, Priority.BACKGROUND, [], first_release))
+        await asyncio.sleep(0)
+        background = asyncio.create_task(self.hold(scheduler, Priority.BACKGROUND, order, release))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(self.hold(scheduler, Priority.INTERACTIVE, order, release))
+        await asyncio.sleep(0)
+        first_release.set()
+        await asyncio.gather(first, background, interactive)
+        assert order == [Priority.INTERACTIVE, Priority.BACKGROUND]
+
+    async def test_cancelled_waiter_gives_up_its_place(self):
+        scheduler = RequestScheduler(total_limit=1)
+        release = asyncio.Event()
+        holder = asyncio.create_task(self.hold(scheduler, Priority.BACKGROUND, [], release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(self.hold(scheduler, Priority.INTERACTIVE, [], release))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert scheduler.waiting(Priority.INTERACTIVE) == 0
+        release.set()
+        await holder
+        assert scheduler.active == 0
+
+    async def test_priority_context(self):
+        assert current_priority() is Priority.BACKGROUND
+        with request_priority(Priority.INTERACTIVE):
+            assert current_priority() is Priority.INTERACTIVE
+        assert current_priority() is Priority.BACKGROUND
+
+    def test_invalid_limits(self):
+        with self.assertRaises(ValueError):
+            RequestScheduler(total_limit=0)
+        with self.assertRaises(ValueError):
+            RequestScheduler(lane_limits={Priority.BACKGROUND: 0})
+
+
+class ClientPriorityTest(IsolatedAsyncioTestCase):
+
+    async def test_set_device_info_runs_interactive(self):
+        client = HttpAwsBlueair(
+            username="user@example.com",
+            password="hunter2",
+            client_session=object(),  # type: ignore[arg-type]
+        )
+        client.access_token = "token"
+        seen: list[Priority] = []
+
+        async def fake_post(url, headers=None, json_body=None, form_data=None, idempotent=True):
+            seen.append(current_priority())
+            return ApiResponse(status=200, headers={}, raw=b'"Success"')
+
+        with mock.patch.object(
+            client, "_post_request_with_logging_and_errors_raised", side_effect=fake_post
+        ):
+            await client.set_device_info("uuid", "fanspeed", "v", 37)
+        assert seen == [Priority.INTERACTIVE]
+        assert current_priority() is Priority.BACKGROUND
+
+    async def test_interactive_request_skips_queued_background_tokens(self):
+        # 5 req/s with no burst: 20 queued polls take about 4s to drain.
+        client = HttpAwsBlueair(
+            username="user@example.com",
+            password="hunter2",
+            client_session=_FakeSession(),  # type: ignore[arg-type]
+            rate_limiter=RateLimiter(rate=5.0, burst=1),
+            retry_policy=NO_RETRY,
+        )
+        url = "https://abc.execute-api.us-east-2.amazonaws.com/prod/c/x"
+        polls = [
+            asyncio.create_task(
+                client._get_request_with_logging_and_errors_raised(url=url, headers={})
+            )
+            for _ in range(20)
+        ]
+        await asyncio.sleep(0.05)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with request_priority(Priority.INTERACTIVE):
+            await client._post_request_with_logging_and_errors_raised(
+                url=url, headers={}, json_body={}, idempotent=False
+            )
+        # One token interval, not twenty.
+        assert loop.time() - started < 0.5
+        assert sum(poll.done() for poll in polls) <= 3
+        for poll in polls:
+            poll.cancel()
+        await asyncio.gather(*polls, return_exceptions=True)
+
+
+class _FakeResponse:
+    status = 200
+    headers: dict[str, str] = {}
+    charset = "utf-8"
+
+    async def read(self) -> bytes:
+        return b"{}"
+
+    def release(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    def get(self, **kwargs):
+        return _FakeResponse()
+
+    post = get
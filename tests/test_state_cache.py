@@ -0,0 +1,174 @@
+"""Tests for the stale-while-revalidate device state cache."""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from blueair_api.errors import ServerError
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.scheduler import Priority, current_priority, request_priority
+from blueair_api.state_cache import StateCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Fetcher:
+    """Returns 1, 2, 3, ... on successive calls, optionally after a delay."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.priorities: list[Priority] = []
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        call = self.calls
+        self.priorities.append(current_priority())
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ServerError("unavailable", status=503)
+        return call
+
+
+class StateCacheTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = StateCache(fresh_ttl=10, stale_ttl=60, clock=self.clock)
+        self.key = ("device-1", "device_info")
+
+    async def test_fresh_entry_is_served_without_fetching(self):
+        fetch = _Fetcher()
+        assert await self.cache.get(self.key, fetch) == 1
+        self.clock.now += 9
+        assert await self.cache.get(self.key, fetch) == 1
+        assert fetch.calls == 1
+        assert (self.cache.hits, self.cache.misses) == (1, 1)
+
+    async def test_stale_entry_is_served_and_revalidated(self):
+        fetch = _Fetcher()
+        await self.cache.get(self.key, fetch)
+        self.clock.now += 30
+        fetch.delay = 0.01
+        assert await self.cache.get(self.key, fetch) == 1
+        assert await self.cache.get(self.key, fetch) == 1
+        await asyncio.sleep(0.02)
+        assert fetch.calls == 2
+        assert await self.cache.get(self.key, fetch) == 2
+        assert self.cache.stale_hits == 2
+
+    async def test_revalidation_runs_in_the_background_lane(self):
+        fetch = _Fetcher()
+        await self.cache.get(self.key, fetch)
+        self.clock.now += 30
+        with request_priority(Priority.INTERACTIVE):
+            await self.cache.get(self.key, fetch)
+        await asyncio.sleep(0)
+        assert fetch.priorities == [Priority.BACKGROUND, Priority.BACKGROUND]
+
+    async def test_expired_entry_blocks(self):
+        fetch = _Fetcher()
+        await self.cache.get(self.key, fetch)
+        self.clock.now += 60
+        assert await self.cache.get(self.key, fetch) == 2
+        assert self.cache.misses == 2
+
+    async def test_concurrent_misses_share_one_fetch(self):
+        fetch = _Fetcher(delay=0.01)
+        results = await asyncio.gather(*(self.cache.get(self.key, fetch) for _ in range(5)))
+        assert results == [1] * 5
+        assert fetch.calls == 1
+
+    async def test_failed_revalidation_keeps_stale_entry(self):
+        await self.cache.get(self.key, _Fetcher())
+        self.clock.now += 30
+        failing = _Fetcher(fail=True)
+        assert await self.cache.get(self.key, failing) == 1
+        await asyncio.sleep(0)
+        assert failing.calls == 1
+        assert await self.cache.get(self.key, failing) == 1
+
+    async def test_miss_propagates_errors(self):
+        with self.assertRaises(ServerError):
+            await self.cache.get(self.key, _Fetcher(fail=True))
+
+    async def test_invalidate_discards_fetch_in_flight(self):
+        fetch = _Fetcher(delay=0.01)
+        waiting = asyncio.create_task(self.cache.get(self.key, fetch))
+        await asyncio.sleep(0)
+        self.cache.invalidate("device-1")
+        # The caller that was already waiting still gets an answer ...
+        assert await waiting == 1
+        # ... but it was fetched before the change and is not cached.
+        assert await self.cache.get(self.key, fetch) == 2
+        self.cache.invalidate("device-2")
+        assert await self.cache.get(self.key, fetch) == 2
+
+
+class StateCacheSettingsTest(TestCase):
+
+    def test_invalid_ttls(self):
+        with self.assertRaises(ValueError):
+            StateCache(fresh_ttl=60, stale_ttl=10)
+
+
+class _FakeClientResponse:
+    def __init__(self, body: Any):
+        self.status = 200
+        self.headers: dict[str, str] = {}
+        self.charset = "utf-8"
+        self._raw = json.dumps(body).encode()
+
+    async def read(self) -> bytes:
+        return self._raw
+
+    def release(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.reads = 0
+        self.commands = 0
+
+    def post(self, url, **kwargs):
+        if url.endswith("/r/initial"):
+            self.reads += 1
+            return _FakeClientResponse({"deviceInfo": [{"id": "device-1", "read": self.reads}]})
+        self.commands += 1
+        return _FakeClientResponse({})
+
+
+class AwsClientStateCacheTest(IsolatedAsyncioTestCase):
+
+    async def test_device_info_cached_until_command(self):
+        session = _FakeSession()
+        client = HttpAwsBlueair(
+            username="user@example.com",
+            password="hunter2",
+            client_session=session,  # type: ignore[arg-type]
+            state_cache=StateCache(),
+        )
+        client.access_token = "token"
+        client.user_id = "user-1"
+        assert (await client.device_info("name", "device-1"))["read"] == 1
+        assert (await client.device_info("name", "device-1"))["read"] == 1
+        assert session.reads == 1
+        await client.set_device_info("device-1", "fanspeed", "v", 37)
+        assert session.commands == 1
+        assert (await client.device_info("name", "device-1"))["read"] == 2
@@ -0,0 +1,136 @@
+"""Tests for incremental telemetry fetching in ``device_sensors``."""
+from __future__ import annotations
+
+import json
+import time
+from datetime import timedelta
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
+
+from blueair_api import intermediate_representation_aws as ir
+from blueair_api.http_aws_blueair import HttpAwsBlueair
+from blueair_api.telemetry_cache import DEFAULT_TELEMETRY_OVERLAP, TelemetryHistory
+from blueair_api.util_http import ApiResponse
+
+SENSORS = ["pm1", "pm2_5", "pm10", "tVOC", "hcho", "h", "t", "fsp0"]
+
+
+def telemetry(datapoints: list[list[Any]], sensors: list[str] = SENSORS) -> list[dict[str, Any]]:
+    return [{
+        "datapoints": datapoints,
+        "sensors": sensors,
+        "start": "0",
+        "end": "0",
+        "did": "device-1",
+    }]
+
+
+def row(timestamp: int, value: int) -> list[Any]:
+    return [str(timestamp), *(str(value) for _ in SENSORS)]
+
+
+class TelemetryHistoryTest(TestCase):
+
+    def test_round_trip_matches_full_response(self):
+        history = TelemetryHistory()
+        response = telemetry([row(300, 1), row(600, 2)])
+        assert history.merge(response, 0, 900, SENSORS)
+        rebuilt = history.to_response()
+        assert rebuilt[0]["datapoints"] == response[0]["datapoints"]
+        assert rebuilt[0]["sensors"] == SENSORS
+        assert rebuilt[0]["did"] == "device-1"
+        assert ir.SensorHistory(rebuilt).to_latest().values["pm1"] == 2
+
+    def test_overlap_replaces_and_extends(self):
+        history = TelemetryHistory()
+        history.merge(telemetry([row(300, 1), row(600, 2)]), 0, 700, SENSORS)
+        history.merge(telemetry([row(600, 5), row(900, 6)]), 0, 1000, SENSORS)
+        values = [dp[1] for dp in history.to_response()[0]["datapoints"]]
+        assert values == ["1", "5", "6"]
+
+    def test_old_buckets_pruned(self):
+        history = TelemetryHistory()
+        history.merge(telemetry([row(300, 1), row(600, 2)]), 0, 700, SENSORS)
+        history.merge(telemetry([row(900, 3)]), 500, 1000, SENSORS)
+        timestamps = [dp[0] for dp in history.to_response()[0]["datapoints"]]
+        assert timestamps == ["600", "900"]
+
+    def test_fetch_from_uses_last_bucket_with_overlap(self):
+        history = TelemetryHistory()
+        assert history.fetch_from(100) == 100
+        history.merge(telemetry([row(5000, 1)]), 100, 5100, SENSORS)
+        assert history.fetch_from(200) == 5000 - DEFAULT_TELEMETRY_OVERLAP
+        # Never earlier than the window asked for.
+        assert history.fetch_from(4900) == 4900
+
+    def test_covers(self):
+        history = TelemetryHistory()
+        assert not history.covers(100, SENSORS)
+        history.merge(telemetry([]), 100, 200, SENSORS)
+        assert history.covers(150, SENSORS)
+        assert not history.covers(50, SENSORS)
+        assert not history.covers(150, [*SENSORS, "co2"])
+
+    def test_malformed_response_not_merged(self):
+        history = TelemetryHistory()
+        assert not history.merge([], 0, 100)
+        assert not history.merge([{"sensors": SENSORS}], 0, 100)
+        assert history.window_start is None
+
+
+class IncrementalDeviceSensorsTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.client = HttpAwsBlueair(
+            username="user@example.com",
+            password="hunter2",
+            client_session=object(),  # type: ignore[arg-type]
+        )
+        self.client.access_token = "token"
+        self.client.user_id = "user-1"
+        self.params: list[dict[str, Any]] = []
+        self.responses: list[list[dict[str, Any]]] = []
+
+        async def fake_get(url, headers=None, params=None, idempotent=True):
+            self.params.append(params)
+            body = self.responses.pop(0)
+            return ApiResponse(status=200, headers={}, raw=json.dumps(body).encode())
+
+        patcher = mock.patch.object(
+            self.client, "_get_request_with_logging_and_errors_raised", side_effect=fake_get
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_second_poll_fetches_only_new_buckets(self):
+        now = int(time.time())
+        self.responses = [
+            telemetry([row(now - 3600, 1), row(now - 600, 2)]),
+            telemetry([row(now - 600, 3), row(now - 300, 4)]),
+        ]
+        first = await self.client.device_sensors("name", "device-1")
+        assert len(first[0]["datapoints"]) == 2
+        second = await self.client.device_sensors("name", "device-1")
+
+        assert self.params[1]["from"] == now - 600 - DEFAULT_TELEMETRY_OVERLAP
+        assert self.params[1]["from"] > self.params[0]["from"]
+        values = [dp[1] for dp in second[0]["datapoints"]]
+        assert values == ["1", "3", "4"]
+
+    async def test_longer_window_refetches_everything(self):
+        now = int(time.time())
+        self.responses = [telemetry([row(now - 300, 1)]), telemetry([row(now - 300, 1)])]
+        await self.client.device_sensors("name", "device-1", duration=timedelta(hours=1))
+        await self.client.device_sensors("name", "device-1", duration=timedelta(hours=10))
+        assert self.params[1]["from"] <= now - 10 * 3600 + 5
+
+    async def test_disabled(self):
+        self.client.incremental_telemetry = False
+        now = int(time.time())
+        raw = telemetry([row(now - 300, 1)])
+        self.responses = [raw, raw]
+        await self.client.device_sensors("name", "device-1")
+        assert await self.client.device_sensors("name", "device-1") == raw
+        # Both polls asked for the full window.
+        assert abs(self.params[0]["from"] - self.params[1]["from"]) <= 1
+        assert self.client.telemetry_cache == {}
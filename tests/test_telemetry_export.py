@@ -0,0 +1,103 @@
+"""Tests for the streaming historical telemetry export."""
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+from datetime import timedelta
+from typing import Any
+from unittest import IsolatedAsyncioTestCase
+
+from blueair_api.telemetry_export import iter_telemetry, write_csv, write_ndjson
+
+SENSORS = ["pm2_5", "tVOC"]
+BUCKET = 300
+
+
+class FakeApi:
+    """Serves a synthetic bucket every 5 minutes for each device."""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls: list[tuple[str, int, int]] = []
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+
+    async def device_telemetry(self, device_uuid, start, end, sensors=None) -> Any:
+        self.calls.append((device_uuid, start, end))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        first = -(-start // BUCKET) * BUCKET
+        # Like the real endpoint, both ends are inclusive.
+        datapoints = [
+            [str(ts), str(ts // BUCKET), None]
+            for ts in range(first, end + 1, BUCKET)
+        ]
+        return [{"datapoints": datapoints, "sensors": SENSORS, "did": device_uuid}]
+
+
+async def collect(iterator) -> list:
+    return [record async for record in iterator]
+
+
+class IterTelemetryTest(IsolatedAsyncioTestCase):
+
+    async def test_windows_cover_range_once_in_time_order(self):
+        api = FakeApi()
+        records = await collect(iter_telemetry(
+            api, ["b", "a"], 0, 3600, window=timedelta(minutes=20)))
+
+        assert len(api.calls) == 6  # three windows, two devices
+        assert [(r.timestamp, r.device_uuid) for r in records[:4]] == [
+            (0, "b"), (0, "a"), (300, "b"), (300, "a"),
+        ]
+        timestamps = [r.timestamp for r in records if r.device_uuid == "a"]
+        assert timestamps == list(range(0, 3600, BUCKET))
+        assert records[2].values == {"pm2_5": 1}
+
+    async def test_concurrency_is_bounded(self):
+        api = FakeApi(delay=0.01)
+        await collect(iter_telemetry(
+            api, [f"d{i}" for i in range(8)], 0, 7200,
+            window=timedelta(minutes=30), concurrency=3))
+        assert api.max_active <= 3
+        assert len(api.calls) == 8 * 4
+
+    async def test_early_exit_cancels_prefetch(self):
+        api = FakeApi(delay=0.01)
+        iterator = iter_telemetry(api, ["a"], 0, 86400, window=timedelta(hours=1))
+        async for _ in iterator:
+            break
+        await iterator.aclose()
+        await asyncio.sleep(0.05)
+        # Only the first window and the one fetched ahead were requested.
+        assert len(api.calls) <= 2
+
+    async def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            await collect(iter_telemetry(FakeApi(), ["a"], 0, 10, concurrency=0))
+        with self.assertRaises(ValueError):
+            await collect(iter_telemetry(FakeApi(), ["a"], 0, 10, window=timedelta(0)))
+
+
+class WritersTest(IsolatedAsyncioTestCase):
+
+    async def test_ndjson(self):
+        out = io.StringIO()
+        count = await write_ndjson(iter_telemetry(FakeApi(), ["a"], 0, 600), out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert count == 2
+        assert lines[1] == {"device_uuid": "a", "timestamp": 300, "pm2_5": 1}
+
+    async def test_csv(self):
+        out = io.StringIO()
+        count = await write_csv(iter_telemetry(FakeApi(), ["a"], 0, 600), out, SENSORS)
+        rows = list(csv.reader(io.StringIO(out.getvalue())))
+        assert count == 2
+        assert rows[0] == ["device_uuid", "timestamp", "pm2_5", "tVOC"]
+        assert rows[2] == ["a", "300", "1", ""]
@@ -0,0 +1,36 @@
+"""Tests for the logging helpers in ``blueair_api.util``."""
+from unittest import TestCase, mock
+
+from blueair_api import util
+from blueair_api.util import JsonForLogging, RedactedForLogging
+
+
+class RedactedForLoggingTest(TestCase):
+
+    def test_redacts_only_when_formatted(self) -> None:
+        with mock.patch.object(
+            util, "clean_dictionary_for_logging", wraps=util.clean_dictionary_for_logging
+        ) as clean:
+            proxy = RedactedForLogging({"password": "hunter2", "nested": {"username": "me"}})
+            clean.assert_not_called()
+            text = str(proxy)
+        clean.assert_called()
+        assert "hunter2" not in text
+        assert "'me'" not in text
+        assert "nested" in text
+
+    def test_redacts_dicts_inside_lists(self) -> None:
+        assert "hunter2" not in str(RedactedForLogging([{"password": "hunter2"}, 3]))
+
+    def test_scalars_pass_through(self) -> None:
+        assert str(RedactedForLogging("Success")) == "Success"
+
+
+class JsonForLoggingTest(TestCase):
+
+    def test_dumps_only_when_formatted(self) -> None:
+        with mock.patch.object(util.json, "dumps", return_value="{}") as dumps:
+            proxy = JsonForLogging({"a": 1})
+            dumps.assert_not_called()
+            assert str(proxy) == "{}"
+        dumps.assert_called_once_with({"a": 1}, indent=2)
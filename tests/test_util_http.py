@@ -0,0 +1,132 @@
+"""Tests for the parse-once ``ApiResponse`` envelope and request logging."""
+from __future__ import annotations
+
+import json
+import logging
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
+
+from blueair_api import util_http
+from blueair_api.util_http import ApiResponse, ConnectionOptions, request_with_logging
+
+
+class _FakeClientResponse:
+    def __init__(self, raw: bytes, status: int = 200, charset: str | None = None) -> None:
+        self._raw = raw
+        self.status = status
+        self.charset = charset
+        self.headers = {"Content-Type": "text/javascript"}
+        self.released = False
+
+    async def read(self) -> bytes:
+        return self._raw
+
+    def release(self) -> None:
+        self.released = True
+
+
+class ApiResponseTest(TestCase):
+
+    def test_json_decoded_once(self) -> None:
+        response = ApiResponse(status=200, headers={}, raw=b'{"a": [1, 2]}')
+        with mock.patch.object(util_http.codec, "loads", wraps=util_http.codec.loads) as loads:
+            assert response.json == {"a": [1, 2]}
+            assert response.json == {"a": [1, 2]}
+            assert response.is_json
+        loads.assert_called_once()
+
+    def test_invalid_json_error_is_cached(self) -> None:
+        response = ApiResponse(status=200, headers={}, raw=b"Success")
+        with mock.patch.object(util_http.codec, "loads", wraps=util_http.codec.loads) as loads:
+            assert not response.is_json
+            with self.assertRaises(ValueError):
+                response.json
+        loads.assert_called_once()
+        assert response.text == "Success"
+
+    def test_empty_body_is_not_json(self) -> None:
+        response = ApiResponse(status=502, headers={}, raw=b"")
+        with self.assertRaises(ValueError):
+            response.json
+
+    def test_json_null_is_valid(self) -> None:
+        response = ApiResponse(status=200, headers={}, raw=b"null")
+        assert response.is_json
+        assert response.json is None
+
+
+class ApiResponseReadTest(IsolatedAsyncioTestCase):
+
+    async def test_read_releases_connection(self) -> None:
+        client_response = _FakeClientResponse(b'"caf\xc3\xa9"', status=201)
+        response = await ApiResponse.read(client_response)  # type: ignore[arg-type]
+        assert client_response.released
+        assert response.status == 201
+        assert response.headers["Content-Type"] == "text/javascript"
+        assert response.json == "café"
+        assert response.text == '"café"'
+
+    async def test_read_honours_charset(self) -> None:
+        client_response = _FakeClientResponse("é".encode("latin-1"), charset="latin-1")
+        response = await ApiResponse.read(client_response)  # type: ignore[arg-type]
+        assert response.text == "é"
+
+
+class RequestWithLoggingTest(IsolatedAsyncioTestCase):
+
+    async def test_logging_redacts_and_returns_envelope(self) -> None:
+        envelope = ApiResponse(status=200, headers={}, raw=b'{"password": "hunter2", "ok": 1}')
+
+        @request_with_logging
+        async def request(url: str, json_body: dict | None = None) -> ApiResponse:
+            return envelope
+
+        with self.assertLogs("blueair_api.util_http", level="DEBUG") as cm:
+            result = await request(url="https://example", json_body={"username": "me"})
+        assert result is envelope
+        output = "\n".join(cm.output)
+        assert "hunter2" not in output
+        assert "'me'" not in output
+        assert "'ok': 1" in output
+
+    async def test_logging_non_json_body(self) -> None:
+        @request_with_logging
+        async def request(url: str) -> ApiResponse:
+            return ApiResponse(status=200, headers={}, raw=b"Success")
+
+        with self.assertLogs("blueair_api.util_http", level="DEBUG") as cm:
+            await request(url="https://example")
+        assert any("response raw: Success" in line for line in cm.output)
+
+
+class DisabledDebugLoggingTest(IsolatedAsyncioTestCase):
+    """With DEBUG off, request logging must not format or redact anything."""
+
+    async def test_no_redaction_when_debug_disabled(self) -> None:
+        logger = logging.getLogger("blueair_api.util_http")
+        previous = logger.level
+        logger.setLevel(logging.INFO)
+        self.addCleanup(logger.setLevel, previous)
+
+        @request_with_logging
+        async def request(url: str, json_body: dict | None = None) -> ApiResponse:
+            return ApiResponse(status=200, headers={}, raw=b'{"ok": 1}')
+
+        with mock.patch("blueair_api.util.clean_dictionary_for_logging") as clean:
+            response = await request(url="https://example", json_body={"password": "x"})
+        clean.assert_not_called()
+        # The body was not decoded just for logging either.
+        assert response._json is util_http._UNDECODED
+
+
+class ConnectionOptionsTest(IsolatedAsyncioTestCase):
+
+    async def test_create_session_applies_pool_settings(self) -> None:
+        options = ConnectionOptions(limit=20, limit_per_host=4, ttl_dns_cache=60)
+        session = options.create_session()
+        try:
+            connector = session.connector
+            assert connector is not None
+            assert connector.limit == 20
+            assert connector.limit_per_host == 4
+        finally:
+            await session.close()